@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选题流水线基准测试
+
+在本地替身服务（mock_hot_server.py）上测量端到端吞吐：
+    fetch_all_* → filter_topics_by_category → recommend_topics
+
+每个数据源跑多轮，输出各阶段耗时（最小/中位数/P95）、选题吞吐量，
+以及替身服务的请求统计（错误和超时注入情况）。
+
+用法：
+    python bench_topic_pipeline.py --rounds 20 --latency 50 --jitter 20
+    python bench_topic_pipeline.py --error-rate 0.1 --timeout-rate 0.05 --request-timeout 1
+    python bench_topic_pipeline.py --sources dailyhot uapis --json bench.json
+"""
+
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import topic_selector
+from mock_hot_server import MockHotServer, patched_endpoints
+
+# Fix encoding issues on Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# 数据源 → 批量获取函数
+SOURCES: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "apihz": lambda limit: topic_selector.fetch_all_hot_topics(None, None, limit),
+    "uapis": lambda limit: topic_selector.fetch_all_uapis_topics(None, limit),
+    "dailyhot": lambda limit: topic_selector.fetch_all_dailyhot_topics(None, limit),
+}
+
+DEFAULT_NICHE = "AI"
+DEFAULT_ACCOUNT_TOPICS = ["AI 写作", "大模型 评测", "ChatGPT 使用技巧", "AI 工具"]
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """耗时样本统计（毫秒）"""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[p95_index] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def run_pipeline(source: str, limit: int, niche: str, account_topics: List[str]) -> Dict[str, Any]:
+    """
+    执行一次完整流水线并记录各阶段耗时
+
+    Returns:
+        各阶段耗时（秒）和选题数量
+    """
+    t0 = time.perf_counter()
+    hot_topics = SOURCES[source](limit)
+    t1 = time.perf_counter()
+
+    filtered_count = 0
+    for category in topic_selector.CATEGORY_KEYWORDS:
+        filtered = topic_selector.filter_topics_by_category(hot_topics, category)
+        filtered_count += filtered.get("total_topics", 0)
+    t2 = time.perf_counter()
+
+    recommended = topic_selector.recommend_topics(niche, account_topics, hot_topics)
+    t3 = time.perf_counter()
+
+    fetched_count = sum(p.get("count", 0) for p in hot_topics.get("platforms", {}).values())
+    return {
+        "fetch": t1 - t0,
+        "filter": t2 - t1,
+        "recommend": t3 - t2,
+        "total": t3 - t0,
+        "platforms": hot_topics.get("total_platforms", 0),
+        "topics": fetched_count,
+        "filtered": filtered_count,
+        "recommended": recommended.get("total_recommendations", 0),
+    }
+
+
+def benchmark(sources: List[str], rounds: int = 10, warmup: int = 1, limit: int = 20,
+              latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0,
+              timeout_rate: float = 0.0, request_timeout: float = 2.0, seed: int = 42,
+              niche: str = DEFAULT_NICHE, account_topics: List[str] = None) -> Dict[str, Any]:
+    """
+    在替身服务上对各数据源执行基准测试
+
+    Args:
+        sources: 数据源列表（apihz/uapis/dailyhot）
+        rounds: 计时轮数
+        warmup: 预热轮数（不计入统计）
+        limit: 每个平台获取数量
+        latency_ms: 替身服务固定延迟（毫秒）
+        jitter_ms: 替身服务随机抖动（毫秒）
+        error_rate: 错误注入比例
+        timeout_rate: 超时注入比例
+        request_timeout: 客户端请求超时（秒），超时注入的挂起时长会略大于它
+        seed: 随机种子
+        niche: 推荐使用的账号定位
+        account_topics: 推荐使用的历史选题
+
+    Returns:
+        基准测试报告
+    """
+    account_topics = account_topics or DEFAULT_ACCOUNT_TOPICS
+    report = {
+        "config": {
+            "rounds": rounds,
+            "warmup": warmup,
+            "limit": limit,
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "error_rate": error_rate,
+            "timeout_rate": timeout_rate,
+            "request_timeout": request_timeout,
+            "seed": seed,
+        },
+        "sources": {},
+    }
+
+    server = MockHotServer(
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        error_rate=error_rate,
+        timeout_rate=timeout_rate,
+        hang_seconds=request_timeout + 0.5,
+        seed=seed,
+    )
+
+    with server, patched_endpoints(server.base_url, request_timeout=request_timeout):
+        for source in sources:
+            for _ in range(warmup):
+                run_pipeline(source, limit, niche, account_topics)
+
+            requests_before = server.stats
+            runs = [run_pipeline(source, limit, niche, account_topics) for _ in range(rounds)]
+            requests_after = server.stats
+
+            total_time = sum(r["total"] for r in runs)
+            total_topics = sum(r["topics"] for r in runs)
+            report["sources"][source] = {
+                "stages": {stage: _summarize([r[stage] for r in runs])
+                           for stage in ("fetch", "filter", "recommend", "total")},
+                "avg_platforms": round(sum(r["platforms"] for r in runs) / rounds, 2),
+                "avg_topics": round(total_topics / rounds, 2),
+                "avg_filtered": round(sum(r["filtered"] for r in runs) / rounds, 2),
+                "avg_recommended": round(sum(r["recommended"] for r in runs) / rounds, 2),
+                "pipelines_per_sec": round(rounds / total_time, 2) if total_time else None,
+                "topics_per_sec": round(total_topics / total_time, 2) if total_time else None,
+                "server": {key: requests_after[key] - requests_before[key] for key in requests_after},
+            }
+
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    """打印人类可读的报告"""
+    config = report["config"]
+    print("=" * 70)
+    print("选题流水线基准测试")
+    print("=" * 70)
+    print(f"轮数: {config['rounds']}（预热 {config['warmup']}）  每平台数量: {config['limit']}")
+    print(f"延迟: {config['latency_ms']}ms ±{config['jitter_ms']}ms  "
+          f"错误率: {config['error_rate']}  超时率: {config['timeout_rate']}  "
+          f"客户端超时: {config['request_timeout']}s")
+
+    for source, result in report["sources"].items():
+        print("-" * 70)
+        print(f"[{source}] 平台 {result['avg_platforms']}  选题 {result['avg_topics']}  "
+              f"筛选命中 {result['avg_filtered']}  推荐 {result['avg_recommended']}")
+        print(f"  {'阶段':<10}{'min':>10}{'median':>10}{'p95':>10}{'max':>10}  (ms)")
+        for stage, stats in result["stages"].items():
+            print(f"  {stage:<10}{stats['min_ms']:>10}{stats['median_ms']:>10}"
+                  f"{stats['p95_ms']:>10}{stats['max_ms']:>10}")
+        print(f"  吞吐: {result['pipelines_per_sec']} 次/秒, {result['topics_per_sec']} 选题/秒")
+        print(f"  替身服务: {result['server']}")
+    print("=" * 70)
+
+
+def main():
+    """Command line interface"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="选题流水线离线基准测试")
+    parser.add_argument('--sources', nargs='+', choices=list(SOURCES.keys()),
+                        default=list(SOURCES.keys()), help='要测试的数据源')
+    parser.add_argument('--rounds', type=int, default=10, help='计时轮数（默认10）')
+    parser.add_argument('--warmup', type=int, default=1, help='预热轮数（默认1）')
+    parser.add_argument('--limit', type=int, default=20, help='每个平台获取数量（默认20）')
+    parser.add_argument('--latency', type=float, default=0, help='替身服务固定延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0, help='替身服务随机抖动（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='错误注入比例（0-1）')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='超时注入比例（0-1）')
+    parser.add_argument('--request-timeout', type=float, default=2.0, help='客户端请求超时（秒，默认2）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子（默认42）')
+    parser.add_argument('--json', dest='json_path', help='将报告写入JSON文件')
+
+    args = parser.parse_args()
+
+    report = benchmark(
+        sources=args.sources,
+        rounds=args.rounds,
+        warmup=args.warmup,
+        limit=args.limit,
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        request_timeout=args.request_timeout,
+        seed=args.seed,
+    )
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"报告已保存: {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热榜接口本地替身服务
+
+回放 fixtures/ 目录中录制的 apihz / api.aa1.cn / uapis.cn / DailyHotApi 响应，
+用于在无网络环境下测试和基准测试 topic_selector。
+
+支持注入：
+1. 延迟：固定延迟 + 随机抖动
+2. 错误：按比例返回 HTTP 500 或 code != 200 的业务错误
+3. 超时：按比例挂起请求，超过客户端超时时间后才返回
+
+用法：
+    # 命令行启动
+    python mock_hot_server.py --port 6688 --latency 50 --error-rate 0.1
+
+    # 代码中使用
+    with MockHotServer(latency_ms=20) as server:
+        with patched_endpoints(server.base_url):
+            topic_selector.fetch_all_dailyhot_topics()
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Fix encoding issues on Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+# 替身服务上的路径前缀（与真实接口路径保持一致）
+APIHZ_PREFIX = "/api/xinwen/"
+AA1_PATH = "/api/sougou-baidu/"
+UAPIS_PATH = "/api/v1/misc/hotboard"
+
+
+def load_fixtures(fixtures_dir: Path = FIXTURES_DIR) -> Dict[str, Dict[str, Any]]:
+    """
+    加载录制的响应数据
+
+    Args:
+        fixtures_dir: fixtures 目录
+
+    Returns:
+        {来源: {接口键: 响应体}}
+    """
+    fixtures = {}
+    for source in ("apihz", "aa1", "uapis", "dailyhot"):
+        path = fixtures_dir / f"{source}.json"
+        with open(path, "r", encoding="utf-8") as f:
+            fixtures[source] = json.load(f)
+    return fixtures
+
+
+class _HotListHandler(BaseHTTPRequestHandler):
+    """按请求路径回放对应来源的录制响应"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        server = self.server
+        with server.stats_lock:
+            server.stats["requests"] += 1
+
+        # 延迟注入
+        delay = server.latency_ms + server.rng_uniform(0, server.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        # 超时注入：挂起直到客户端放弃
+        if server.rng_uniform(0, 1) < server.timeout_rate:
+            with server.stats_lock:
+                server.stats["timeouts"] += 1
+            time.sleep(server.hang_seconds)
+            return self._send_json(504, {"code": 504, "message": "gateway timeout", "msg": "gateway timeout"})
+
+        # 错误注入：HTTP 500 / 业务错误各占一半
+        if server.rng_uniform(0, 1) < server.error_rate:
+            with server.stats_lock:
+                server.stats["errors"] += 1
+            if server.rng_uniform(0, 1) < 0.5:
+                return self._send_json(500, {"code": 500, "message": "internal error"})
+            return self._send_json(200, {"code": 429, "message": "请求过于频繁", "msg": "请求过于频繁"})
+
+        body = self._resolve(urlparse(self.path))
+        if body is None:
+            with server.stats_lock:
+                server.stats["not_found"] += 1
+            return self._send_json(404, {"code": 404, "message": "not found", "msg": "not found"})
+
+        with server.stats_lock:
+            server.stats["ok"] += 1
+        self._send_json(200, body)
+
+    def _resolve(self, parsed) -> Optional[Dict[str, Any]]:
+        """根据路径找到录制的响应体"""
+        fixtures = self.server.fixtures
+        path = parsed.path
+        query = parse_qs(parsed.query)
+
+        if path.startswith(APIHZ_PREFIX):
+            return fixtures["apihz"].get(path[len(APIHZ_PREFIX):])
+
+        if path.rstrip("/") == AA1_PATH.rstrip("/"):
+            return fixtures["aa1"]["_default"]
+
+        if path == UAPIS_PATH:
+            board = query.get("type", [""])[0]
+            body = fixtures["uapis"].get(board, fixtures["uapis"]["_default"])
+            limit = query.get("limit", [None])[0]
+            if limit and limit.isdigit():
+                body = dict(body, data=body["data"][:int(limit)])
+            return body
+
+        # DailyHotApi: /{platform}
+        board = path.strip("/")
+        if board and "/" not in board:
+            return fixtures["dailyhot"].get(board, fixtures["dailyhot"]["_default"])
+
+        return None
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端已超时断开
+
+
+class MockHotServer:
+    """
+    热榜接口本地替身服务
+
+    在后台线程运行，可作为上下文管理器使用。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0.0, timeout_rate: float = 0.0,
+                 hang_seconds: float = 12.0, seed: int = None,
+                 fixtures_dir: Path = FIXTURES_DIR, verbose: bool = False):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口（0 表示随机空闲端口）
+            latency_ms: 每个请求的固定延迟（毫秒）
+            jitter_ms: 额外随机延迟上限（毫秒）
+            error_rate: 返回错误的比例（0-1）
+            timeout_rate: 挂起请求的比例（0-1）
+            hang_seconds: 超时注入时的挂起时长，应大于客户端 REQUEST_TIMEOUT
+            seed: 随机种子（用于可复现的错误/延迟分布）
+            fixtures_dir: 录制数据目录
+            verbose: 是否打印访问日志
+        """
+        self._httpd = ThreadingHTTPServer((host, port), _HotListHandler)
+        self._httpd.daemon_threads = True
+
+        rng = random.Random(seed)
+        rng_lock = threading.Lock()
+
+        def rng_uniform(a, b):
+            with rng_lock:
+                return rng.uniform(a, b)
+
+        httpd = self._httpd
+        httpd.fixtures = load_fixtures(fixtures_dir)
+        httpd.latency_ms = latency_ms
+        httpd.jitter_ms = jitter_ms
+        httpd.error_rate = error_rate
+        httpd.timeout_rate = timeout_rate
+        httpd.hang_seconds = hang_seconds
+        httpd.rng_uniform = rng_uniform
+        httpd.verbose = verbose
+        httpd.stats_lock = threading.Lock()
+        httpd.stats = {"requests": 0, "ok": 0, "errors": 0, "timeouts": 0, "not_found": 0}
+
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._httpd.stats_lock:
+            return dict(self._httpd.stats)
+
+    def start(self) -> "MockHotServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程阻塞运行（命令行模式）"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MockHotServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+@contextmanager
+def patched_endpoints(base_url: str, request_timeout: float = None):
+    """
+    将 topic_selector 的所有热榜接口临时指向替身服务
+
+    Args:
+        base_url: 替身服务地址，如 http://127.0.0.1:6688
+        request_timeout: 临时覆盖 REQUEST_TIMEOUT（可选）
+    """
+    import topic_selector
+
+    saved = {
+        "api_endpoints": dict(topic_selector.API_ENDPOINTS),
+        "aa1": topic_selector.SOGOU_BAIDU_CONFIG["base_url"],
+        "uapis": topic_selector.UAPIS_CONFIG["base_url"],
+        "dailyhot": topic_selector.DAILYHOT_API_CONFIG["base_url"],
+        "timeout": topic_selector.REQUEST_TIMEOUT,
+    }
+
+    try:
+        for name, url in saved["api_endpoints"].items():
+            topic_selector.API_ENDPOINTS[name] = base_url + APIHZ_PREFIX + url.rsplit("/", 1)[-1]
+        topic_selector.SOGOU_BAIDU_CONFIG["base_url"] = base_url + AA1_PATH
+        topic_selector.UAPIS_CONFIG["base_url"] = base_url + UAPIS_PATH
+        topic_selector.DAILYHOT_API_CONFIG["base_url"] = base_url
+        if request_timeout is not None:
+            topic_selector.REQUEST_TIMEOUT = request_timeout
+        yield
+    finally:
+        topic_selector.API_ENDPOINTS.clear()
+        topic_selector.API_ENDPOINTS.update(saved["api_endpoints"])
+        topic_selector.SOGOU_BAIDU_CONFIG["base_url"] = saved["aa1"]
+        topic_selector.UAPIS_CONFIG["base_url"] = saved["uapis"]
+        topic_selector.DAILYHOT_API_CONFIG["base_url"] = saved["dailyhot"]
+        topic_selector.REQUEST_TIMEOUT = saved["timeout"]
+
+
+def main():
+    """Command line interface"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="热榜接口本地替身服务")
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=6688, help='监听端口（默认6688，与DailyHotApi一致）')
+    parser.add_argument('--latency', type=float, default=0, help='固定延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0, help='随机抖动上限（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='错误注入比例（0-1）')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='超时注入比例（0-1）')
+    parser.add_argument('--hang', type=float, default=12.0, help='超时注入挂起时长（秒）')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    parser.add_argument('--verbose', action='store_true', help='打印访问日志')
+
+    args = parser.parse_args()
+
+    server = MockHotServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang,
+        seed=args.seed,
+        verbose=args.verbose,
+    )
+    print(f"替身服务已启动: {server.base_url}")
+    print(f"  DailyHotApi: {server.base_url}/weibo")
+    print(f"  uapis.cn:    {server.base_url}{UAPIS_PATH}?type=weibo")
+    print(f"  apihz:       {server.base_url}{APIHZ_PREFIX}weibo2.php")
+    print(f"  api.aa1.cn:  {server.base_url}{AA1_PATH}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n统计: {server.stats}")
+
+
+if __name__ == '__main__':
+    main()
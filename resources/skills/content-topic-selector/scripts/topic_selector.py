@@ -134,6 +134,9 @@ DAILYHOT_API_CONFIG = {
     },
 }
 
+# 热榜接口请求超时（秒）
+REQUEST_TIMEOUT = 10
+
 # 公共测试凭证
 PUBLIC_CREDENTIALS = {
     "id": "88888888",
@@ -203,7 +206,7 @@ def fetch_hot_topics(platform: str = "微博热搜", token: str = None, limit: i
         }
 
         # 发送请求
-        response = requests.get(endpoint, params=params, timeout=10)
+        response = requests.get(endpoint, params=params, timeout=REQUEST_TIMEOUT)
 
         if response.status_code != 200:
             return {"error": f"API请求失败，状态码：{response.status_code}"}
@@ -268,7 +271,7 @@ def fetch_uapis_hot_topics(platform: str = "微博", limit: int = 20) -> Dict[st
         url = f"{UAPIS_CONFIG['base_url']}?type={platform_type}&limit={limit}"
 
         # 发送请求
-        response = requests.get(url, timeout=10)
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
 
         if response.status_code != 200:
             return {"error": f"API请求失败，状态码：{response.status_code}"}
@@ -380,7 +383,7 @@ def fetch_sogou_baidu_hot_topics(limit: int = 20) -> Dict[str, Any]:
         req = urllib.request.Request(url)
         req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
 
-        with urllib.request.urlopen(req, timeout=10) as response:
+        with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as response:
             data = response.read().decode('utf-8')
             json_data = json.loads(data)
 
@@ -445,7 +448,7 @@ def fetch_dailyhot_topics(platform: str = "微博", limit: int = 20) -> Dict[str
         url = f"{DAILYHOT_API_CONFIG['base_url']}/{platform_type}"
 
         # 发送请求
-        response = requests.get(url, timeout=10)
+        response = requests.get(url, timeout=REQUEST_TIMEOUT)
 
         if response.status_code != 200:
             return {"error": f"API请求失败，状态码：{response.status_code}。请检查DailyHotApi服务是否已启动（docker ps | grep dailyhot）"}
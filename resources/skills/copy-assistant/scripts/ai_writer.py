@@ -1,8 +1,16 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Tuple, Union
 import re
 import random
 from collections import Counter
 import sys
+import os
+from functools import lru_cache
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from originality_index import ORIGINALITY_INDEX_PATH, build_index, match_sentences
+from text_analysis import SENTENCE_SPLIT, TextAnalysis, analyze_text
 
 # Fix encoding issues on Windows
 if sys.platform == 'win32':
@@ -23,6 +31,7 @@ AI写作与内容优化工具
 5. 文章结构优化
 6. SEO优化
 7. 内容质量评估
+8. 综合报告（质量 + SEO + 结构，共用一次分词）
 """
 
 # 写作风格模板
@@ -118,13 +127,150 @@ OPTIMIZATION_RULES = {
 }
 
 
-def polish_text(text: str, style: str = "正式") -> Dict[str, Any]:
+# ===== 规则引擎（2026-10-19新增） =====
+# 把一组替换规则编译成一个交替正则 + 替换表，一次线性扫描完成全部替换，
+# 代替逐条 re.sub / str.replace（每条都要完整复制一遍文本）。
+
+# 规则：(正则, 替换文本或函数)；替换文本按字面量处理，需要引用分组时用函数
+Rule = Tuple[str, Union[str, Callable[["re.Match"], str]]]
+
+# 所有风格共用的清理规则（顺序即匹配优先级）
+BASE_POLISH_RULES: List[Rule] = [
+    # 连续空白合并为一个空格（单个空格本身不匹配，避免无意义的替换）
+    (r'\s(?:(?<! )|(?=\s))\s*', ' '),
+    (r'，\s*，', '，'),
+    (r'。。', '。'),
+]
+
+# 各风格的词语替换
+STYLE_REPLACEMENTS: Dict[str, Dict[str, str]] = {
+    "正式": {"咱们": "我们", "大家": "各位", "非常": "十分"},
+    "口语化": {"我们": "咱们", "各位": "大家", "十分": "超级"},
+}
+
+
+# 正则规则命中文本 -> 替换结果 的缓存上限（字面量规则单独查表，不占用该缓存）
+RULE_CACHE_SIZE = 4096
+
+_MISSING = object()
+
+
+class RuleEngine:
+    """
+    单遍替换引擎
+
+    所有规则（正则在前，字面量按长度降序在后）合并成一个交替正则，
+    re.split 一次扫描切出全部命中片段，再按命中文本查替换表拼回。
+    同一位置多条规则都能匹配时，排在前面的规则优先。
+
+    字面量规则直接查表；正则规则的命中文本对应哪条规则按顺序 fullmatch 判定，
+    结果放在大小有限的 LRU 缓存中（RULE_CACHE_SIZE），
+    因此规则不应包含依赖上下文的断言（^、$、\\b、前后向断言），替换函数应只依赖命中文本。
+    """
+
+    def __init__(self, rules: List[Rule] = None, literals: Dict[str, str] = None):
+        """
+        Args:
+            rules: 正则规则列表
+            literals: 字面量替换表 {原词: 替换词}
+        """
+        self._rules = [(re.compile(pattern), replacement) for pattern, replacement in rules or []]
+        self._table = dict(literals or {})
+
+        alternatives = [pattern for pattern, _ in rules or []]
+        alternatives += [re.escape(word) for word in sorted(self._table, key=len, reverse=True)]
+
+        self._pattern = None
+        if alternatives:
+            self._pattern = re.compile("(" + "|".join(alternatives) + ")")
+        # split 结果中每次命中占的位置数（外层分组 + 规则内部分组）
+        self._stride = self._pattern.groups + 1 if self._pattern else 1
+
+        self._resolve = lru_cache(maxsize=RULE_CACHE_SIZE)(self._resolve_rule)
+
+    def _resolve_rule(self, matched: str) -> str:
+        """确定正则规则命中文本的替换结果"""
+        for rule, replacement in self._rules:
+            match = rule.fullmatch(matched)
+            if match:
+                return replacement(match) if callable(replacement) else replacement
+        return matched
+
+    def apply(self, text: str) -> str:
+        """一次扫描应用全部规则"""
+        if self._pattern is None:
+            return text
+
+        parts = self._pattern.split(text)
+        if len(parts) == 1:
+            return text
+
+        stride = self._stride
+        lookup = self._table.get
+        resolve = self._resolve
+        replaced = []
+        for matched in parts[1::stride]:
+            # 替换结果可能是空字符串（删除类规则），用哨兵区分"未命中"
+            result = lookup(matched, _MISSING)
+            if result is _MISSING:
+                result = resolve(matched)
+            replaced.append(result)
+
+        if stride == 2:
+            parts[1::2] = replaced
+            return "".join(parts)
+
+        # 规则内部有分组时，去掉分组内容，只保留 原文片段/替换结果 交替序列
+        pieces = [None] * (2 * len(replaced) + 1)
+        pieces[0::2] = parts[0::stride]
+        pieces[1::2] = replaced
+        return "".join(pieces)
+
+
+def _optimization_rules(categories: Tuple[str, ...]) -> List[Rule]:
+    """把 OPTIMIZATION_RULES 中的类别展开成规则列表"""
+    rules = []
+    for category in categories:
+        if category not in OPTIMIZATION_RULES:
+            raise ValueError(f"不支持的优化规则: {category}")
+        config = OPTIMIZATION_RULES[category]
+        rules.extend(zip(config["patterns"], config["replacements"]))
+    return rules
+
+
+_rule_engines: Dict[Tuple[str, Tuple[str, ...]], RuleEngine] = {}
+
+
+def get_polish_engine(style: str, categories: Tuple[str, ...] = ()) -> RuleEngine:
+    """
+    获取（并缓存）某个风格的润色引擎
+
+    Args:
+        style: 写作风格
+        categories: 额外启用的 OPTIMIZATION_RULES 类别
+
+    Returns:
+        RuleEngine
+    """
+    key = (style, tuple(categories))
+    engine = _rule_engines.get(key)
+    if engine is None:
+        engine = RuleEngine(
+            BASE_POLISH_RULES + _optimization_rules(key[1]),
+            STYLE_REPLACEMENTS.get(style),
+        )
+        _rule_engines[key] = engine
+    return engine
+
+
+def polish_text(text: str, style: str = "正式", rules: List[str] = None) -> Dict[str, Any]:
     """
     润色文本内容
 
     Args:
         text: 待润色文本
         style: 写作风格
+        rules: 额外启用的优化规则类别（OPTIMIZATION_RULES 的键，可选）
 
     Returns:
         润色结果
@@ -134,31 +280,13 @@ def polish_text(text: str, style: str = "正式") -> Dict[str, Any]:
 
     style_info = WRITING_STYLES.get(style, WRITING_STYLES["正式"])
 
-    # 基础清理
-    polished = text.strip()
-
-    # 移除多余空格
-    polished = re.sub(r'\s+', ' ', polished)
+    # 基础清理 + 标点优化 + 风格用词替换，一次扫描完成
+    polished = get_polish_engine(style, tuple(rules or ())).apply(text.strip())
 
-    # 优化标点
-    polished = re.sub(r'，\s*，', '，', polished)
-    polished = re.sub(r'。。', '。', polished)
-
-    # 根据风格调整
-    if style == "正式":
-        # 转换为正式表达
-        polished = polished.replace("咱们", "我们")
-        polished = polished.replace("大家", "各位")
-        polished = polished.replace("非常", "十分")
-    elif style == "幽默":
+    if style == "幽默":
         # 添加幽默元素
         if not any(punct in polished for punct in ["哈哈", "嘿嘿", "嘻嘻"]):
             polished = polished + " 哈哈"
-    elif style == "口语化":
-        # 转换为口语
-        polished = polished.replace("我们", "咱们")
-        polished = polished.replace("各位", "大家")
-        polished = polished.replace("十分", "超级")
 
     # 计算优化指标
     original_len = len(text)
@@ -190,7 +318,7 @@ def expand_text(text: str, expansion_ratio: float = 1.5) -> Dict[str, Any]:
         return {"error": "文本内容不能为空"}
 
     # 按句子分割
-    sentences = re.split(r'[。！？]', text)
+    sentences = SENTENCE_SPLIT.split(text)
     sentences = [s.strip() for s in sentences if s.strip()]
 
     expanded_sentences = []
@@ -281,7 +409,7 @@ def compress_text(text: str, compression_ratio: float = 0.7) -> Dict[str, Any]:
         return {"error": "文本内容不能为空"}
 
     # 按句子分割
-    sentences = re.split(r'[。！？]', text)
+    sentences = SENTENCE_SPLIT.split(text)
     sentences = [s.strip() for s in sentences if s.strip()]
 
     # 计算要保留的句子数量
@@ -313,12 +441,17 @@ def compress_text(text: str, compression_ratio: float = 0.7) -> Dict[str, Any]:
     }
 
 
-def check_originality(text: str) -> Dict[str, Any]:
+def check_originality(text: str, index_path: str = None, min_overlap: float = 0.5) -> Dict[str, Any]:
     """
-    检测文本原创度（模拟）
+    检测文本原创度
+
+    有原创度指纹索引时（见 build_originality_index），逐句比对历史文章库，
+    重复句子按字数比例扣分，并返回匹配到的来源文章。
 
     Args:
         text: 待检测文本
+        index_path: 指纹索引路径（默认 ORIGINALITY_INDEX_PATH，不存在时只做文内检测）
+        min_overlap: 判定句子重复的最小指纹重合比例（0-1）
 
     Returns:
         原创度检测结果
@@ -327,7 +460,7 @@ def check_originality(text: str) -> Dict[str, Any]:
         return {"error": "文本内容不能为空"}
 
     # 简单的原创度检测（实际应用中应接入专业的查重API）
-    sentences = re.split(r'[。！？]', text)
+    sentences = SENTENCE_SPLIT.split(text)
     sentences = [s.strip() for s in sentences if s.strip()]
 
     # 模拟检测：基于句子相似度
@@ -345,15 +478,56 @@ def check_originality(text: str) -> Dict[str, Any]:
     adjusted_score = originality_score - (common_phrase_count * 0.05)
     adjusted_score = max(0, min(100, adjusted_score * 100))
 
-    return {
+    result = {
         "originality_score": round(adjusted_score, 2),
         "total_sentences": len(sentences),
         "unique_sentences": len(unique_sentences),
         "common_phrase_count": common_phrase_count,
-        "grade": _get_originality_grade(adjusted_score),
-        "suggestions": _get_originality_suggestions(adjusted_score),
     }
 
+    # 与历史文章库比对（2026-10-19新增）
+    index_path = index_path or ORIGINALITY_INDEX_PATH
+    if sentences and os.path.exists(index_path):
+        corpus = match_sentences(sentences, index_path, min_overlap)
+        total_chars = sum(len(s) for s in sentences)
+        copied_chars = sum(len(m["sentence"]) for m in corpus["sentence_matches"])
+        copied_ratio = copied_chars / total_chars if total_chars else 0.0
+
+        adjusted_score = adjusted_score * (1 - copied_ratio)
+        result.update({
+            "originality_score": round(adjusted_score, 2),
+            "copied_ratio": round(copied_ratio, 4),
+            "matched_sentences": corpus["sentence_matches"],
+            "matched_sources": corpus["sources"],
+            "indexed_documents": corpus["indexed_documents"],
+        })
+
+    result["grade"] = _get_originality_grade(adjusted_score)
+    result["suggestions"] = _get_originality_suggestions(adjusted_score)
+    if result.get("matched_sources"):
+        result["suggestions"].append(f"有{len(result['matched_sentences'])}句与历史文章重复，建议改写")
+
+    return result
+
+
+def build_originality_index(sources: List[str], index_path: str = None,
+                            patterns: List[str] = None) -> Dict[str, Any]:
+    """
+    构建原创度指纹索引（增量更新）
+
+    Args:
+        sources: 历史文章目录或数据文件列表（目录下递归读取 .md/.txt；JSON 取 articles[].content）
+        index_path: 索引保存路径（默认 ORIGINALITY_INDEX_PATH）
+        patterns: 目录中匹配的文件模式（可选）
+
+    Returns:
+        构建统计
+    """
+    if not sources:
+        return {"error": "文章来源不能为空"}
+
+    return build_index(sources, index_path, patterns)
+
 
 def _get_originality_grade(score: float) -> str:
     """
@@ -399,12 +573,13 @@ def _get_originality_suggestions(score: float) -> List[str]:
     return suggestions
 
 
-def optimize_structure(text: str) -> Dict[str, Any]:
+def optimize_structure(text: str, analysis: TextAnalysis = None) -> Dict[str, Any]:
     """
     优化文章结构
 
     Args:
         text: 待优化文本
+        analysis: 已有的文本分析结果（可选，多项分析共用时传入）
 
     Returns:
         结构优化建议
@@ -412,12 +587,11 @@ def optimize_structure(text: str) -> Dict[str, Any]:
     if not text:
         return {"error": "文本内容不能为空"}
 
-    sentences = re.split(r'[。！？]', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
+    analysis = analysis or analyze_text(text)
+    sentences = analysis.sentences
 
     # 分析段落结构
-    paragraphs = text.split('\n\n')
-    paragraphs = [p.strip() for p in paragraphs if p.strip()]
+    paragraphs = analysis.paragraphs
 
     # 分析句子长度分布
     sentence_lengths = [len(s) for s in sentences]
@@ -504,13 +678,14 @@ def _calculate_structure_score(paragraph_count: int, avg_length: float, has_subh
     return min(100, score)
 
 
-def optimize_seo(text: str, keywords: List[str] = None) -> Dict[str, Any]:
+def optimize_seo(text: str, keywords: List[str] = None, analysis: TextAnalysis = None) -> Dict[str, Any]:
     """
     SEO优化
 
     Args:
         text: 待优化文本
         keywords: 关键词列表
+        analysis: 已有的文本分析结果（可选，多项分析共用时传入）
 
     Returns:
         SEO优化建议
@@ -519,23 +694,22 @@ def optimize_seo(text: str, keywords: List[str] = None) -> Dict[str, Any]:
         return {"error": "文本内容不能为空"}
 
     # 分析文本
-    words = re.findall(r'[\w]+', text)
-    word_count = len(words)
+    analysis = analysis or analyze_text(text)
+    word_count = analysis.word_count
 
-    # 关键词分析
+    # 关键词分析（关键词在原文中的出现次数 / 总词数）
     keyword_density = {}
     if keywords:
         for keyword in keywords:
-            count = sum(1 for word in words if keyword.lower() in word.lower())
+            count = analysis.count_phrase(keyword)
             density = (count / word_count * 100) if word_count > 0 else 0
             keyword_density[keyword] = {
                 "count": count,
                 "density": round(density, 2),
             }
 
-    # 分析标题（假设第一句话是标题）
-    sentences = re.split(r'[。！？\n]', text)
-    title = sentences[0].strip() if sentences else ""
+    # 分析标题（假设第一句话的第一行是标题）
+    title = analysis.title
 
     # 文本长度分析
     text_length = len(text)
@@ -615,12 +789,13 @@ def _calculate_seo_score(keyword_density: Dict, title_length: int, text_length:
     return min(100, score)
 
 
-def evaluate_quality(text: str) -> Dict[str, Any]:
+def evaluate_quality(text: str, analysis: TextAnalysis = None) -> Dict[str, Any]:
     """
     评估内容质量
 
     Args:
         text: 待评估文本
+        analysis: 已有的文本分析结果（可选，多项分析共用时传入）
 
     Returns:
         质量评估结果
@@ -628,22 +803,19 @@ def evaluate_quality(text: str) -> Dict[str, Any]:
     if not text:
         return {"error": "文本内容不能为空"}
 
+    analysis = analysis or analyze_text(text)
+
     # 基础指标
-    word_count = len(re.findall(r'[\w]+', text))
-    sentence_count = len(re.split(r'[。！？]', text))
+    word_count = analysis.word_count
+    sentence_count = len(analysis.sentences)
     avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0
 
     # 词汇丰富度
-    words = re.findall(r'[\w]+', text)
-    unique_words = set(words)
-    vocabulary_richness = len(unique_words) / len(words) if words else 0
-
-    # 情感倾向（简单模拟）
-    positive_words = ["好", "优秀", "棒", "喜欢", "成功", "快乐", "幸福", "优秀"]
-    negative_words = ["差", "不好", "糟糕", "失败", "痛苦", "难过", "悲伤"]
+    vocabulary_richness = len(analysis.term_frequency) / word_count if word_count else 0
 
-    positive_count = sum(1 for word in words if any(pw in word for pw in positive_words))
-    negative_count = sum(1 for word in words if any(nw in word for nw in negative_words))
+    # 情感倾向（情感词典命中次数）
+    positive_count = sum(analysis.lexicon_hits["positive"].values())
+    negative_count = sum(analysis.lexicon_hits["negative"].values())
 
     # 综合评分
     quality_score = (
@@ -697,18 +869,48 @@ def _get_quality_grade(score: float) -> str:
         return "较差"
 
 
+def full_report(text: str, keywords: List[str] = None) -> Dict[str, Any]:
+    """
+    综合报告：质量评估 + SEO + 结构，三项共用一次分词
+
+    Args:
+        text: 待分析文本
+        keywords: 关键词列表（可选，用于SEO分析）
+
+    Returns:
+        综合报告
+    """
+    if not text:
+        return {"error": "文本内容不能为空"}
+
+    analysis = analyze_text(text)
+
+    return {
+        "quality": evaluate_quality(text, analysis),
+        "seo": optimize_seo(text, keywords, analysis),
+        "structure": optimize_structure(text, analysis),
+        "top_terms": [{"term": term, "count": count} for term, count in analysis.top_terms()],
+    }
+
+
 def handler(args: Dict[str, Any]) -> Dict[str, Any]:
     """
     主处理函数
 
     Args:
         args: 包含以下字段的字典
-            - action: 操作类型（polish/expand/compress/check_originality/optimize_structure/optimize_seo/evaluate_quality）
+            - action: 操作类型（polish/expand/compress/check_originality/build_originality_index/optimize_structure/optimize_seo/evaluate_quality/full_report/batch）
             - text: 待处理文本
             - style: 写作风格（可选，默认正式）
+            - rules: 润色时额外启用的优化规则类别（可选，如 ["简洁性", "可读性"]）
             - expansion_ratio: 扩写比例（可选，默认1.5）
             - compression_ratio: 精简比例（可选，默认0.7）
-            - keywords: 关键词列表（可选，用于SEO优化）
+            - keywords: 关键词列表（可选，用于SEO优化和综合报告）
+            - sources: 历史文章目录或数据文件列表（build_originality_index使用）
+            - index_path: 原创度指纹索引路径（可选）
+            - items: 批量任务列表（batch使用）。每项为文本字符串，或包含 text 及可选 action/style 等参数的字典，
+              未指定的参数取本次调用的同名参数
+            - batch_action: 批量任务的默认操作（batch可选，默认polish）
 
     Returns:
         处理结果
@@ -716,6 +918,17 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
     action = args.get("action")
     text = args.get("text", "")
 
+    if action == "batch":
+        return run_batch(args)
+
+    if action == "build_originality_index":
+        # 构建历史文章指纹索引（2026-10-19新增）
+        return build_originality_index(
+            args.get("sources", []),
+            args.get("index_path"),
+            args.get("patterns"),
+        )
+
     if not text:
         raise ValueError("文本内容不能为空")
 
@@ -723,7 +936,7 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
 
     if action == "polish":
         style = args.get("style", "正式")
-        result = polish_text(text, style)
+        result = polish_text(text, style, args.get("rules"))
 
     elif action == "expand":
         expansion_ratio = args.get("expansion_ratio", 1.5)
@@ -734,7 +947,7 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
         result = compress_text(text, compression_ratio)
 
     elif action == "check_originality":
-        result = check_originality(text)
+        result = check_originality(text, args.get("index_path"), args.get("min_overlap", 0.5))
 
     elif action == "optimize_structure":
         result = optimize_structure(text)
@@ -746,7 +959,67 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
     elif action == "evaluate_quality":
         result = evaluate_quality(text)
 
+    elif action == "full_report":
+        result = full_report(text, args.get("keywords", []))
+
     else:
         raise ValueError(f"不支持的操作类型: {action}")
 
     return result
+
+
+# ===== 批量处理（2026-10-19新增） =====
+
+BATCH_ITEM_FIELDS = ("style", "rules", "expansion_ratio", "compression_ratio", "keywords", "index_path", "min_overlap")
+
+
+def run_batch(args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    批量处理多段文本
+
+    单个任务失败不影响其他任务，结果按输入顺序返回。
+    需要调用大模型的批量改写请使用 ai_writer_zhipu.py 的 batch（共用连接池并发请求）。
+
+    Args:
+        args: handler 参数，items 为任务列表，其余字段作为各任务的默认值
+
+    Returns:
+        {"results": [{"index", "id", "success", "result"/"error"}], "total", "succeeded", "failed"}
+    """
+    items = args.get("items")
+    if not isinstance(items, list) or not items:
+        raise ValueError("批量任务列表不能为空")
+
+    defaults = {key: args[key] for key in BATCH_ITEM_FIELDS if key in args}
+    defaults["action"] = args.get("batch_action", "polish")
+
+    results = []
+    for index, item in enumerate(items):
+        entry = {"index": index}
+        if isinstance(item, dict):
+            entry["id"] = item.get("id")
+            task = {**defaults, **{k: v for k, v in item.items() if k != "id"}}
+        else:
+            task = {**defaults, "text": item}
+
+        try:
+            if task.get("action") in ("batch", "build_originality_index"):
+                raise ValueError(f"批量任务中不支持的操作类型: {task.get('action')}")
+            result = handler(task)
+        except Exception as e:
+            # 单个任务出错（包括非法输入引发的其他异常）只记入该项，不中断整批
+            result = {"error": str(e)}
+
+        if "error" in result:
+            entry.update({"success": False, "error": result["error"]})
+        else:
+            entry.update({"success": True, "result": result})
+        results.append(entry)
+
+    succeeded = sum(1 for r in results if r["success"])
+    return {
+        "results": results,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+    }
@@ -6,25 +6,192 @@
 
 import requests
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Optional, Tuple
 import os
+import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
 
 # 添加src到路径以导入配置
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from src.config import Config
 
+sys.path.insert(0, str(Path(__file__).parent))
+from llm_cache import cache_key, get_cache
+
+# ===== 长文分块处理配置（2026-10-19新增） =====
+# 每块输入的 token 预算（约等于汉字数），超过则按段落/句子切分
+CHUNK_TOKEN_BUDGET = 1200
+# 并发处理的块数（同时也是连接池大小）
+MAX_WORKERS = 4
+# 单块失败后的重试次数
+CHUNK_RETRIES = 2
+# 单次请求超时（秒）
+REQUEST_TIMEOUT = 60
+# 单次输出 token 上限（GLM-4 上限 4095）
+MAX_OUTPUT_TOKENS = 4095
+
+_PARAGRAPH_SEPARATOR = re.compile(r'(\n\s*\n|\n)')
+_SENTENCE_END = re.compile(r'(?<=[。！？!?；;…])')
+_CJK_CHAR = re.compile(r'[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]')
+
+
+class ZhipuAPIError(Exception):
+    """智谱API调用失败"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数
+
+    中文（含全角标点）按每字1个 token，其余字符按每4个字符1个 token。
+    """
+    cjk = len(_CJK_CHAR.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_long_paragraph(paragraph: str, budget: int) -> List[str]:
+    """超出预算的段落按句子切分，单句仍超出时按字数硬切"""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        if not sentence:
+            continue
+        if current and estimate_tokens(current + sentence) > budget:
+            pieces.append(current)
+            current = ""
+        while estimate_tokens(sentence) > budget:
+            pieces.append(sentence[:budget])
+            sentence = sentence[budget:]
+        current += sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text: str, budget: int = CHUNK_TOKEN_BUDGET) -> List[Tuple[str, str]]:
+    """
+    在段落边界把文本切成不超过 token 预算的块
+
+    Args:
+        text: 原文
+        budget: 每块 token 预算
+
+    Returns:
+        [(块内容, 块后面的分隔符)]，按顺序拼接 内容+分隔符 可还原原文
+    """
+    parts = _PARAGRAPH_SEPARATOR.split(text)
+    # parts: [段落, 分隔符, 段落, 分隔符, ..., 段落]
+    paragraphs = list(zip(parts[0::2], parts[1::2] + [""]))
+
+    chunks = []
+    current, current_separator = "", ""
+    for paragraph, separator in paragraphs:
+        if estimate_tokens(paragraph) > budget:
+            if current:
+                chunks.append((current, current_separator))
+                current, current_separator = "", ""
+            pieces = _split_long_paragraph(paragraph, budget)
+            chunks.extend((piece, "") for piece in pieces[:-1])
+            chunks.append((pieces[-1], separator))
+            continue
+
+        if current and estimate_tokens(current + current_separator + paragraph) > budget:
+            chunks.append((current, current_separator))
+            current, current_separator = "", ""
+
+        current = current + current_separator + paragraph if current else paragraph
+        current_separator = separator
+
+    if current or not chunks:
+        chunks.append((current, current_separator))
+    return chunks
+
+
+class _OrderedStream:
+    """
+    按块顺序转发流式增量（2026-10-19新增）
+
+    各块并发生成，当前块的增量立即转发，后面块的增量先缓存，
+    等前面的块完成后再依次转发，保证拼接顺序与原文一致。
+    每块的首尾空白不转发（尾部空白暂存，后面还有内容时再补发），
+    与最终拼接结果 output.strip() + separator 完全一致。
+    """
+
+    def __init__(self, separators: List[str], on_delta: Callable[[Dict[str, Any]], None]):
+        self._separators = separators
+        self._on_delta = on_delta
+        self._buffers = [[] for _ in separators]
+        self._finished = [False] * len(separators)
+        self._started = [False] * len(separators)
+        self._trailing = [""] * len(separators)
+        self._current = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, index: int, content: str) -> str:
+        """去掉块首空白，尾部空白留到下一段内容到来时再发"""
+        if not self._started[index]:
+            content = content.lstrip()
+            if not content:
+                return ""
+            self._started[index] = True
+        content = self._trailing[index] + content
+        trimmed = content.rstrip()
+        self._trailing[index] = content[len(trimmed):]
+        return trimmed
+
+    def delta(self, index: int, content: str):
+        with self._lock:
+            content = self._trim(index, content)
+            if not content:
+                return
+            if index == self._current:
+                self._on_delta({"type": "delta", "chunk": index, "content": content})
+            else:
+                self._buffers[index].append(content)
+
+    def reset(self, index: int):
+        """块重试前丢弃已转发/缓存的部分内容"""
+        with self._lock:
+            if index == self._current:
+                self._on_delta({"type": "reset", "chunk": index})
+            self._buffers[index] = []
+            self._started[index] = False
+            self._trailing[index] = ""
+
+    def finish(self, index: int):
+        with self._lock:
+            self._finished[index] = True
+            while self._current < len(self._finished) and self._finished[self._current]:
+                if self._separators[self._current]:
+                    self._on_delta({"type": "delta", "chunk": self._current,
+                                    "content": self._separators[self._current]})
+                self._current += 1
+                if self._current < len(self._buffers):
+                    for content in self._buffers[self._current]:
+                        self._on_delta({"type": "delta", "chunk": self._current, "content": content})
+                    self._buffers[self._current] = []
+
+
+def emit_ndjson(record: Dict[str, Any]):
+    """以 NDJSON 行的形式写到 stdout 并立即刷新"""
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
 
 class ZhipuAIWriter:
     """智谱AI写作工具"""
 
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, max_workers: int = MAX_WORKERS):
         """
         初始化智谱AI写作工具
 
         Args:
             api_key: 智谱API密钥，如果为None则从环境变量读取
+            max_workers: 最大并发请求数（同时也是连接池大小，批量和分块共用这个上限）
         """
         if api_key is None:
             api_key = Config.ZHIPU_API_KEY
@@ -38,55 +205,234 @@ class ZhipuAIWriter:
 
         self.api_key = api_key
         self.base_url = Config.ZHIPU_API_URL
+        self.max_workers = max_workers
+        # 所有线程共享的在途请求上限
+        self._request_slots = threading.BoundedSemaphore(max_workers)
+
+        # 复用连接的会话，连接池大小与并发数一致
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
 
-    def _call_api(self, messages: List[Dict], model: str = "glm-4") -> str:
+    def _request(self, messages: List[Dict], model: str = "glm-4",
+                 max_tokens: int = 2000, timeout: float = REQUEST_TIMEOUT,
+                 use_cache: bool = True, on_delta: Callable[[str], None] = None) -> str:
         """
-        调用智谱API
+        调用智谱API，失败时抛出 ZhipuAPIError
+
+        相同的 (模型, 消息, 参数) 优先从本地响应缓存读取（见 llm_cache.py）。
 
         Args:
             messages: 消息列表
             model: 模型名称
+            max_tokens: 输出 token 上限
+            timeout: 请求超时（秒；流式时为两次数据之间的最长等待）
+            use_cache: 是否读写响应缓存
+            on_delta: 传入时使用SSE流式输出，每收到一段增量文本调用一次
 
         Returns:
-            AI生成的文本
+            AI生成的完整文本
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
         payload = {
             "model": model,
             "messages": messages,
             "temperature": 0.7,
             "top_p": 0.9,
-            "max_tokens": 2000
+            "max_tokens": max_tokens
         }
 
+        cache = get_cache() if use_cache else None
+        if cache is not None:
+            key = cache_key(model, messages, {k: v for k, v in payload.items() if k not in ("model", "messages")})
+            cached = cache.get(key)
+            if cached is not None:
+                if on_delta is not None:
+                    on_delta(cached)
+                return cached
+
+        with self._request_slots:
+            if on_delta is not None:
+                content, complete = self._stream(payload, timeout, on_delta)
+            else:
+                content, complete = self._post(payload, timeout), True
+
+        # 流在 [DONE]/finish_reason 之前中断时内容不完整，不写缓存
+        if cache is not None and complete:
+            cache.set(key, content)
+        return content
+
+    def _post(self, payload: Dict[str, Any], timeout: float) -> str:
+        """普通（非流式）请求，返回完整文本"""
         try:
-            response = requests.post(
-                self.base_url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
+            response = self.session.post(self.base_url, json=payload, timeout=timeout)
+        except requests.RequestException as e:
+            raise ZhipuAPIError(f"请求失败: {str(e)}") from e
+
+        if response.status_code != 200:
+            raise ZhipuAPIError(f"API调用失败: {response.status_code} - {response.text}")
 
-            if response.status_code != 200:
-                return f"API调用失败: {response.status_code} - {response.text}"
+        try:
+            return response.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError) as e:
+            raise ZhipuAPIError(f"响应格式错误: {str(e)}") from e
 
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
+    def _stream(self, payload: Dict[str, Any], timeout: float,
+                on_delta: Callable[[str], None]) -> Tuple[str, bool]:
+        """
+        SSE流式请求（2026-10-19新增）
 
-        except Exception as e:
-            return f"请求失败: {str(e)}"
+        Args:
+            payload: 请求体（会加上 stream=True）
+            timeout: 两次数据之间的最长等待（秒）
+            on_delta: 增量文本回调
+
+        Returns:
+            (文本, 是否完整)：收到 [DONE] 或 finish_reason 时才算完整
+        """
+        parts = []
+        complete = False
+        try:
+            with self.session.post(self.base_url, json={**payload, "stream": True},
+                                   timeout=(10, timeout), stream=True) as response:
+                if response.status_code != 200:
+                    raise ZhipuAPIError(f"API调用失败: {response.status_code} - {response.text}")
+
+                response.encoding = "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        complete = True
+                        break
+                    try:
+                        choice = json.loads(data)["choices"][0]
+                        delta = choice.get("delta", {}).get("content")
+                    except (ValueError, KeyError, IndexError) as e:
+                        raise ZhipuAPIError(f"响应格式错误: {str(e)}") from e
+                    if delta:
+                        parts.append(delta)
+                        on_delta(delta)
+                    if choice.get("finish_reason"):
+                        complete = True
+        except requests.RequestException as e:
+            raise ZhipuAPIError(f"请求失败: {str(e)}") from e
+
+        return "".join(parts), complete
+
+    def _call_api(self, messages: List[Dict], model: str = "glm-4", use_cache: bool = True) -> str:
+        """
+        调用智谱API
+
+        Args:
+            messages: 消息列表
+            model: 模型名称
+            use_cache: 是否读写响应缓存
+
+        Returns:
+            AI生成的文本（失败时返回错误说明）
+        """
+        try:
+            return self._request(messages, model, timeout=30, use_cache=use_cache)
+        except ZhipuAPIError as e:
+            return str(e)
+
+    def process_document(self, text: str, build_messages: Callable[[str, float], List[Dict]],
+                         output_ratio: float = 1.0, chunk_tokens: int = CHUNK_TOKEN_BUDGET,
+                         max_workers: int = None, retries: int = CHUNK_RETRIES,
+                         model: str = "glm-4", use_cache: bool = True,
+                         on_delta: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        长文分块并发处理（2026-10-19新增）
+
+        在段落边界切成 token 预算内的块，用线程池并发调用API，
+        失败的块单独重试，最后按原顺序拼回。总耗时约等于最慢的一块。
+
+        Args:
+            text: 原文
+            build_messages: 根据 (块内容, 该块占全文的比例) 构造消息列表
+            output_ratio: 预计输出长度 / 输入长度，用于设置每块的 max_tokens
+            chunk_tokens: 每块 token 预算
+            max_workers: 最大并发数（默认与连接池大小一致）
+            retries: 单块失败后的重试次数
+            model: 模型名称
+            use_cache: 是否读写响应缓存（按块缓存，重新生成时未变化的块不再请求）
+            on_delta: 流式回调，按原文顺序收到 {"type": "delta", "chunk", "content"}；
+                      某块重试前会收到 {"type": "reset", "chunk"}，应丢弃该块已收到的内容
+
+        Returns:
+            {"text": 拼接结果, "chunks": 块数, "failed_chunks": [{"index", "error"}]}
+            重试后仍失败的块保留原文
+        """
+        chunks = split_into_chunks(text, chunk_tokens)
+        total_length = max(len(text), 1)
+        stream = _OrderedStream([separator for _, separator in chunks], on_delta) if on_delta else None
+
+        def run(index: int, chunk: str) -> str:
+            try:
+                return run_chunk(index, chunk)
+            finally:
+                if stream is not None:
+                    stream.finish(index)
+
+        def run_chunk(index: int, chunk: str) -> str:
+            if not chunk.strip():
+                if stream is not None:
+                    stream.delta(index, chunk)
+                return chunk
+            messages = build_messages(chunk, len(chunk) / total_length)
+            max_tokens = min(MAX_OUTPUT_TOKENS, max(512, int(estimate_tokens(chunk) * output_ratio * 1.5)))
+            chunk_delta = (lambda content: stream.delta(index, content)) if stream is not None else None
+            for attempt in range(retries + 1):
+                try:
+                    return self._request(messages, model, max_tokens=max_tokens,
+                                         use_cache=use_cache, on_delta=chunk_delta)
+                except ZhipuAPIError:
+                    if stream is not None:
+                        stream.reset(index)
+                    if attempt == retries:
+                        if stream is not None:
+                            stream.delta(index, chunk)
+                        raise
+                    time.sleep(min(2 ** attempt, 8))
+
+        workers = max(1, min(max_workers or self.max_workers, len(chunks)))
+        outputs = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run, i, chunk) for i, (chunk, _) in enumerate(chunks)]
+            for (chunk, _), future in zip(chunks, futures):
+                try:
+                    outputs.append((future.result(), None))
+                except ZhipuAPIError as e:
+                    outputs.append((chunk, str(e)))
+
+        stitched = "".join(output.strip() + separator for (output, _), (_, separator) in zip(outputs, chunks))
+        failed = [{"index": i, "error": error} for i, (_, error) in enumerate(outputs) if error]
+
+        return {
+            "text": stitched,
+            "chunks": len(chunks),
+            "failed_chunks": failed,
+        }
 
-    def polish_text(self, text: str, style: str = "正式") -> Dict[str, Any]:
+    def polish_text(self, text: str, style: str = "正式",
+                    chunk_options: Optional[Dict[str, Any]] = None,
+                    use_cache: bool = True,
+                    on_delta: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
         """
         润色文本（使用智谱AI）
 
         Args:
             text: 待润色文本
             style: 写作风格
+            chunk_options: 分块处理参数（chunk_tokens/max_workers/retries，可选）
+            use_cache: 是否使用本地响应缓存（重新生成时传 False）
+            on_delta: 流式回调（见 process_document，可选）
 
         Returns:
             润色结果
@@ -100,79 +446,115 @@ class ZhipuAIWriter:
 
         prompt = style_prompts.get(style, style_prompts["正式"])
 
-        messages = [
-            {"role": "system", "content": "你是一位专业的文字编辑，擅长优化文章表达。"},
-            {"role": "user", "content": f"{prompt}\n\n原文：{text}\n\n请直接输出润色后的文本，不需要解释。"}
-        ]
+        def build_messages(chunk: str, share: float) -> List[Dict]:
+            return [
+                {"role": "system", "content": "你是一位专业的文字编辑，擅长优化文章表达。"},
+                {"role": "user", "content": f"{prompt}\n\n原文：{chunk}\n\n请直接输出润色后的文本，不需要解释。"}
+            ]
 
-        polished_text = self._call_api(messages)
+        document = self.process_document(text, build_messages, use_cache=use_cache,
+                                         on_delta=on_delta, **(chunk_options or {}))
 
         return {
             "original_text": text,
-            "polished_text": polished_text,
+            "polished_text": document["text"],
             "style": style,
+            "chunks": document["chunks"],
+            "failed_chunks": document["failed_chunks"],
             "provider": "智谱GLM-4"
         }
 
-    def expand_text(self, text: str, target_length: int = 500) -> Dict[str, Any]:
+    def expand_text(self, text: str, target_length: int = 500,
+                    chunk_options: Optional[Dict[str, Any]] = None,
+                    use_cache: bool = True,
+                    on_delta: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
         """
         扩写文本（使用智谱AI）
 
         Args:
             text: 待扩写文本
-            target_length: 目标字数
+            target_length: 目标字数（长文分块时按各块字数比例分配）
+            chunk_options: 分块处理参数（chunk_tokens/max_workers/retries，可选）
+            use_cache: 是否使用本地响应缓存（重新生成时传 False）
+            on_delta: 流式回调（见 process_document，可选）
 
         Returns:
             扩写结果
         """
-        messages = [
-            {"role": "system", "content": "你是一位专业的内容创作者，擅长扩展文章内容。"},
-            {"role": "user", "content": f"请将以下文本扩写到约{target_length}字，保持原文核心观点，增加细节说明和例子。\n\n原文：{text}\n\n请直接输出扩写后的文本，不需要解释。"}
-        ]
-
-        expanded_text = self._call_api(messages)
+        def build_messages(chunk: str, share: float) -> List[Dict]:
+            chunk_target = max(1, round(target_length * share))
+            return [
+                {"role": "system", "content": "你是一位专业的内容创作者，擅长扩展文章内容。"},
+                {"role": "user", "content": f"请将以下文本扩写到约{chunk_target}字，保持原文核心观点，增加细节说明和例子。\n\n原文：{chunk}\n\n请直接输出扩写后的文本，不需要解释。"}
+            ]
+
+        document = self.process_document(text, build_messages,
+                                         output_ratio=max(1.0, target_length / max(len(text), 1)),
+                                         use_cache=use_cache, on_delta=on_delta, **(chunk_options or {}))
+        expanded_text = document["text"]
 
         return {
             "original_text": text,
             "expanded_text": expanded_text,
             "target_length": target_length,
             "actual_length": len(expanded_text),
+            "chunks": document["chunks"],
+            "failed_chunks": document["failed_chunks"],
             "provider": "智谱GLM-4"
         }
 
-    def compress_text(self, text: str, target_length: int = 200) -> Dict[str, Any]:
+    def compress_text(self, text: str, target_length: int = 200,
+                      chunk_options: Optional[Dict[str, Any]] = None,
+                      use_cache: bool = True,
+                      on_delta: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
         """
         精简文本（使用智谱AI）
 
         Args:
             text: 待精简文本
-            target_length: 目标字数
+            target_length: 目标字数（长文分块时按各块字数比例分配）
+            chunk_options: 分块处理参数（chunk_tokens/max_workers/retries，可选）
+            use_cache: 是否使用本地响应缓存（重新生成时传 False）
+            on_delta: 流式回调（见 process_document，可选）
 
         Returns:
             精简结果
         """
-        messages = [
-            {"role": "system", "content": "你是一位专业的编辑，擅长提炼文章核心观点。"},
-            {"role": "user", "content": f"请将以下文本精简到约{target_length}字，保留核心信息和关键观点。\n\n原文：{text}\n\n请直接输出精简后的文本，不需要解释。"}
-        ]
-
-        compressed_text = self._call_api(messages)
+        def build_messages(chunk: str, share: float) -> List[Dict]:
+            chunk_target = max(1, round(target_length * share))
+            return [
+                {"role": "system", "content": "你是一位专业的编辑，擅长提炼文章核心观点。"},
+                {"role": "user", "content": f"请将以下文本精简到约{chunk_target}字，保留核心信息和关键观点。\n\n原文：{chunk}\n\n请直接输出精简后的文本，不需要解释。"}
+            ]
+
+        document = self.process_document(text, build_messages,
+                                         output_ratio=min(1.0, target_length / max(len(text), 1)),
+                                         use_cache=use_cache, on_delta=on_delta, **(chunk_options or {}))
+        compressed_text = document["text"]
 
         return {
             "original_text": text,
             "compressed_text": compressed_text,
             "target_length": target_length,
             "actual_length": len(compressed_text),
+            "chunks": document["chunks"],
+            "failed_chunks": document["failed_chunks"],
             "provider": "智谱GLM-4"
         }
 
-    def change_style(self, text: str, target_style: str) -> Dict[str, Any]:
+    def change_style(self, text: str, target_style: str,
+                     chunk_options: Optional[Dict[str, Any]] = None,
+                     use_cache: bool = True,
+                     on_delta: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
         """
         风格转换（使用智谱AI）
 
         Args:
             text: 待转换文本
             target_style: 目标风格
+            chunk_options: 分块处理参数（chunk_tokens/max_workers/retries，可选）
+            use_cache: 是否使用本地响应缓存（重新生成时传 False）
+            on_delta: 流式回调（见 process_document，可选）
 
         Returns:
             转换结果
@@ -191,17 +573,21 @@ class ZhipuAIWriter:
 
         description = style_descriptions.get(target_style, target_style)
 
-        messages = [
-            {"role": "system", "content": "你是一位擅长多风格写作的作者。"},
-            {"role": "user", "content": f"请将以下文本改写为{description}风格。\n\n原文：{text}\n\n请直接输出改写后的文本，不需要解释。"}
-        ]
+        def build_messages(chunk: str, share: float) -> List[Dict]:
+            return [
+                {"role": "system", "content": "你是一位擅长多风格写作的作者。"},
+                {"role": "user", "content": f"请将以下文本改写为{description}风格。\n\n原文：{chunk}\n\n请直接输出改写后的文本，不需要解释。"}
+            ]
 
-        changed_text = self._call_api(messages)
+        document = self.process_document(text, build_messages, use_cache=use_cache,
+                                         on_delta=on_delta, **(chunk_options or {}))
 
         return {
             "original_text": text,
-            "changed_text": changed_text,
+            "changed_text": document["text"],
             "target_style": target_style,
+            "chunks": document["chunks"],
+            "failed_chunks": document["failed_chunks"],
             "provider": "智谱GLM-4"
         }
 
@@ -213,14 +599,39 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
 
     Args:
         args: 包含以下字段的字典
-            - action: 操作类型
+            - action: 操作类型（polish/expand/compress/change_style/batch）
             - text: 待处理文本
+            - items: 批量任务列表（batch使用）。每项为文本字符串，或包含 text 及可选
+              action/style/target_length/target_style/id 的字典，未指定的字段取本次调用的同名参数
+            - batch_action: 批量任务的默认操作（batch可选，默认polish）
+            - concurrency: 批量任务并发数（batch可选，默认等于 max_workers）
             - style: 写作风格（可选）
             - target_length: 目标长度（可选）
+            - chunk_tokens: 长文分块的每块 token 预算（可选，默认1200）
+            - max_workers: 分块并发数（可选，默认4）
+            - use_cache: 是否使用本地响应缓存（可选，默认True；重新生成时传False）
+            - stream: 是否流式输出（可选，默认False）。为True时生成过程中向stdout逐行写
+              NDJSON：{"type": "delta", "chunk", "content"} / {"type": "reset", "chunk"}，
+              结束时写 {"type": "done", ...处理结果}
 
     Returns:
         处理结果
     """
+    if args.get("action") == "batch":
+        return run_batch(args)
+
+    stream = args.get("stream", False)
+    result = _run_action(args, emit_ndjson if stream else None)
+
+    if stream:
+        emit_ndjson({"type": "done", **result})
+
+    return result
+
+
+def _run_action(args: Dict[str, Any], on_delta: Callable[[Dict[str, Any]], None] = None,
+                writer: ZhipuAIWriter = None) -> Dict[str, Any]:
+    """执行单个写作操作（参数见 handler；传入 writer 时复用其连接池）"""
     action = args.get("action")
     text = args.get("text", "")
 
@@ -228,46 +639,191 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": "文本内容不能为空"}
 
     # 创建AI写作实例
-    try:
-        writer = ZhipuAIWriter()
-    except ValueError as e:
-        return {"error": str(e)}
+    if writer is None:
+        try:
+            writer = ZhipuAIWriter(max_workers=args.get("max_workers", MAX_WORKERS))
+        except ValueError as e:
+            return {"error": str(e)}
 
     result = {}
+    chunk_options = {"chunk_tokens": args["chunk_tokens"]} if "chunk_tokens" in args else None
+    use_cache = args.get("use_cache", True)
 
     if action == "polish":
         style = args.get("style", "正式")
-        result = writer.polish_text(text, style)
+        result = writer.polish_text(text, style, chunk_options, use_cache, on_delta)
 
     elif action == "expand":
         target_length = args.get("target_length", 500)
-        result = writer.expand_text(text, target_length)
+        result = writer.expand_text(text, target_length, chunk_options, use_cache, on_delta)
 
     elif action == "compress":
         target_length = args.get("target_length", 200)
-        result = writer.compress_text(text, target_length)
+        result = writer.compress_text(text, target_length, chunk_options, use_cache, on_delta)
 
     elif action == "change_style":
         target_style = args.get("target_style", "正式")
-        result = writer.change_style(text, target_style)
+        result = writer.change_style(text, target_style, chunk_options, use_cache, on_delta)
 
     else:
         return {"error": f"不支持的操作类型: {action}"}
 
+    # 所有分块都失败时直接返回错误
+    failed_chunks = result.get("failed_chunks", [])
+    if failed_chunks and len(failed_chunks) == result.get("chunks"):
+        return {"error": failed_chunks[0]["error"]}
+
     return result
 
 
-# 使用示例
+# ===== 批量处理（2026-10-19新增） =====
+
+BATCH_ITEM_FIELDS = ("style", "target_length", "target_style", "chunk_tokens", "use_cache")
+
+
+def run_batch(args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    批量处理多段文本
+
+    所有任务共用一个 ZhipuAIWriter（同一个连接池和在途请求上限），
+    单个任务失败不影响其他任务，结果按输入顺序返回。
+
+    Args:
+        args: handler 参数，items 为任务列表，其余字段作为各任务的默认值
+
+    Returns:
+        {"results": [{"index", "id", "success", "result"/"error"}], "total", "succeeded", "failed", "elapsed"}
+    """
+    items = args.get("items")
+    if not isinstance(items, list) or not items:
+        return {"error": "批量任务列表不能为空"}
+
+    try:
+        writer = ZhipuAIWriter(max_workers=args.get("max_workers", MAX_WORKERS))
+    except ValueError as e:
+        return {"error": str(e)}
+
+    defaults = {key: args[key] for key in BATCH_ITEM_FIELDS if key in args}
+    defaults["action"] = args.get("batch_action", "polish")
+    concurrency = max(1, args.get("concurrency", writer.max_workers))
+
+    def run_item(index: int, item: Any) -> Dict[str, Any]:
+        entry = {"index": index}
+        if isinstance(item, dict):
+            entry["id"] = item.get("id")
+            task = {**defaults, **{k: v for k, v in item.items() if k != "id"}}
+        else:
+            task = {**defaults, "text": item}
+
+        if task.get("action") == "batch":
+            entry.update({"success": False, "error": "批量任务中不能嵌套batch"})
+            return entry
+
+        try:
+            result = _run_action(task, writer=writer)
+        except Exception as e:
+            result = {"error": f"处理失败: {str(e)}"}
+
+        if "error" in result:
+            entry.update({"success": False, "error": result["error"]})
+        else:
+            entry.update({"success": True, "result": result})
+        return entry
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        results = list(executor.map(run_item, range(len(items)), items))
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(1 for r in results if r["success"])
+    return {
+        "results": results,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "elapsed": round(elapsed, 3),
+        "provider": "智谱GLM-4"
+    }
+
+
+def main():
+    """Command line interface"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="智谱AI写作工具")
+    parser.add_argument('action', nargs='?', choices=["polish", "expand", "compress", "change_style", "batch"],
+                        help='操作类型（不传时运行润色示例）')
+    parser.add_argument('--text', help='待处理文本')
+    parser.add_argument('--file', help='从文件读取待处理文本')
+    parser.add_argument('--items', help='批量任务JSON文件（batch，内容为任务列表）')
+    parser.add_argument('--batch-action', default='polish', help='批量任务的默认操作（batch）')
+    parser.add_argument('--concurrency', type=int, help='批量任务并发数（batch）')
+    parser.add_argument('--style', default='正式', help='润色风格（polish）')
+    parser.add_argument('--target-style', default='正式', help='目标风格（change_style）')
+    parser.add_argument('--target-length', type=int, help='目标字数（expand/compress）')
+    parser.add_argument('--stream', action='store_true', help='以NDJSON流式输出生成过程')
+    parser.add_argument('--no-cache', action='store_true', help='跳过本地响应缓存')
+
+    args = parser.parse_args()
+
+    if not args.action:
+        # 测试润色功能
+        result = handler({
+            "action": "polish",
+            "text": "大家好，今天我们来讲讲AI写作工具。这个工具非常好用，可以帮助我们写文章。希望大家喜欢。",
+            "style": "正式"
+        })
+
+        if "error" in result:
+            print(f"错误: {result['error']}")
+        else:
+            print("原文:", result["original_text"])
+            print("润色后:", result["polished_text"])
+        return
+
+    if args.action == "batch":
+        if not args.items:
+            parser.error("batch 需要 --items")
+        with open(args.items, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        request = {
+            "action": "batch",
+            "items": items,
+            "batch_action": args.batch_action,
+            "style": args.style,
+            "target_style": args.target_style,
+            "use_cache": not args.no_cache,
+        }
+        if args.target_length:
+            request["target_length"] = args.target_length
+        if args.concurrency:
+            request["concurrency"] = args.concurrency
+
+        result = handler(request)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        sys.exit(1 if "error" in result else 0)
+
+    text = args.text
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+    request = {
+        "action": args.action,
+        "text": text or "",
+        "style": args.style,
+        "target_style": args.target_style,
+        "stream": args.stream,
+        "use_cache": not args.no_cache,
+    }
+    if args.target_length:
+        request["target_length"] = args.target_length
+
+    result = handler(request)
+    if not args.stream:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(1 if "error" in result else 0)
+
+
 if __name__ == "__main__":
-    # 测试润色功能
-    result = handler({
-        "action": "polish",
-        "text": "大家好，今天我们来讲讲AI写作工具。这个工具非常好用，可以帮助我们写文章。希望大家喜欢。",
-        "style": "正式"
-    })
-
-    if "error" in result:
-        print(f"错误: {result['error']}")
-    else:
-        print("原文:", result["original_text"])
-        print("润色后:", result["polished_text"])
+    main()
@@ -0,0 +1,184 @@
+"""
+大模型响应缓存
+
+按 hash(模型, 消息, 参数) 缓存大模型的返回文本，相同请求直接从本地读取，不再消耗 token。
+消息中的图片（data URL）先换成内容摘要再参与计算，避免把整张图片的 base64 写进键里。
+
+存储：单个 SQLite 文件，值经 zlib 压缩；总大小超过上限时按最近访问时间淘汰（LRU）。
+
+配置（环境变量）：
+- LLM_CACHE_PATH: 缓存文件路径（默认 ~/.cache/skillmate/llm_cache.db）
+- LLM_CACHE_MAX_MB: 缓存大小上限（默认 256MB）
+- LLM_CACHE_DISABLED: 设为 1 时全局关闭缓存
+
+用法：
+    cache = get_cache()
+    key = cache_key("glm-4", messages, {"temperature": 0.7})
+    text = cache.get(key)
+    if text is None:
+        text = call_model(...)
+        cache.set(key, text)
+"""
+
+from typing import Dict, Any, List, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "skillmate", "llm_cache.db")
+)
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "") in ("1", "true", "True")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed);
+"""
+
+
+def _digest_images(value: Any) -> Any:
+    """把消息中的 data URL 换成 sha256 摘要"""
+    if isinstance(value, str):
+        if value.startswith("data:"):
+            return "sha256:" + hashlib.sha256(value.encode("utf-8")).hexdigest()
+        return value
+    if isinstance(value, list):
+        return [_digest_images(item) for item in value]
+    if isinstance(value, dict):
+        return {k: _digest_images(v) for k, v in value.items()}
+    return value
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any] = None) -> str:
+    """
+    计算请求的缓存键
+
+    Args:
+        model: 模型名称
+        messages: 消息列表（图片会按内容摘要参与计算）
+        params: 影响输出的其他参数（temperature、max_tokens 等）
+
+    Returns:
+        sha256 十六进制字符串
+    """
+    payload = {
+        "model": model,
+        "messages": _digest_images(messages),
+        "params": params or {},
+    }
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    磁盘KV缓存（SQLite + zlib），按总大小做LRU淘汰
+
+    线程安全：同一实例可在线程池中共用。
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        """
+        Args:
+            path: 缓存文件路径（默认 LLM_CACHE_PATH）
+            max_bytes: 缓存大小上限（字节，默认 LLM_CACHE_MAX_BYTES）
+        """
+        self.path = path or LLM_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else LLM_CACHE_MAX_BYTES
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.executescript(_SCHEMA)
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set(self, key: str, value: Any):
+        """写入缓存（值需可 JSON 序列化），超出大小上限时淘汰最久未访问的条目"""
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()))
+            self._total += len(blob) - (previous[0] if previous else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """按访问时间从旧到新删除，直到总大小降到上限的 90%"""
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if self._total <= target:
+                break
+            victims.append((key,))
+            self._total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._total = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "path": self.path,
+            "entries": count,
+            "size_bytes": self._total,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_default_cache = {"instance": None}
+_default_lock = threading.Lock()
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """
+    进程内共享的默认缓存实例
+
+    Returns:
+        ResponseCache；LLM_CACHE_DISABLED 或缓存文件无法打开时返回 None
+    """
+    if LLM_CACHE_DISABLED:
+        return None
+
+    with _default_lock:
+        if _default_cache["instance"] is None:
+            try:
+                _default_cache["instance"] = ResponseCache()
+            except (OSError, sqlite3.Error):
+                return None
+        return _default_cache["instance"]
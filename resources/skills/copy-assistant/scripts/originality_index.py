@@ -0,0 +1,342 @@
+"""
+原创度指纹索引
+
+基于字符 k-gram 滚动哈希 + Winnowing 算法，把历史文章库建成本地 SQLite 索引，
+用于检测新稿件中的句子是否与历史文章重复。
+
+- 建库：逐篇文章归一化 → k-gram 哈希 → 窗口内取最小值作为指纹 → 写入索引
+- 查询：对每个句子取指纹，按哈希批量查索引（B树，亚线性），统计与每篇文章的重合比例
+- 增量：按 路径 + 修改时间 + 大小 判断文章是否变化，只重建变化的部分
+
+文章来源：
+- 目录：递归匹配 *.md / *.txt（公众号项目结构中的 02_文章内容.md 会以项目文件夹名作为标题）
+- JSON：content-data-manager 风格的 {"articles": [...]}，取每篇文章的 content 字段
+"""
+
+from typing import Dict, Any, List, Iterator, Tuple
+import json
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ORIGINALITY_INDEX_PATH = os.getenv("ORIGINALITY_INDEX_PATH", "originality_index.db")
+
+# k-gram 长度（字符）和 Winnowing 窗口大小
+# 任意长度 ≥ SHINGLE_SIZE + WINDOW_SIZE - 1 的相同片段都至少共享一个指纹
+SHINGLE_SIZE = 5
+WINDOW_SIZE = 4
+
+DEFAULT_PATTERNS = ["*.md", "*.txt"]
+
+# Karp-Rabin 滚动哈希参数
+_HASH_BASE = 1000003
+_HASH_MODULUS = (1 << 61) - 1
+
+# 归一化时去掉空白和标点，只保留文字和数字
+_NOISE_PATTERN = re.compile(r'[\W_]+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    hash INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (hash, doc_id)
+) WITHOUT ROWID;
+"""
+
+# 单条 SQL 中 IN (...) 的参数上限
+_QUERY_CHUNK = 500
+
+
+def normalize_text(text: str) -> str:
+    """去掉空白和标点并转小写"""
+    return _NOISE_PATTERN.sub('', text).lower()
+
+
+def shingle_hashes(text: str, k: int = SHINGLE_SIZE) -> List[int]:
+    """
+    所有 k-gram 的 Karp-Rabin 滚动哈希
+
+    模 2^61-1，结果在 SQLite INTEGER 范围内且跨进程稳定。
+
+    Args:
+        text: 已归一化的文本
+        k: k-gram 长度
+
+    Returns:
+        哈希列表（长度 len(text) - k + 1）
+    """
+    if len(text) < k:
+        return []
+
+    codes = list(map(ord, text))
+    leading = pow(_HASH_BASE, k - 1, _HASH_MODULUS)
+
+    value = 0
+    for code in codes[:k]:
+        value = (value * _HASH_BASE + code) % _HASH_MODULUS
+
+    hashes = [value]
+    for old, new in zip(codes, codes[k:]):
+        value = ((value - old * leading) * _HASH_BASE + new) % _HASH_MODULUS
+        hashes.append(value)
+    return hashes
+
+
+def winnow(text: str, k: int = SHINGLE_SIZE, w: int = WINDOW_SIZE) -> List[int]:
+    """
+    Winnowing 指纹
+
+    Args:
+        text: 已归一化的文本
+        k: k-gram 长度
+        w: 窗口大小
+
+    Returns:
+        去重后的指纹列表（按首次出现顺序）
+    """
+    hashes = shingle_hashes(text, k)
+    if len(hashes) <= w:
+        return [min(hashes)] if hashes else []
+
+    # 窗口内最小值（并列取最右），只有旧最小值滑出窗口时才重新扫描
+    position = _rightmost_min(hashes, 0, w)
+    fingerprints = {hashes[position]: None}
+    for end in range(w, len(hashes)):
+        if hashes[end] <= hashes[position]:
+            position = end
+        elif position <= end - w:
+            position = _rightmost_min(hashes, end - w + 1, end + 1)
+        else:
+            continue
+        fingerprints.setdefault(hashes[position], None)
+
+    return list(fingerprints)
+
+
+def _rightmost_min(hashes: List[int], start: int, end: int) -> int:
+    """hashes[start:end] 中最小值的位置（并列取最右）"""
+    window = hashes[start:end]
+    return end - 1 - window[::-1].index(min(window))
+
+
+def _connect(index_path: str) -> sqlite3.Connection:
+    index_dir = os.path.dirname(index_path)
+    if index_dir and not os.path.exists(index_dir):
+        os.makedirs(index_dir)
+
+    conn = sqlite3.connect(index_path)
+    # 索引可随时从文章库重建，写入时不需要逐事务落盘
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -131072")  # 128MB，减少大批量写入时的B树换页
+    conn.executescript(_SCHEMA)
+
+    params = {"shingle_size": str(SHINGLE_SIZE), "window_size": str(WINDOW_SIZE)}
+    stored = dict(conn.execute("SELECT key, value FROM meta"))
+    if stored and stored != params:
+        # 参数变化后旧指纹不可比，清空重建
+        conn.executescript("DELETE FROM fingerprints; DELETE FROM documents; DELETE FROM meta;")
+    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", params.items())
+    return conn
+
+
+def _iter_documents(sources: List[str], patterns: List[str]) -> Iterator[Tuple[str, str, float, int, Any]]:
+    """
+    遍历文章来源
+
+    Yields:
+        (来源标识, 标题, 修改时间, 大小, 读取正文的函数)
+    """
+    for source in sources:
+        path = Path(source)
+
+        if path.is_dir():
+            files = sorted({f for pattern in patterns for f in path.rglob(pattern) if f.is_file()})
+            for file in files:
+                stat = file.stat()
+                title = file.parent.name if file.name == "02_文章内容.md" else file.stem
+                yield str(file.resolve()), title, stat.st_mtime, stat.st_size, \
+                    (lambda f=file: f.read_text(encoding='utf-8', errors='replace'))
+
+        elif path.is_file() and path.suffix.lower() == ".json":
+            stat = path.stat()
+            with open(path, 'r', encoding='utf-8') as f:
+                articles = json.load(f).get("articles", [])
+            for i, article in enumerate(articles):
+                content = article.get("content") or article.get("text")
+                if not content:
+                    continue
+                key = article.get("id", i)
+                yield f"{path.resolve()}#{key}", article.get("title", str(key)), stat.st_mtime, stat.st_size, \
+                    (lambda c=content: c)
+
+        elif path.is_file():
+            stat = path.stat()
+            yield str(path.resolve()), path.stem, stat.st_mtime, stat.st_size, \
+                (lambda f=path: f.read_text(encoding='utf-8', errors='replace'))
+
+
+def build_index(sources: List[str], index_path: str = None, patterns: List[str] = None,
+                prune: bool = True) -> Dict[str, Any]:
+    """
+    构建或增量更新指纹索引
+
+    Args:
+        sources: 文章目录 / JSON 数据文件 / 单个文本文件列表
+        index_path: 索引文件路径（默认 ORIGINALITY_INDEX_PATH）
+        patterns: 目录中匹配的文件模式（默认 *.md 和 *.txt）
+        prune: 是否删除来源中已不存在的文章
+
+    Returns:
+        构建统计
+    """
+    index_path = index_path or ORIGINALITY_INDEX_PATH
+    patterns = patterns or DEFAULT_PATTERNS
+
+    conn = _connect(index_path)
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+
+    try:
+        existing = {
+            source: (doc_id, mtime, size)
+            for doc_id, source, mtime, size in conn.execute("SELECT id, source, mtime, size FROM documents")
+        }
+        seen = set()
+
+        with conn:
+            for source, title, mtime, size, read in _iter_documents(sources, patterns):
+                seen.add(source)
+                previous = existing.get(source)
+                if previous and previous[1] == mtime and previous[2] == size:
+                    stats["unchanged"] += 1
+                    continue
+
+                text = normalize_text(read())
+                if previous:
+                    doc_id = previous[0]
+                    conn.execute("DELETE FROM fingerprints WHERE doc_id = ?", (doc_id,))
+                    conn.execute("UPDATE documents SET title = ?, mtime = ?, size = ?, length = ? WHERE id = ?",
+                                 (title, mtime, size, len(text), doc_id))
+                    stats["updated"] += 1
+                else:
+                    cursor = conn.execute(
+                        "INSERT INTO documents (source, title, mtime, size, length) VALUES (?, ?, ?, ?, ?)",
+                        (source, title, mtime, size, len(text)))
+                    doc_id = cursor.lastrowid
+                    stats["added"] += 1
+
+                conn.executemany("INSERT OR IGNORE INTO fingerprints (hash, doc_id) VALUES (?, ?)",
+                                 ((h, doc_id) for h in winnow(text)))
+
+            if prune:
+                for source in set(existing) - seen:
+                    doc_id = existing[source][0]
+                    conn.execute("DELETE FROM fingerprints WHERE doc_id = ?", (doc_id,))
+                    conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+                    stats["removed"] += 1
+
+        total_documents = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        total_fingerprints = conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        "status": "success",
+        "index_path": index_path,
+        "total_documents": total_documents,
+        "total_fingerprints": total_fingerprints,
+        **stats,
+    }
+
+
+def match_sentences(sentences: List[str], index_path: str = None,
+                    min_overlap: float = 0.5) -> Dict[str, Any]:
+    """
+    在指纹索引中查找每个句子的来源
+
+    Args:
+        sentences: 句子列表
+        index_path: 索引文件路径（默认 ORIGINALITY_INDEX_PATH）
+        min_overlap: 判定为重复的最小指纹重合比例（0-1）
+
+    Returns:
+        {
+            "sentence_matches": [{"index", "sentence", "doc_id", "title", "source", "overlap"}],
+            "sources": [{"title", "source", "matched_sentences", "matched_chars"}],
+            "indexed_documents": 索引中的文章数
+        }
+    """
+    index_path = index_path or ORIGINALITY_INDEX_PATH
+    if not os.path.exists(index_path):
+        raise ValueError(f"原创度索引不存在: {index_path}")
+
+    sentence_fingerprints = [winnow(normalize_text(s)) for s in sentences]
+    all_hashes = list({h for fps in sentence_fingerprints for h in fps})
+
+    conn = sqlite3.connect(index_path)
+    try:
+        postings = defaultdict(list)
+        for start in range(0, len(all_hashes), _QUERY_CHUNK):
+            chunk = all_hashes[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for h, doc_id in conn.execute(
+                    f"SELECT hash, doc_id FROM fingerprints WHERE hash IN ({placeholders})", chunk):
+                postings[h].append(doc_id)
+
+        sentence_matches = []
+        for i, (sentence, fps) in enumerate(zip(sentences, sentence_fingerprints)):
+            if not fps:
+                continue
+            hits = Counter(doc_id for h in fps for doc_id in postings.get(h, ()))
+            if not hits:
+                continue
+            doc_id, count = max(hits.items(), key=lambda item: (item[1], -item[0]))
+            overlap = count / len(fps)
+            if overlap >= min_overlap:
+                sentence_matches.append({
+                    "index": i,
+                    "sentence": sentence,
+                    "doc_id": doc_id,
+                    "overlap": round(overlap, 2),
+                })
+
+        documents = {}
+        doc_ids = list({m["doc_id"] for m in sentence_matches})
+        for start in range(0, len(doc_ids), _QUERY_CHUNK):
+            chunk = doc_ids[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for doc_id, title, source in conn.execute(
+                    f"SELECT id, title, source FROM documents WHERE id IN ({placeholders})", chunk):
+                documents[doc_id] = {"title": title, "source": source}
+
+        indexed_documents = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    finally:
+        conn.close()
+
+    sources = {}
+    for match in sentence_matches:
+        doc = documents.get(match["doc_id"], {"title": "", "source": ""})
+        match.update(doc)
+        summary = sources.setdefault(match["doc_id"], {**doc, "matched_sentences": 0, "matched_chars": 0})
+        summary["matched_sentences"] += 1
+        summary["matched_chars"] += len(match["sentence"])
+
+    return {
+        "sentence_matches": sentence_matches,
+        "sources": sorted(sources.values(), key=lambda s: s["matched_chars"], reverse=True),
+        "indexed_documents": indexed_documents,
+    }
@@ -0,0 +1,191 @@
+"""
+中文文本分析
+
+一次性把文本拆成句子、段落和词，供 evaluate_quality / optimize_seo / optimize_structure 共用，
+同一篇文本只分词一次。
+
+- 分句：按 。！？ 切分，记录每句在原文中的起止位置
+- 分词：中文按词典正向最大匹配，英文单词和数字整体成词，标点和空白不计入
+- 词频：所有词的出现次数
+- 词典命中：正面/负面情感词的出现次数
+
+词典：同目录的 lexicon.txt（每行一个词，# 开头为注释），
+可用 USER_LEXICON_PATH 环境变量追加自定义词典（格式相同）。
+"""
+
+from typing import Dict, List, Iterator, Tuple
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+LEXICON_PATH = Path(__file__).parent / "lexicon.txt"
+USER_LEXICON_PATH = os.getenv("USER_LEXICON_PATH", "")
+
+SENTENCE_SPLIT = re.compile(r'[。！？]')
+
+# 情感词典
+POSITIVE_WORDS = ["好", "优秀", "棒", "喜欢", "成功", "快乐", "幸福"]
+NEGATIVE_WORDS = ["差", "不好", "糟糕", "失败", "痛苦", "难过", "悲伤"]
+
+_CJK = r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+
+# 第1组为连续汉字（交给词典切分），否则为英文单词/数字
+_TOKEN_PATTERN = re.compile(rf'([{_CJK}]+)|[^\W_{_CJK}]+')
+
+
+def load_lexicon(path: Path) -> List[str]:
+    """读取词典文件（每行一个词，# 开头为注释）"""
+    words = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word = line.strip()
+            if word and not word.startswith('#'):
+                words.append(word)
+    return words
+
+
+class Segmenter:
+    """
+    词典正向最大匹配分词
+
+    词典展开成"前缀 → 是否为完整词"的表，匹配时逐字延长，
+    前缀不存在即停止，每个位置通常只需查一两次表。
+    """
+
+    def __init__(self, words: List[str]):
+        self._prefixes: Dict[str, bool] = {}
+        for word in words:
+            for end in range(1, len(word)):
+                self._prefixes.setdefault(word[:end], False)
+            self._prefixes[word] = True
+
+    def cut(self, run: str) -> Iterator[str]:
+        """切分一段连续汉字；词典中没有的字单独成词"""
+        prefixes = self._prefixes
+        length = len(run)
+        start = 0
+        while start < length:
+            best = start + 1
+            end = start + 1
+            while end <= length:
+                flag = prefixes.get(run[start:end])
+                if flag is None:
+                    break
+                if flag:
+                    best = end
+                end += 1
+            yield run[start:best]
+            start = best
+
+    def tokenize(self, text: str) -> List[str]:
+        """切分任意文本，返回词列表（不含标点和空白）"""
+        words = []
+        for match in _TOKEN_PATTERN.finditer(text):
+            if match.group(1):
+                words.extend(self.cut(match.group(1)))
+            else:
+                words.append(match.group(0))
+        return words
+
+
+_segmenter_cache = {"segmenter": None}
+
+
+def get_segmenter() -> Segmenter:
+    """首次使用时加载词典，之后复用"""
+    if _segmenter_cache["segmenter"] is None:
+        words = load_lexicon(LEXICON_PATH)
+        if USER_LEXICON_PATH and os.path.exists(USER_LEXICON_PATH):
+            words += load_lexicon(Path(USER_LEXICON_PATH))
+        _segmenter_cache["segmenter"] = Segmenter(words + POSITIVE_WORDS + NEGATIVE_WORDS)
+    return _segmenter_cache["segmenter"]
+
+
+class TextAnalysis:
+    """
+    单篇文本的分析结果
+
+    Attributes:
+        text: 原文
+        sentence_spans: 每句（已去除首尾空白）在原文中的 (起, 止) 位置
+        sentences: 句子列表
+        paragraphs: 段落列表（按空行切分）
+        words: 分词结果
+        term_frequency: 词频表
+        lexicon_hits: {"positive": 词频, "negative": 词频}
+    """
+
+    def __init__(self, text: str, segmenter: Segmenter = None):
+        self.text = text
+        self.sentence_spans = _sentence_spans(text)
+        self.sentences = [text[start:end] for start, end in self.sentence_spans]
+        self.paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+
+        self.words = (segmenter or get_segmenter()).tokenize(text)
+        self.term_frequency = Counter(self.words)
+        self.lexicon_hits = {
+            "positive": self._hits(POSITIVE_WORDS),
+            "negative": self._hits(NEGATIVE_WORDS),
+        }
+        self._lowered = None
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @property
+    def title(self) -> str:
+        """首句的第一行（视为标题）"""
+        if not self.sentences:
+            return ""
+        return self.sentences[0].split('\n', 1)[0].strip()
+
+    def _hits(self, lexicon: List[str]) -> Counter:
+        return Counter({word: self.term_frequency[word] for word in lexicon if word in self.term_frequency})
+
+    def count_phrase(self, phrase: str) -> int:
+        """短语在原文中的出现次数（不区分英文大小写，可跨词）"""
+        if not phrase:
+            return 0
+        if self._lowered is None:
+            self._lowered = self.text.lower()
+        return self._lowered.count(phrase.lower())
+
+    def top_terms(self, limit: int = 10, min_length: int = 2) -> List[Tuple[str, int]]:
+        """出现次数最多的词（默认忽略单字词）"""
+        terms = Counter({w: c for w, c in self.term_frequency.items() if len(w) >= min_length})
+        return terms.most_common(limit)
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """按 。！？ 分句，返回去除首尾空白后的非空句子位置"""
+    spans = []
+    start = 0
+    for match in SENTENCE_SPLIT.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+
+    result = []
+    for start, end in spans:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def analyze_text(text: str) -> TextAnalysis:
+    """
+    分析文本
+
+    Args:
+        text: 待分析文本
+
+    Returns:
+        TextAnalysis
+    """
+    return TextAnalysis(text)
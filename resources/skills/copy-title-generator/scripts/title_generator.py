@@ -1,8 +1,17 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
 import re
 import random
 from datetime import datetime
 import sys
+import os
+import json
+import heapq
+import itertools
+import math
+import string
+from collections import deque
+
+import numpy as np
 
 # Fix encoding issues on Windows
 if sys.platform == 'win32':
@@ -232,6 +241,27 @@ CTR_WEIGHTS = {
     "长度适中": 0.08,
 }
 
+# CTR评分因子说明（与 CTR_WEIGHTS 顺序一一对应）
+CTR_FACTOR_LABELS = {
+    "数字": "包含数字",
+    "关键词密度": "关键词密度充足",
+    "时效性": "有时效性",
+    "情感词": "包含情感词",
+    "疑问句": "使用疑问句",
+    "悬念": "制造悬念",
+    "稀缺性": "稀缺性",
+    "长度适中": "长度适中",
+}
+
+# 评分词库
+TIME_WORDS = ["2025", "最新", "今年", "近期", "刚刚", "突发"]
+EMOTION_WORDS = ["感动", "震惊", "愤怒", "惊喜", "期待", "焦虑", "迷茫"]
+SUSPENSE_WORDS = ["揭秘", "真相", "幕后", "秘密", "竟然", "居然"]
+SCARCITY_WORDS = ["最后", "限时", "独家", "仅剩", "首发", "紧急"]
+XIAOHAO_COUNT_WORDS = ["个", "步", "大", "倍", "%"]
+XIAOHAO_VALUE_WORDS = ["搞定", "解决", "提升", "教程", "技巧", "方法", "指南", "实测", "体验"]
+XIAOHAO_HELP_WORDS = ["帮你", "手把手", "教你", "分享"]
+
 
 def generate_title(template_type: str, **kwargs) -> str:
     """
@@ -310,60 +340,32 @@ def calculate_ctr_score(title: str) -> Dict[str, Any]:
     Returns:
         评分结果
     """
-    score = 0.0
-    factors = []
+    features = extract_title_features([title])
+    scores, flags = _ctr_components(features)
+    return _build_ctr_result(title, scores[0], flags[0])
 
-    # 数字检查
-    if re.search(r'\d+', title):
-        score += CTR_WEIGHTS["数字"]
-        factors.append("包含数字")
 
-    # 关键词密度检查
-    keywords = re.findall(r'[\w]+', title)
-    if len(keywords) >= 3:
-        score += CTR_WEIGHTS["关键词密度"]
-        factors.append("关键词密度充足")
-
-    # 时效性检查
-    time_words = ["2025", "最新", "今年", "近期", "刚刚", "突发"]
-    if any(word in title for word in time_words):
-        score += CTR_WEIGHTS["时效性"]
-        factors.append("有时效性")
-
-    # 情感词检查
-    emotion_words = ["感动", "震惊", "愤怒", "惊喜", "期待", "焦虑", "迷茫"]
-    if any(word in title for word in emotion_words):
-        score += CTR_WEIGHTS["情感词"]
-        factors.append("包含情感词")
-
-    # 疑问句检查
-    if title.endswith('?') or "？" in title or title.startswith("为什么"):
-        score += CTR_WEIGHTS["疑问句"]
-        factors.append("使用疑问句")
-
-    # 悬念检查
-    suspense_words = ["揭秘", "真相", "幕后", "秘密", "竟然", "居然"]
-    if any(word in title for word in suspense_words):
-        score += CTR_WEIGHTS["悬念"]
-        factors.append("制造悬念")
-
-    # 稀缺性检查
-    scarcity_words = ["最后", "限时", "独家", "仅剩", "首发", "紧急"]
-    if any(word in title for word in scarcity_words):
-        score += CTR_WEIGHTS["稀缺性"]
-        factors.append("稀缺性")
-
-    # 长度检查（建议20-30字）
-    length = len(title)
-    if 20 <= length <= 30:
-        score += CTR_WEIGHTS["长度适中"]
-        factors.append("长度适中")
+def _build_ctr_result(title: str, score: float, flags: np.ndarray) -> Dict[str, Any]:
+    """
+    根据批量评分结果组装单个标题的CTR评分
+
+    Args:
+        title: 标题
+        score: 原始评分（0-1）
+        flags: CTR因子命中情况（与 CTR_WEIGHTS 顺序一致）
+
+    Returns:
+        评分结果
+    """
+    score = float(score)
+    factors = [CTR_FACTOR_LABELS[name] for name, hit in zip(CTR_WEIGHTS, flags) if hit]
 
     return {
         "score": round(score * 100, 2),
         "factors": factors,
-        "length": length,
+        "length": len(title),
         "grade": _get_grade(score),
+        "model": "learned" if _get_ctr_model() is not None else "rules",
     }
 
 
@@ -449,8 +451,7 @@ def suggest_improvements(title: str) -> List[str]:
         suggestions.append("建议加入具体数字，点击率可提升230%")
 
     # 检查是否有情感词
-    emotion_words = ["感动", "震惊", "愤怒", "惊喜", "期待", "焦虑", "迷茫"]
-    if not any(word in title for word in emotion_words):
+    if not any(word in title for word in EMOTION_WORDS):
         suggestions.append("建议加入情感词，增加用户共鸣")
 
     # 检查是否有悬念
@@ -459,8 +460,7 @@ def suggest_improvements(title: str) -> List[str]:
         suggestions.append("建议制造悬念，引发用户好奇心")
 
     # 检查是否有稀缺性
-    scarcity_words = ["最后", "限时", "独家", "仅剩", "首发", "紧急"]
-    if not any(word in title for word in scarcity_words):
+    if not any(word in title for word in SCARCITY_WORDS):
         suggestions.append("建议加入稀缺性词汇，增加紧迫感")
 
     # 检查前10个字
@@ -473,8 +473,7 @@ def suggest_improvements(title: str) -> List[str]:
         suggestions.append("建议使用疑问句，引发用户思考")
 
     # 检查时效性
-    time_words = ["2025", "最新", "今年", "近期", "刚刚", "突发"]
-    if not any(word in title for word in time_words):
+    if not any(word in title for word in TIME_WORDS):
         suggestions.append("建议加入时效性词汇，提升推荐权重")
 
     return suggestions if suggestions else ["标题已经很优秀了！"]
@@ -499,42 +498,24 @@ def calculate_captain_score(title: str, personal_ip: str = "船长") -> Dict[str
     Returns:
         评分结果
     """
-    # 1. 信息密度评分
-    keywords = re.findall(r'[\w]+', title)
-    keyword_count = len(keywords)
-    length = len(title)
-    density_score = (keyword_count / length * 10) if length > 0 else 0
+    features = extract_title_features([title], personal_ip)
+    components = _captain_components(features)
+    return _build_captain_result(title, personal_ip, {name: values[0] for name, values in components.items()})
 
-    # 2. 紧迫感评分
-    urgency_words = KEYWORD_BANK["船长_紧迫感"]
-    urgency_count = sum(1 for word in urgency_words if word in title)
-    urgency_score = min(urgency_count * 15, 100)  # 最高100分
-
-    # 3. 具体性评分
-    has_number = bool(re.search(r'\d+', title))
-    has_tool = any(tool in title for tool in KEYWORD_BANK["船长_工具"])
-    has_feature = any(feature in title for feature in KEYWORD_BANK["船长_功能"])
-
-    specific_score = 0
-    if has_number:
-        specific_score += 30
-    if has_tool:
-        specific_score += 35
-    if has_feature:
-        specific_score += 35
-
-    # 4. 人设评分
-    ip_score = 0
-    if personal_ip in title:
-        ip_score += 50
-    if any(ip_word in title for ip_word in KEYWORD_BANK["船长_人设"]):
-        ip_score += 50
-
-    # 综合评分
-    total_score = (density_score * 0.2 +
-                   urgency_score * 0.3 +
-                   specific_score * 0.3 +
-                   ip_score * 0.2)
+
+def _build_captain_result(title: str, personal_ip: str, components: Dict[str, float]) -> Dict[str, Any]:
+    """
+    根据评分分项组装船长式评分结果
+
+    Args:
+        title: 标题
+        personal_ip: 个人IP
+        components: 各维度得分（信息密度/紧迫感/具体性/人设/total）
+
+    Returns:
+        评分结果
+    """
+    total_score = float(components["total"])
 
     # 等级判断
     if total_score >= 80:
@@ -555,10 +536,10 @@ def calculate_captain_score(title: str, personal_ip: str = "船长") -> Dict[str
         "grade": grade,
         "advice": advice,
         "details": {
-            "信息密度": round(density_score, 2),
-            "紧迫感": urgency_score,
-            "具体性": specific_score,
-            "人设": ip_score,
+            "信息密度": round(float(components["信息密度"]), 2),
+            "紧迫感": int(components["紧迫感"]),
+            "具体性": int(components["具体性"]),
+            "人设": int(components["人设"]),
         },
         "suggestions": _generate_captain_suggestions(title, personal_ip)
     }
@@ -654,18 +635,19 @@ def generate_captain_titles(topic: str, personal_ip: str = "船长", count: int
                 "description": topic,
             }
 
-            title = generate_title(template_type, **params)
-            captain_score = calculate_captain_score(title, personal_ip)
-
             titles.append({
-                "title": title,
+                "title": generate_title(template_type, **params),
                 "template_type": template_type,
-                "captain_score": captain_score,
-                "ctr_score": calculate_ctr_score(title),
             })
         except Exception:
             continue
 
+    # 所有标题一次批量评分
+    batch = score_titles([item["title"] for item in titles], personal_ip)
+    for i, item in enumerate(titles):
+        item["captain_score"] = _build_captain_result(item["title"], personal_ip, _row(batch["captain_details"], i))
+        item["ctr_score"] = _build_ctr_result(item["title"], batch["ctr_raw"][i], batch["ctr_flags"][i])
+
     return titles
 
 
@@ -723,17 +705,19 @@ def generate_xiaohao_titles(topic: str, personal_ip: str = "小郝", count: int
             if emoji not in title:
                 title += emoji
 
-            xiaohao_score = calculate_xiaohao_score(title, personal_ip)
-
             titles.append({
                 "title": title,
                 "template_type": template_type,
-                "xiaohao_score": xiaohao_score,
-                "ctr_score": calculate_ctr_score(title),
             })
         except Exception:
             continue
 
+    # 所有标题一次批量评分
+    batch = score_titles([item["title"] for item in titles])
+    for i, item in enumerate(titles):
+        item["xiaohao_score"] = _build_xiaohao_result(item["title"], personal_ip, _row(batch["xiaohao_details"], i))
+        item["ctr_score"] = _build_ctr_result(item["title"], batch["ctr_raw"][i], batch["ctr_flags"][i])
+
     return titles
 
 
@@ -754,39 +738,24 @@ def calculate_xiaohao_score(title: str, personal_ip: str = "小郝") -> Dict[str
     Returns:
         评分结果
     """
-    # 1. 数字量化评分（30%）
-    has_number = bool(re.search(r'\d+', title))
-    has_count_word = any(word in title for word in ["个", "步", "大", "倍", "%"])
-    number_score = 0
-    if has_number:
-        number_score += 15
-    if has_count_word:
-        number_score += 15
-
-    # 2. 轻松幽默评分（25%）
-    轻松词 = KEYWORD_BANK["小郝_轻松词"]
-    has_easy_word = any(word in title for word in 轻松词)
-    has_emoji = any(emoji in title for emoji in KEYWORD_BANK["小郝_Emoji"])
-    easy_score = 0
-    if has_easy_word:
-        easy_score += 12
-    if has_emoji:
-        easy_score += 13
-
-    # 3. 实用价值评分（25%）
-    value_words = ["搞定", "解决", "提升", "教程", "技巧", "方法", "指南", "实测", "体验"]
-    has_value_word = any(word in title for word in value_words)
-    value_score = 25 if has_value_word else 10
-
-    # 4. 亲切接地气评分（20%）
-    has_help_word = any(word in title for word in ["帮你", "手把手", "教你", "分享"])
-    friendly_score = 20 if has_help_word else 10
-
-    # 综合评分
-    total_score = (number_score * 0.30 +
-                   easy_score * 0.25 +
-                   value_score * 0.25 +
-                   friendly_score * 0.20)
+    features = extract_title_features([title])
+    components = _xiaohao_components(features)
+    return _build_xiaohao_result(title, personal_ip, {name: values[0] for name, values in components.items()})
+
+
+def _build_xiaohao_result(title: str, personal_ip: str, components: Dict[str, float]) -> Dict[str, Any]:
+    """
+    根据评分分项组装小郝式评分结果
+
+    Args:
+        title: 标题
+        personal_ip: 个人IP
+        components: 各维度得分（数字量化/轻松幽默/实用价值/亲切接地气/total）
+
+    Returns:
+        评分结果
+    """
+    total_score = float(components["total"])
 
     # 等级判断
     if total_score >= 80:
@@ -807,10 +776,10 @@ def calculate_xiaohao_score(title: str, personal_ip: str = "小郝") -> Dict[str
         "grade": grade,
         "advice": advice,
         "details": {
-            "数字量化": number_score,
-            "轻松幽默": easy_score,
-            "实用价值": value_score,
-            "亲切接地气": friendly_score,
+            "数字量化": int(components["数字量化"]),
+            "轻松幽默": int(components["轻松幽默"]),
+            "实用价值": int(components["实用价值"]),
+            "亲切接地气": int(components["亲切接地气"]),
         },
         "suggestions": _generate_xiaohao_suggestions(title, personal_ip)
     }
@@ -844,6 +813,742 @@ def _generate_xiaohao_suggestions(title: str, personal_ip: str) -> List[str]:
     return suggestions if suggestions else ["标题已经很优秀了！"]
 
 
+# ===== 批量评分引擎（2026-10-19新增） =====
+# 所有词库和正则在导入时编译一次；批量评分时把N个标题拼成一个语料，
+# 每个词库只扫描一遍，再按偏移量映射回标题，得到 N×F 特征矩阵。
+
+# 特征矩阵列名
+TITLE_FEATURES = [
+    "长度",
+    "关键词数",
+    "数字",
+    "时效性",
+    "情感词",
+    "疑问句",
+    "悬念",
+    "稀缺性",
+    "紧迫感词数",
+    "工具",
+    "功能",
+    "人设词",
+    "个人IP",
+    "量词",
+    "轻松词",
+    "Emoji",
+    "实用价值",
+    "亲切",
+]
+_FEATURE_INDEX = {name: i for i, name in enumerate(TITLE_FEATURES)}
+
+# 标题之间的分隔符（不会出现在任何词库中，保证匹配不跨标题）
+_TITLE_SEPARATOR = "\x00"
+
+_WORD_PATTERN = re.compile(r'[\w]+')
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def _compile_lexicon(words: List[str]) -> re.Pattern:
+    """把词库编译成一个交替正则（长词优先）"""
+    alternation = "|".join(re.escape(word) for word in sorted(set(words), key=len, reverse=True))
+    return re.compile(alternation)
+
+
+# 布尔特征：标题中是否出现词库中任意一个词
+_LEXICON_PATTERNS = {
+    "时效性": _compile_lexicon(TIME_WORDS),
+    "情感词": _compile_lexicon(EMOTION_WORDS),
+    "悬念": _compile_lexicon(SUSPENSE_WORDS),
+    "稀缺性": _compile_lexicon(SCARCITY_WORDS),
+    "工具": _compile_lexicon(KEYWORD_BANK["船长_工具"]),
+    "功能": _compile_lexicon(KEYWORD_BANK["船长_功能"]),
+    "人设词": _compile_lexicon(KEYWORD_BANK["船长_人设"]),
+    "量词": _compile_lexicon(XIAOHAO_COUNT_WORDS),
+    "轻松词": _compile_lexicon(KEYWORD_BANK["小郝_轻松词"]),
+    "Emoji": _compile_lexicon(KEYWORD_BANK["小郝_Emoji"]),
+    "实用价值": _compile_lexicon(XIAOHAO_VALUE_WORDS),
+    "亲切": _compile_lexicon(XIAOHAO_HELP_WORDS),
+}
+_QUESTION_PATTERN = re.compile("？")
+
+# 计数特征：出现了词库中几个不同的词（逐词扫描，允许词之间重叠）
+_URGENCY_PATTERNS = [re.compile(re.escape(word)) for word in KEYWORD_BANK["船长_紧迫感"]]
+
+
+def _match_rows(pattern: re.Pattern, corpus: str, starts: np.ndarray) -> np.ndarray:
+    """在拼接语料上扫描一次，返回每个匹配所属的标题下标"""
+    positions = np.fromiter((m.start() for m in pattern.finditer(corpus)), dtype=np.int64)
+    return np.searchsorted(starts, positions, side="right") - 1
+
+
+def extract_title_features(titles: List[str], personal_ip: str = "船长") -> np.ndarray:
+    """
+    批量提取标题特征
+
+    Args:
+        titles: 标题列表
+        personal_ip: 个人IP（用于"个人IP"列）
+
+    Returns:
+        N×F 特征矩阵，列顺序见 TITLE_FEATURES
+    """
+    n = len(titles)
+    features = np.zeros((n, len(TITLE_FEATURES)), dtype=np.float64)
+    if n == 0:
+        return features
+
+    lengths = np.fromiter(map(len, titles), dtype=np.int64, count=n)
+    starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(lengths[:-1] + len(_TITLE_SEPARATOR), out=starts[1:])
+    corpus = _TITLE_SEPARATOR.join(titles)
+
+    def mark(name: str, pattern: re.Pattern):
+        features[_match_rows(pattern, corpus, starts), _FEATURE_INDEX[name]] = 1
+
+    features[:, _FEATURE_INDEX["长度"]] = lengths
+    features[:, _FEATURE_INDEX["关键词数"]] = np.bincount(_match_rows(_WORD_PATTERN, corpus, starts), minlength=n)
+
+    mark("数字", _NUMBER_PATTERN)
+    for name, pattern in _LEXICON_PATTERNS.items():
+        mark(name, pattern)
+
+    # 疑问句：以?结尾、包含？或以"为什么"开头
+    mark("疑问句", _QUESTION_PATTERN)
+    question = features[:, _FEATURE_INDEX["疑问句"]]
+    question[[i for i, title in enumerate(titles) if title.endswith('?') or title.startswith("为什么")]] = 1
+
+    urgency = features[:, _FEATURE_INDEX["紧迫感词数"]]
+    for pattern in _URGENCY_PATTERNS:
+        urgency[np.unique(_match_rows(pattern, corpus, starts))] += 1
+
+    if personal_ip:
+        mark("个人IP", re.compile(re.escape(personal_ip)))
+    else:
+        features[:, _FEATURE_INDEX["个人IP"]] = 1  # 空字符串总是被包含
+
+    return features
+
+
+def _column(features: np.ndarray, name: str) -> np.ndarray:
+    return features[:, _FEATURE_INDEX[name]]
+
+
+def _ctr_flags(features: np.ndarray) -> np.ndarray:
+    """CTR因子命中矩阵（N×8，列顺序与 CTR_WEIGHTS 一致）"""
+    return np.column_stack([
+        _column(features, "数字") > 0,
+        _column(features, "关键词数") >= 3,
+        _column(features, "时效性") > 0,
+        _column(features, "情感词") > 0,
+        _column(features, "疑问句") > 0,
+        _column(features, "悬念") > 0,
+        _column(features, "稀缺性") > 0,
+        (_column(features, "长度") >= 20) & (_column(features, "长度") <= 30),
+    ])
+
+
+def _ctr_components(features: np.ndarray):
+    """
+    批量计算CTR评分
+
+    有训练好的点击率模型时使用模型预测的高阅读概率，否则按 CTR_WEIGHTS 规则打分。
+
+    Returns:
+        (原始评分 0-1, N×8 因子命中矩阵)
+    """
+    flags = _ctr_flags(features)
+
+    model = _get_ctr_model()
+    if model is not None:
+        return _predict_ctr(model, _ctr_model_inputs(features, flags)), flags
+
+    # 按 CTR_WEIGHTS 顺序逐项累加，与逐条评分的浮点结果保持一致
+    scores = np.zeros(len(features), dtype=np.float64)
+    for i, weight in enumerate(CTR_WEIGHTS.values()):
+        scores += np.where(flags[:, i], weight, 0.0)
+
+    return scores, flags
+
+
+def _captain_components(features: np.ndarray) -> Dict[str, np.ndarray]:
+    """批量计算船长式评分各维度"""
+    length = _column(features, "长度")
+    safe_length = np.where(length > 0, length, 1)
+    density_score = np.where(length > 0, _column(features, "关键词数") / safe_length * 10, 0)
+    urgency_score = np.minimum(_column(features, "紧迫感词数") * 15, 100)
+    specific_score = (_column(features, "数字") * 30 +
+                      _column(features, "工具") * 35 +
+                      _column(features, "功能") * 35)
+    ip_score = _column(features, "个人IP") * 50 + _column(features, "人设词") * 50
+
+    return {
+        "信息密度": density_score,
+        "紧迫感": urgency_score,
+        "具体性": specific_score,
+        "人设": ip_score,
+        "total": (density_score * 0.2 +
+                  urgency_score * 0.3 +
+                  specific_score * 0.3 +
+                  ip_score * 0.2),
+    }
+
+
+def _xiaohao_components(features: np.ndarray) -> Dict[str, np.ndarray]:
+    """批量计算小郝式评分各维度"""
+    number_score = _column(features, "数字") * 15 + _column(features, "量词") * 15
+    easy_score = _column(features, "轻松词") * 12 + _column(features, "Emoji") * 13
+    value_score = np.where(_column(features, "实用价值") > 0, 25, 10)
+    friendly_score = np.where(_column(features, "亲切") > 0, 20, 10)
+
+    return {
+        "数字量化": number_score,
+        "轻松幽默": easy_score,
+        "实用价值": value_score,
+        "亲切接地气": friendly_score,
+        "total": (number_score * 0.30 +
+                  easy_score * 0.25 +
+                  value_score * 0.25 +
+                  friendly_score * 0.20),
+    }
+
+
+def _row(components: Dict[str, np.ndarray], i: int) -> Dict[str, float]:
+    """取出第i个标题的各维度得分"""
+    return {name: values[i] for name, values in components.items()}
+
+
+def score_titles(titles: List[str], personal_ip: str = "船长") -> Dict[str, Any]:
+    """
+    批量标题评分：一次特征提取，同时得到CTR/船长式/小郝式三种评分
+
+    Args:
+        titles: 标题列表
+        personal_ip: 船长式评分使用的个人IP
+
+    Returns:
+        {
+            "feature_names": 特征列名,
+            "features": N×F 特征矩阵,
+            "ctr": CTR评分（0-100）,
+            "captain": 船长式总分,
+            "xiaohao": 小郝式总分,
+            "ctr_raw"/"ctr_flags"/"captain_details"/"xiaohao_details": 评分分项
+        }
+    """
+    features = extract_title_features(titles, personal_ip)
+    ctr_raw, ctr_flags = _ctr_components(features)
+    captain = _captain_components(features)
+    xiaohao = _xiaohao_components(features)
+
+    return {
+        "feature_names": TITLE_FEATURES,
+        "features": features,
+        "ctr": ctr_raw * 100,
+        "captain": captain["total"],
+        "xiaohao": xiaohao["total"],
+        "ctr_raw": ctr_raw,
+        "ctr_flags": ctr_flags,
+        "captain_details": captain,
+        "xiaohao_details": xiaohao,
+    }
+
+
+# ===== 点击率模型（2026-10-19新增） =====
+# 用 content-data-manager 保存的 标题→阅读量 数据训练逻辑回归，
+# 预测"阅读量高于中位数"的概率，替代固定的 CTR_WEIGHTS。
+# 权重保存为 .npy（第0行权重，第1行均值，第2行标准差；第0列对应截距），
+# 首次使用时以 mmap 方式加载；同名 .json 记录输入特征和训练信息。
+
+CTR_MODEL_PATH = os.getenv("CTR_MODEL_PATH", "ctr_model.npy")
+
+# 模型输入特征：CTR规则因子 + 若干数值特征
+CTR_MODEL_INPUTS = list(CTR_WEIGHTS.keys()) + ["长度", "关键词数", "紧迫感词数", "Emoji", "实用价值", "亲切"]
+
+_ctr_model_cache = {"path": None, "model": None}
+
+
+def _ctr_model_inputs(features: np.ndarray, flags: np.ndarray) -> np.ndarray:
+    """拼出模型输入矩阵（列顺序见 CTR_MODEL_INPUTS）"""
+    numeric = [_column(features, name) for name in CTR_MODEL_INPUTS[len(CTR_WEIGHTS):]]
+    return np.column_stack([flags.astype(np.float64)] + numeric)
+
+
+def _metadata_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".json"
+
+
+def _load_ctr_model(model_path: str) -> Optional[np.ndarray]:
+    """以 mmap 方式加载模型权重；文件不存在或与当前特征不匹配时返回 None"""
+    metadata_path = _metadata_path(model_path)
+    if not (os.path.exists(model_path) and os.path.exists(metadata_path)):
+        return None
+
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        if metadata.get("inputs") != CTR_MODEL_INPUTS:
+            return None
+        params = np.load(model_path, mmap_mode="r")
+        if params.shape != (3, len(CTR_MODEL_INPUTS) + 1):
+            return None
+        return params
+    except (OSError, ValueError):
+        return None
+
+
+def _get_ctr_model() -> Optional[np.ndarray]:
+    """首次使用时加载模型，之后复用；CTR_MODEL_PATH 变化时重新加载"""
+    if _ctr_model_cache["path"] != CTR_MODEL_PATH:
+        _ctr_model_cache["path"] = CTR_MODEL_PATH
+        _ctr_model_cache["model"] = _load_ctr_model(CTR_MODEL_PATH)
+    return _ctr_model_cache["model"]
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def _predict_ctr(params: np.ndarray, inputs: np.ndarray) -> np.ndarray:
+    """批量预测高阅读概率（0-1）"""
+    weights, mean, std = params[0], params[1, 1:], params[2, 1:]
+    return _sigmoid((inputs - mean) / std @ weights[1:] + weights[0])
+
+
+def _auc(labels: np.ndarray, scores: np.ndarray) -> Optional[float]:
+    """ROC AUC（按秩计算，并列取平均秩）"""
+    positives = int(labels.sum())
+    negatives = len(labels) - positives
+    if positives == 0 or negatives == 0:
+        return None
+
+    order = np.argsort(scores, kind="mergesort")
+    _, first, counts = np.unique(scores[order], return_index=True, return_counts=True)
+    ranks = np.empty(len(scores), dtype=np.float64)
+    ranks[order] = np.repeat(first + (counts + 1) / 2.0, counts)
+    return float((ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def _fit_logistic_regression(x: np.ndarray, y: np.ndarray, l2: float = 1.0,
+                             max_iter: int = 25, tol: float = 1e-6) -> np.ndarray:
+    """
+    牛顿法（IRLS）拟合带L2正则的逻辑回归
+
+    Args:
+        x: 已标准化的输入矩阵（N×D）
+        y: 0/1 标签
+        l2: L2正则系数（不作用于截距）
+        max_iter: 最大迭代次数
+        tol: 收敛阈值
+
+    Returns:
+        权重向量（第0个为截距）
+    """
+    design = np.column_stack([np.ones(len(x)), x])
+    weights = np.zeros(design.shape[1])
+    penalty = np.full(design.shape[1], l2)
+    penalty[0] = 0.0
+
+    for _ in range(max_iter):
+        p = _sigmoid(design @ weights)
+        gradient = design.T @ (p - y) + penalty * weights
+        hessian = (design * (p * (1 - p))[:, None]).T @ design + np.diag(penalty + 1e-9)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.max(np.abs(step)) < tol:
+            break
+
+    return weights
+
+
+def train_ctr_model(data_file: str = "articles_data.json", model_path: str = None,
+                    l2: float = 1.0, validation_split: float = 0.2, seed: int = 42) -> Dict[str, Any]:
+    """
+    用文章数据训练点击率模型并保存权重
+
+    Args:
+        data_file: content-data-manager 写入的文章数据文件
+        model_path: 模型保存路径（默认 CTR_MODEL_PATH）
+        l2: L2正则系数
+        validation_split: 验证集比例（0 表示不划分）
+        seed: 划分验证集的随机种子
+
+    Returns:
+        训练结果
+    """
+    model_path = model_path or CTR_MODEL_PATH
+
+    if not os.path.exists(data_file):
+        raise ValueError(f"文章数据文件不存在: {data_file}")
+
+    with open(data_file, 'r', encoding='utf-8') as f:
+        articles = json.load(f).get("articles", [])
+
+    articles = [a for a in articles if a.get("title") and isinstance(a.get("reading"), int)]
+    if len(articles) < 20:
+        raise ValueError(f"有效文章数据太少（{len(articles)}篇），至少需要20篇")
+
+    titles = [a["title"] for a in articles]
+    readings = np.fromiter((a["reading"] for a in articles), dtype=np.float64, count=len(articles))
+
+    # 标签：阅读量高于中位数
+    threshold = float(np.median(readings))
+    labels = (readings > threshold).astype(np.float64)
+    if labels.min() == labels.max():
+        raise ValueError("阅读量没有区分度，无法训练")
+
+    features = extract_title_features(titles)
+    inputs = _ctr_model_inputs(features, _ctr_flags(features))
+
+    # 划分训练集和验证集
+    indices = np.random.default_rng(seed).permutation(len(titles))
+    n_valid = int(len(titles) * validation_split)
+    valid_idx, train_idx = indices[:n_valid], indices[n_valid:]
+
+    mean = inputs[train_idx].mean(axis=0)
+    std = inputs[train_idx].std(axis=0)
+    std[std == 0] = 1.0
+
+    weights = _fit_logistic_regression((inputs[train_idx] - mean) / std, labels[train_idx], l2=l2)
+
+    params = np.zeros((3, len(CTR_MODEL_INPUTS) + 1))
+    params[0] = weights
+    params[1, 1:] = mean
+    params[2, 0] = 1.0
+    params[2, 1:] = std
+
+    def evaluate(idx):
+        if len(idx) == 0:
+            return None
+        probs = _predict_ctr(params, inputs[idx])
+        auc = _auc(labels[idx], probs)
+        return {
+            "samples": int(len(idx)),
+            "accuracy": round(float(((probs > 0.5) == labels[idx]).mean()), 4),
+            "auc": None if auc is None else round(auc, 4),
+        }
+
+    metadata = {
+        "inputs": CTR_MODEL_INPUTS,
+        "reading_threshold": threshold,
+        "samples": len(titles),
+        "l2": l2,
+        "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "data_file": data_file,
+        "train": evaluate(train_idx),
+        "validation": evaluate(valid_idx),
+    }
+
+    model_dir = os.path.dirname(model_path)
+    if model_dir and not os.path.exists(model_dir):
+        os.makedirs(model_dir)
+    np.save(model_path, params)
+    with open(_metadata_path(model_path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    # 让后续评分重新加载新模型
+    _ctr_model_cache["path"] = None
+
+    return {
+        "status": "success",
+        "model_path": model_path,
+        "weights": {name: round(float(w), 4) for name, w in zip(["截距"] + CTR_MODEL_INPUTS, weights)},
+        "samples": metadata["samples"],
+        "reading_threshold": threshold,
+        "train": metadata["train"],
+        "validation": metadata["validation"],
+    }
+
+
+# ===== 穷举式标题生成（2026-10-19新增） =====
+# 惰性枚举 模板 × 槽位取值 的笛卡尔积，流式去重，配合批量评分和有界堆取Top-K，
+# 不需要把整个笛卡尔积放进内存。
+
+# 各风格的模板类型
+STYLE_TEMPLATE_TYPES = {
+    "general": [name for name in TITLE_TEMPLATES if not name.startswith(("船长_", "小郝_"))],
+    "captain": [name for name in TITLE_TEMPLATES if name.startswith("船长_")],
+    "xiaohao": [name for name in TITLE_TEMPLATES if name.startswith("小郝_")],
+}
+
+# 各风格默认使用的评分
+STYLE_SCORERS = {
+    "general": "ctr",
+    "captain": "captain",
+    "xiaohao": "xiaohao",
+}
+
+
+def build_slot_values(style: str, topic: str = "", personal_ip: str = None) -> Dict[str, List[Any]]:
+    """
+    构建某种风格的模板槽位取值表
+
+    Args:
+        style: 风格（general/captain/xiaohao）
+        topic: 主题（填入热点/描述类槽位）
+        personal_ip: 个人IP（可选）
+
+    Returns:
+        {槽位名: 候选取值列表}
+    """
+    if style == "captain":
+        return {
+            "tool_name": KEYWORD_BANK["船长_工具"],
+            "feature": KEYWORD_BANK["船长_功能"],
+            "feature1": KEYWORD_BANK["船长_功能"],
+            "feature2": KEYWORD_BANK["船长_功能"],
+            "feature3": KEYWORD_BANK["船长_功能"],
+            "extra_feature": KEYWORD_BANK["船长_功能"],
+            "personal_ip": [personal_ip or "船长"],
+            "competitor": KEYWORD_BANK["船长_竞品"],
+            "count": [38, 50, 100],
+            "count2": [3, 5, 7],
+            "count3": [10, 20, 30],
+            "technique": KEYWORD_BANK["船长_资源"],
+            "resource": KEYWORD_BANK["船长_资源"],
+            "method": KEYWORD_BANK["船长_资源"],
+            "identity": KEYWORD_BANK["船长_身份"],
+            "description": [topic] if topic else KEYWORD_BANK["船长_功能"],
+        }
+
+    if style == "xiaohao":
+        return {
+            "tool_name": KEYWORD_BANK["小郝_工具"],
+            "feature": KEYWORD_BANK["小郝_功能"],
+            "feature1": KEYWORD_BANK["小郝_功能"],
+            "feature2": KEYWORD_BANK["小郝_功能"],
+            "feature3": KEYWORD_BANK["小郝_功能"],
+            "pain_point": KEYWORD_BANK["小郝_痛点"],
+            "count": [3, 5, 7],
+            "growth": [50, 80, 100, 200],
+            "identity": KEYWORD_BANK["小郝_身份"],
+            "resource": KEYWORD_BANK["小郝_资源"],
+            "benefit": ["轻松搞定", "效率提升", "不再犯难", "得心应手"],
+            "old_way": ["手动处理", "传统方法", "复杂操作"],
+            "wrong_way": ["手动处理", "传统方法", "复杂操作"],
+            "wrong_thought": ["很难", "很复杂", "需要专业背景"],
+            "truth": ["这么简单", "这么轻松", "这么强大"],
+        }
+
+    if style == "general":
+        return {
+            "topic": [topic],
+            "pain_point": KEYWORD_BANK["痛点"],
+            "solution": KEYWORD_BANK["利益"],
+            "count": [3, 5, 7, 10],
+            "hot_topic": [topic] if topic else KEYWORD_BANK["热点"],
+            "emotion": KEYWORD_BANK["情感"],
+            "identity": KEYWORD_BANK["身份"],
+            "common_sense": ["这么做"],
+            "unexpected_result": ["竟然错了"],
+            "common_action": ["继续这样"],
+            "unexpected_action": ["这样做"],
+            "risk": ["这个问题"],
+            "benefit": KEYWORD_BANK["利益"],
+            "term": ["大家"],
+            "question": ["怎么办"],
+            "time": ["一年"],
+            "money": ["100"],
+            "action": KEYWORD_BANK["动作"],
+            "growth": [50, 100, 200, 300],
+            "truth": ["真相"],
+        }
+
+    raise ValueError(f"不支持的风格: {style}")
+
+
+def _template_fields(template: str) -> List[str]:
+    """模板中用到的槽位名（按出现顺序去重）"""
+    return list(dict.fromkeys(field for _, field, _, _ in string.Formatter().parse(template) if field))
+
+
+def _iter_template_product(template: str, fields: List[str], axes: List[List[Any]],
+                           distinct_groups: List[List[str]],
+                           rng: Optional[random.Random]) -> Iterator[str]:
+    """
+    惰性枚举单个模板的全部填充结果
+
+    不打乱时按 itertools.product 的顺序输出；打乱时用 i → (a·i + b) mod N
+    （a 与 N 互质）在下标空间上做一次置换，只需 O(1) 内存。
+    distinct_groups 中同一组的槽位取值必须互不相同（如 feature1/feature2）。
+    """
+    total = math.prod(len(axis) for axis in axes)
+    if total == 0:
+        return
+
+    stride, offset = 1, 0
+    if rng is not None and total > 1:
+        stride = rng.randrange(1, total)
+        while math.gcd(stride, total) != 1:
+            stride = rng.randrange(1, total)
+        offset = rng.randrange(total)
+
+    for i in range(total):
+        index = (i * stride + offset) % total
+        values = {}
+        for field, axis in zip(reversed(fields), reversed(axes)):
+            index, remainder = divmod(index, len(axis))
+            values[field] = axis[remainder]
+        if any(len({values[field] for field in group}) < len(group) for group in distinct_groups):
+            continue
+        yield template.format(**values)
+
+
+def iter_unique_titles(template_types: List[str], slot_values: Dict[str, List[Any]],
+                       seed: int = None) -> Iterator[Tuple[str, str]]:
+    """
+    穷举模板 × 槽位取值，流式去重后逐个产出标题
+
+    各模板轮流产出（round-robin），即使只消费前一部分也能覆盖所有模板。
+
+    Args:
+        template_types: 模板类型列表
+        slot_values: 槽位取值表（见 build_slot_values）
+        seed: 随机种子；为 None 时按固定顺序枚举，否则按种子确定性地打乱
+
+    Yields:
+        (标题, 模板类型)
+    """
+    rng = random.Random(seed) if seed is not None else None
+
+    plans = []
+    for template_type in template_types:
+        templates = TITLE_TEMPLATES.get(template_type)
+        if templates is None:
+            raise ValueError(f"未找到模板类型: {template_type}")
+        for template in templates:
+            fields = _template_fields(template)
+            if any(field not in slot_values for field in fields):
+                continue  # 槽位不全的模板跳过
+            axes = [list(dict.fromkeys(slot_values[field])) for field in fields]
+
+            # 取自同一个词库的槽位（如 feature1/feature2/feature3）不能重复取值
+            groups = {}
+            for field in fields:
+                groups.setdefault(id(slot_values[field]), []).append(field)
+            distinct_groups = [group for group in groups.values() if len(group) > 1]
+
+            plans.append((template_type, template, fields, axes, distinct_groups))
+
+    if rng is not None:
+        rng.shuffle(plans)
+
+    streams = deque(
+        (template_type, _iter_template_product(template, fields, axes, distinct_groups, rng))
+        for template_type, template, fields, axes, distinct_groups in plans
+    )
+
+    seen = set()
+    while streams:
+        template_type, stream = streams.popleft()
+        title = next(stream, None)
+        if title is None:
+            continue
+        streams.append((template_type, stream))
+        if title in seen:
+            continue
+        seen.add(title)
+        yield title, template_type
+
+
+def top_k_titles(candidates: Iterable[Tuple[str, str]], k: int = 20, scorer: str = "ctr",
+                 personal_ip: str = "船长", max_candidates: int = None,
+                 chunk_size: int = 4096) -> List[Dict[str, Any]]:
+    """
+    从候选标题流中选出得分最高的k个
+
+    候选按块批量评分，只保留一个大小为k的最小堆；分数相同时先出现的优先，结果确定。
+
+    Args:
+        candidates: (标题, 模板类型) 迭代器
+        k: 返回数量
+        scorer: 评分方式（ctr/captain/xiaohao）
+        personal_ip: 船长式评分使用的个人IP
+        max_candidates: 最多评估的候选数量（None 表示全部）
+        chunk_size: 每批评分的标题数量
+
+    Returns:
+        按得分从高到低排列的标题列表
+    """
+    if scorer not in STYLE_SCORERS.values():
+        raise ValueError(f"不支持的评分方式: {scorer}")
+    if k <= 0:
+        return []
+
+    heap = []
+    seq = 0
+    evaluated = 0
+    stream = iter(candidates) if max_candidates is None else itertools.islice(candidates, max_candidates)
+
+    while True:
+        chunk = list(itertools.islice(stream, chunk_size))
+        if not chunk:
+            break
+        evaluated += len(chunk)
+
+        scores = score_titles([title for title, _ in chunk], personal_ip)[scorer]
+        if len(heap) >= k:
+            # 堆已满时只有严格高于堆顶的候选才可能入堆
+            candidate_rows = np.flatnonzero(scores > heap[0][0])
+        else:
+            candidate_rows = range(len(chunk))
+
+        for i in candidate_rows:
+            title, template_type = chunk[i]
+            item = (float(scores[i]), -(seq + int(i)), title, template_type)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        seq += len(chunk)
+
+    return [
+        {"title": title, "template_type": template_type, "score": round(score, 2)}
+        for score, _, title, template_type in sorted(heap, reverse=True)
+    ]
+
+
+def generate_best_titles(topic: str, k: int = 20, style: str = "general",
+                         template_types: List[str] = None, personal_ip: str = None,
+                         seed: int = None, max_candidates: int = 200000) -> Dict[str, Any]:
+    """
+    为主题生成得分最高的k个不重复标题
+
+    Args:
+        topic: 主题
+        k: 返回数量
+        style: 风格（general/captain/xiaohao）
+        template_types: 模板类型列表（默认该风格的全部模板）
+        personal_ip: 个人IP（可选）
+        seed: 随机种子（可选，控制枚举顺序）
+        max_candidates: 最多评估的候选数量
+
+    Returns:
+        Top-K 标题及统计信息
+    """
+    if style not in STYLE_TEMPLATE_TYPES:
+        raise ValueError(f"不支持的风格: {style}")
+
+    template_types = template_types or STYLE_TEMPLATE_TYPES[style]
+    slot_values = build_slot_values(style, topic, personal_ip)
+    scorer = STYLE_SCORERS[style]
+    personal_ip = personal_ip or ("小郝" if style == "xiaohao" else "船长")
+
+    titles = top_k_titles(
+        iter_unique_titles(template_types, slot_values, seed),
+        k=k,
+        scorer=scorer,
+        personal_ip=personal_ip,
+        max_candidates=max_candidates,
+    )
+
+    return {
+        "topic": topic,
+        "style": style,
+        "scorer": scorer,
+        "template_types": template_types,
+        "titles": titles,
+    }
+
+
 def handler(args: Dict[str, Any]) -> Dict[str, Any]:
     """
     主处理函数
@@ -854,7 +1559,13 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
             - keywords: 关键词列表（可选）
             - template_type: 模板类型（可选）
             - title: 原标题（可选，用于A/B测试和优化）
-            - action: 操作类型：generate/optimize/ab_test/analyze/captain_generate/captain_score/xiaohao_generate/xiaohao_score
+            - titles: 标题列表（batch_score使用）
+            - style: 风格（generate_best使用：general/captain/xiaohao）
+            - count: 生成数量（generate_best默认20）
+            - seed: 随机种子（generate_best可选）
+            - data_file: 文章数据文件（train_ctr_model使用，默认articles_data.json）
+            - model_path: 模型保存路径（train_ctr_model可选）
+            - action: 操作类型：train_ctr_model/generate/generate_best/optimize/ab_test/analyze/captain_generate/captain_score/xiaohao_generate/xiaohao_score/batch_score
             - personal_ip: 个人IP（可选，用于船长式标题，默认"船长"）
 
     Returns:
@@ -923,6 +1634,57 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
             "personal_ip": personal_ip,
         }
 
+    elif action == "batch_score":
+        # 批量评分（2026-10-19新增）：一次计算CTR/船长式/小郝式三种评分
+        titles = args.get("titles", [])
+        if not titles:
+            raise ValueError("请提供标题列表")
+
+        personal_ip = args.get("personal_ip", "船长")
+        batch = score_titles(titles, personal_ip)
+
+        result = {
+            "count": len(titles),
+            "feature_names": batch["feature_names"],
+            "scores": [
+                {
+                    "title": title,
+                    "ctr_score": round(float(batch["ctr"][i]), 2),
+                    "captain_score": round(float(batch["captain"][i]), 2),
+                    "xiaohao_score": round(float(batch["xiaohao"][i]), 2),
+                }
+                for i, title in enumerate(titles)
+            ],
+        }
+        if args.get("include_features", False):
+            result["features"] = batch["features"].tolist()
+
+    elif action == "train_ctr_model":
+        # 训练点击率模型（2026-10-19新增）
+        result = train_ctr_model(
+            data_file=args.get("data_file", "articles_data.json"),
+            model_path=args.get("model_path"),
+            l2=args.get("l2", 1.0),
+            validation_split=args.get("validation_split", 0.2),
+        )
+
+    elif action == "generate_best":
+        # 穷举去重生成Top-K标题（2026-10-19新增）
+        topic = args.get("topic", "")
+        if not topic:
+            raise ValueError("请提供主题/话题")
+
+        template_type = args.get("template_type")
+        result = generate_best_titles(
+            topic,
+            k=args.get("count", 20),
+            style=args.get("style", "general"),
+            template_types=[template_type] if template_type else args.get("template_types"),
+            personal_ip=args.get("personal_ip"),
+            seed=args.get("seed"),
+            max_candidates=args.get("max_candidates", 200000),
+        )
+
     elif action == "generate":
         # 生成标题
         topic = args.get("topic", "")
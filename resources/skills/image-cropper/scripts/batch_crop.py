@@ -6,18 +6,31 @@ Batch Image Cropper
 Batch crop multiple images to specified dimensions.
 Supports custom sizes and preset dimensions.
 
+Files are processed in a process pool (one worker per CPU by default).
+With a scaling fit mode (cover/contain/exact), JPEG sources are decoded
+with Image.draft at 1/2, 1/4 or 1/8 scale whenever the output only needs
+that much resolution.
+
+Runs are incremental: a manifest in the output directory records each
+source's size, mtime, content hash and the crop settings, and later runs
+only process new or changed sources.
+
 Author: Claude Code
 Created: 2026-01-11
 """
 
 import sys
 import os
+import io
+import json
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import glob
 
 # Fix encoding issues on Windows
 if sys.platform == 'win32':
-    import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
@@ -28,20 +41,170 @@ except ImportError:
     sys.exit(1)
 
 # Import preset sizes
-from crop_image import PRESET_SIZES, parse_size
+from crop_image import FIT_MODES, PRESET_SIZES, decode_size, fit_image, parse_size, save_image
+
+MANIFEST_NAME = '.batch_crop_manifest.json'
+
+# Bump when the manifest layout changes to force a full re-crop
+MANIFEST_VERSION = 1
+
+# Save the manifest every N processed files so an interrupted run keeps its progress
+MANIFEST_SAVE_INTERVAL = 500
+
+
+def file_digest(file_path):
+    """Return the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(output_path):
+    """
+    Load the crop manifest of an output directory.
+
+    Returns:
+        Manifest dict ({'version', 'entries'}); empty if missing or outdated
+    """
+    try:
+        with open(Path(output_path) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        manifest = {'version': MANIFEST_VERSION, 'entries': {}}
+    return manifest
+
+
+def save_manifest(output_path, manifest):
+    """Write the manifest atomically (temp file + replace)."""
+    manifest_path = Path(output_path) / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+    except OSError as e:
+        print(f"Warning: could not save manifest ({e})")
+
+
+def find_files(input_path, patterns, recursive=False, exclude=None):
+    """
+    Collect files matching any of the glob patterns.
+
+    Args:
+        input_path: Input directory
+        patterns: Glob pattern or list of patterns
+        recursive: Also search subdirectories
+        exclude: Directory whose contents are skipped (e.g. an output folder inside the input)
+
+    Returns:
+        Sorted list of unique file paths
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    exclude = Path(exclude).resolve() if exclude else None
+
+    files = set()
+    for pattern in patterns:
+        matches = input_path.rglob(pattern) if recursive else input_path.glob(pattern)
+        for file_path in matches:
+            if not file_path.is_file():
+                continue
+            if exclude and file_path.resolve().is_relative_to(exclude):
+                continue
+            files.add(file_path)
+    return sorted(files)
+
+
+def open_for_crop(file_path, target_size=None, fit='crop'):
+    """
+    Open an image, letting JPEG decode at reduced scale when possible.
+
+    Args:
+        file_path: Image path or file object
+        target_size: Output (width, height); None means full resolution
+        fit: Fit mode (only scaling modes can use a reduced decode)
+
+    Returns:
+        Loaded image (the file handle is already closed)
+    """
+    with Image.open(file_path) as img:
+        min_size = decode_size(img.size, target_size, fit) if target_size else None
+        if min_size and img.format == 'JPEG':
+            # draft picks the largest 1/2, 1/4 or 1/8 reduction still >= min_size
+            img.draft('RGB', min_size)
+        img.load()
+    return img
+
+
+def crop_file(file_path, output_file, target_width, target_height, quality=95, fit='crop',
+              background='white'):
+    """
+    Crop/fit one file and save it (runs inside pool workers).
+
+    Args:
+        file_path: Input image path
+        output_file: Output image path
+        target_width: Target width
+        target_height: Target height
+        quality: JPEG quality
+        fit: 'crop' (center window), 'cover', 'contain' or 'exact'
+        background: Padding color for 'contain'
+
+    Returns:
+        Tuple of (output path, error message or None, source sha256)
+    """
+    digest = None
+    try:
+        # Read once: the same bytes are hashed for the manifest and decoded
+        data = Path(file_path).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        # Scaling fits may decode JPEGs at 1/2-1/8 scale; 'crop' needs full resolution
+        img = open_for_crop(io.BytesIO(data), (target_width, target_height), fit)
+
+        # Crop and save
+        cropped_img = fit_image(img, target_width, target_height, fit, background)
+        img.close()
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        save_image(cropped_img, output_file, quality)
+        cropped_img.close()
+
+        return str(output_file), None, digest
+
+    except Exception as e:
+        return str(output_file), str(e), digest
+
+
+def _crop_task(task):
+    return crop_file(*task)
 
 
-def batch_crop(input_dir, output_dir, size=None, preset=None, quality=95, pattern='*.jpg'):
+def batch_crop(input_dir, output_dir, size=None, preset=None, quality=95, pattern='*.jpg',
+               workers=None, recursive=False, remove_orphans=False, force=False,
+               fit='crop', background='white'):
     """
     Batch crop all images in a directory.
 
+    Sources whose size, mtime (or content hash) and crop settings match the
+    manifest, and whose output still exists, are skipped.
+
     Args:
         input_dir: Input directory path
         output_dir: Output directory path
         size: Target size as string (e.g., '900x383')
         preset: Preset name
         quality: JPEG quality
-        pattern: File pattern to match (default '*.jpg')
+        pattern: File pattern or list of patterns to match (default '*.jpg')
+        workers: Worker processes (default: CPU count; 1 processes files in-process)
+        recursive: Also crop files in subdirectories (outputs keep the relative layout)
+        remove_orphans: Delete outputs whose source file no longer exists
+        force: Re-crop every file, ignoring the manifest
+        fit: 'crop' (center window, default), 'cover', 'contain' or 'exact'
+        background: Padding color for 'contain'
 
     Returns:
         Tuple of (success_count, fail_count)
@@ -60,66 +223,131 @@ def batch_crop(input_dir, output_dir, size=None, preset=None, quality=95, patter
         print("Error: Must specify either --preset or --size")
         return (0, 0)
 
+    if fit not in FIT_MODES:
+        print(f"Error: Unknown fit mode: {fit}. Use one of: {', '.join(FIT_MODES)}")
+        return (0, 0)
+
     # Find all matching files
     input_path = Path(input_dir)
     if not input_path.exists():
         print(f"Error: Input directory not found: {input_dir}")
         return (0, 0)
 
-    files = list(input_path.glob(pattern))
-    if not files:
+    output_path = Path(output_dir)
+    files = find_files(input_path, pattern, recursive=recursive, exclude=output_path)
+    if not files and not remove_orphans:
         print(f"No files found matching pattern: {pattern}")
         return (0, 0)
 
-    print(f"Found {len(files)} files")
-    print(f"Target size: {size_desc}")
+    # Create output directory
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Compare against the manifest: only new or changed sources are cropped
+    manifest = load_manifest(output_path)
+    entries = manifest['entries']
+    pending = []
+    skipped = 0
+
+    for file_path in files:
+        key = file_path.relative_to(input_path).as_posix()
+        output_file = output_path / key
+        stat = file_path.stat()
+        entry = entries.get(key)
+
+        if (not force and entry
+                and entry['target'] == [target_width, target_height]
+                and entry['quality'] == quality
+                and entry.get('fit', 'crop') == fit
+                and entry.get('background', 'white') == background
+                and output_file.exists()):
+            if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                skipped += 1
+                continue
+            # Touched but unchanged (e.g. copied or re-synced): confirm by content hash
+            if entry['size'] == stat.st_size and file_digest(file_path) == entry['hash']:
+                entry['mtime'] = stat.st_mtime
+                skipped += 1
+                continue
+
+        pending.append((file_path, key, output_file, stat))
+
+    removed = 0
+    if remove_orphans:
+        current = {file_path.relative_to(input_path).as_posix() for file_path in files}
+        for key in [k for k in entries if k not in current]:
+            if (input_path / key).exists():
+                continue
+            output_file = output_path / key
+            if output_file.exists():
+                output_file.unlink()
+            del entries[key]
+            removed += 1
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(pending) or 1))
+
+    print(f"Found {len(files)} files ({len(pending)} new or changed, {skipped} up to date)")
+    print(f"Target size: {size_desc} (fit: {fit})")
     print(f"Output directory: {output_dir}")
+    print(f"Workers: {workers}")
+    if removed:
+        print(f"Removed {removed} orphaned outputs")
     print("-" * 50)
 
-    # Create output directory
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
+    tasks = [
+        (str(file_path), str(output_file), target_width, target_height, quality, fit, background)
+        for file_path, _, output_file, _ in pending
+    ]
 
     # Process each file
     success_count = 0
     fail_count = 0
+    start = time.perf_counter()
 
-    for i, file_path in enumerate(files, 1):
-        try:
-            print(f"[{i}/{len(files)}] Processing: {file_path.name}")
-
-            # Open image
-            img = Image.open(file_path)
-            original_width, original_height = img.size
-
-            # Calculate crop box
-            left = (original_width - target_width) // 2
-            top = (original_height - target_height) // 2
-            right = left + target_width
-            bottom = top + target_height
-
-            # Ensure crop box is within bounds
-            left = max(0, left)
-            top = max(0, top)
-            right = min(original_width, right)
-            bottom = min(original_height, bottom)
-
-            # Crop
-            cropped_img = img.crop((left, top, right, bottom))
-
-            # Save
-            output_file = output_path / file_path.name
-            cropped_img.save(output_file, quality=quality)
-
-            print(f"  -> Saved to: {output_file}")
-            success_count += 1
-
-        except Exception as e:
-            print(f"  -> Error: {e}")
-            fail_count += 1
+    if workers == 1:
+        results = map(_crop_task, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        # Small chunks keep progress flowing while amortising inter-process overhead
+        chunksize = max(1, min(32, len(tasks) // (workers * 8)))
+        results = executor.map(_crop_task, tasks, chunksize=chunksize)
+
+    try:
+        for i, ((file_path, key, _, stat), (output_file, error, digest)) in enumerate(zip(pending, results), 1):
+            if error is None:
+                print(f"[{i}/{len(pending)}] {key} -> {output_file}")
+                success_count += 1
+                entries[key] = {
+                    'source': str(file_path),
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime,
+                    'hash': digest,
+                    'target': [target_width, target_height],
+                    'quality': quality,
+                    'fit': fit,
+                    'background': background,
+                    'output': output_file,
+                }
+            else:
+                print(f"[{i}/{len(pending)}] {key} -> Error: {error}")
+                fail_count += 1
+                entries.pop(key, None)
+
+            if i % MANIFEST_SAVE_INTERVAL == 0:
+                save_manifest(output_path, manifest)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        save_manifest(output_path, manifest)
+
+    elapsed = time.perf_counter() - start
+    rate = len(pending) / elapsed if elapsed > 0 else 0.0
 
     print("-" * 50)
-    print(f"Complete: {success_count} succeeded, {fail_count} failed")
+    print(f"Complete: {success_count} succeeded, {fail_count} failed, {skipped} skipped")
+    print(f"Time: {elapsed:.2f}s ({rate:.1f} images/s, {workers} workers)")
 
     return (success_count, fail_count)
 
@@ -138,6 +366,13 @@ Examples:
 
   # Crop all PNG files
   python batch_crop.py input_folder/ --size 900x383 --output output_folder/ --pattern "*.png"
+
+  # Scale camera photos down to fill the cover (JPEGs decode at reduced scale)
+  python batch_crop.py photos/ --preset wechat-cover --fit cover --output covers/
+
+  # Nightly incremental run over a nested folder (only new/changed images are cropped)
+  python batch_crop.py assets/ --preset wechat-cover --output cropped/ \\
+      --recursive --pattern "*.jpg" "*.png" --remove-orphans
         """
     )
 
@@ -172,8 +407,47 @@ Examples:
 
     parser.add_argument(
         '--pattern',
-        default='*.jpg',
-        help='File pattern to match (default: *.jpg)'
+        nargs='+',
+        default=['*.jpg'],
+        help='File pattern(s) to match (default: *.jpg)'
+    )
+
+    parser.add_argument(
+        '--fit',
+        choices=FIT_MODES,
+        default='crop',
+        help='crop: center window (default), cover: scale to fill then crop, '
+             'contain: scale to fit and pad, exact: stretch'
+    )
+
+    parser.add_argument(
+        '--background',
+        default='white',
+        help='Padding color for --fit contain (default: white)'
+    )
+
+    parser.add_argument(
+        '--recursive',
+        action='store_true',
+        help='Also crop images in subdirectories'
+    )
+
+    parser.add_argument(
+        '--remove-orphans',
+        action='store_true',
+        help='Delete outputs whose source image no longer exists'
+    )
+
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Re-crop every image, ignoring the manifest'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Worker processes (default: CPU count, 1 = no pool)'
     )
 
     args = parser.parse_args()
@@ -191,7 +465,13 @@ Examples:
         size=args.size,
         preset=args.preset,
         quality=args.quality,
-        pattern=args.pattern
+        pattern=args.pattern,
+        workers=args.workers,
+        recursive=args.recursive,
+        remove_orphans=args.remove_orphans,
+        force=args.force,
+        fit=args.fit,
+        background=args.background
     )
 
     sys.exit(0 if fail == 0 else 1)
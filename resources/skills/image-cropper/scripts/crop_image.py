@@ -6,6 +6,16 @@ Image Cropper - Single Image Cropping Tool
 Crops images to specified dimensions while keeping the center.
 Supports custom sizes and preset dimensions for social media.
 
+Fit modes:
+  crop     take a centered window of the target size (no scaling)
+  cover    scale to fill the target, then center-crop the overflow
+  contain  scale to fit inside the target and pad the rest
+  exact    stretch to the target size (aspect ratio not kept)
+
+Scaling modes shrink in one pass: an integer box reduce followed by a final
+LANCZOS step, and JPEGs are decoded at reduced scale (Image.draft) when the
+output is much smaller than the source.
+
 Author: Claude Code
 Created: 2026-01-11
 """
@@ -46,6 +56,13 @@ PRESET_SIZES = {
 }
 
 
+FIT_MODES = ('crop', 'cover', 'contain', 'exact')
+
+# Integer reduce is applied while the image stays at least this many times the
+# output size; LANCZOS does the rest (same trade-off as Pillow's reducing_gap)
+REDUCING_GAP = 2.0
+
+
 def parse_size(size_str):
     """Parse size string like '900x383' into (900, 383)"""
     try:
@@ -55,7 +72,126 @@ def parse_size(size_str):
         raise ValueError(f"Invalid size format: {size_str}. Use format like '900x383'")
 
 
-def crop_to_center(input_path, output_path, width=None, height=None, preset=None, quality=95):
+def center_crop_box(original_width, original_height, target_width, target_height):
+    """Centered window of the target size, clipped to the image bounds."""
+    left = (original_width - target_width) // 2
+    top = (original_height - target_height) // 2
+    right = left + target_width
+    bottom = top + target_height
+
+    # Ensure crop box is within image bounds
+    left = max(0, left)
+    top = max(0, top)
+    right = min(original_width, right)
+    bottom = min(original_height, bottom)
+
+    return left, top, right, bottom
+
+
+def decode_size(original_size, target_size, fit='crop'):
+    """
+    Smallest source resolution a fit mode needs, for Image.draft.
+
+    Args:
+        original_size: Source (width, height)
+        target_size: Output (width, height)
+        fit: Fit mode
+
+    Returns:
+        (width, height) the decoded image must keep, or None for full resolution
+    """
+    original_width, original_height = original_size
+    target_width, target_height = target_size
+
+    if fit == 'cover':
+        scale = max(target_width / original_width, target_height / original_height)
+    elif fit == 'contain':
+        scale = min(target_width / original_width, target_height / original_height)
+    elif fit == 'exact':
+        return target_width, target_height
+    else:
+        return None
+
+    if scale >= 1:
+        return None
+    return int(original_width * scale + 1), int(original_height * scale + 1)
+
+
+def fit_image(img, target_width, target_height, fit='crop', background='white'):
+    """
+    Fit an image to the target size.
+
+    Args:
+        img: Source image
+        target_width: Target width
+        target_height: Target height
+        fit: 'crop', 'cover', 'contain' or 'exact'
+        background: Padding color for 'contain'
+
+    Returns:
+        New image (target size, except 'crop' on sources smaller than the target)
+    """
+    if fit not in FIT_MODES:
+        raise ValueError(f"Unknown fit mode: {fit}. Use one of: {', '.join(FIT_MODES)}")
+
+    original_width, original_height = img.size
+
+    if fit == 'crop':
+        return img.crop(center_crop_box(original_width, original_height, target_width, target_height))
+
+    if fit == 'exact':
+        return img.resize((target_width, target_height), Image.Resampling.LANCZOS,
+                          reducing_gap=REDUCING_GAP)
+
+    if fit == 'cover':
+        # Source region with the target aspect ratio, scaled straight to the target size
+        scale = max(target_width / original_width, target_height / original_height)
+        box_width = target_width / scale
+        box_height = target_height / scale
+        left = (original_width - box_width) / 2
+        top = (original_height - box_height) / 2
+        return img.resize((target_width, target_height), Image.Resampling.LANCZOS,
+                          box=(left, top, left + box_width, top + box_height),
+                          reducing_gap=REDUCING_GAP)
+
+    # contain
+    scale = min(target_width / original_width, target_height / original_height)
+    fitted_size = (max(1, round(original_width * scale)), max(1, round(original_height * scale)))
+    fitted = img.resize(fitted_size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    mode = fitted.mode if fitted.mode in ('RGB', 'RGBA', 'L') else 'RGB'
+    canvas = Image.new(mode, (target_width, target_height), background)
+    offset = ((target_width - fitted_size[0]) // 2, (target_height - fitted_size[1]) // 2)
+    if fitted.mode == 'RGBA':
+        canvas.paste(fitted, offset, fitted)
+    else:
+        canvas.paste(fitted.convert(mode), offset)
+    return canvas
+
+
+def save_image(img, output_file, quality=95):
+    """
+    Save an image with an explicit format chosen from the output extension.
+
+    Args:
+        img: Image to save
+        output_file: Output path
+        quality: JPEG/WebP quality
+    """
+    output_file = Path(output_file)
+    image_format = Image.registered_extensions().get(output_file.suffix.lower(), 'JPEG')
+
+    options = {}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = quality
+    if image_format == 'JPEG' and img.mode not in ('RGB', 'L', 'CMYK'):
+        img = img.convert('RGB')
+
+    img.save(output_file, format=image_format, **options)
+
+
+def crop_to_center(input_path, output_path, width=None, height=None, preset=None, quality=95,
+                   fit='crop', background='white'):
     """
     Crop image to specified size while keeping center.
 
@@ -66,6 +202,8 @@ def crop_to_center(input_path, output_path, width=None, height=None, preset=None
         height: Target height (or use preset)
         preset: Preset name from PRESET_SIZES
         quality: JPEG quality (1-100)
+        fit: 'crop' (center window), 'cover', 'contain' or 'exact'
+        background: Padding color for 'contain'
 
     Returns:
         True if successful, False otherwise
@@ -83,37 +221,37 @@ def crop_to_center(input_path, output_path, width=None, height=None, preset=None
             print("Error: Must specify either --preset or --size")
             return False
 
-        # Open image
-        img = Image.open(input_path)
-        original_width, original_height = img.size
-
-        print(f"Original size: {original_width}x{original_height}")
-        print(f"Target size: {target_width}x{target_height}")
-
-        # Calculate crop box (center crop)
-        left = (original_width - target_width) // 2
-        top = (original_height - target_height) // 2
-        right = left + target_width
-        bottom = top + target_height
-
-        # Ensure crop box is within image bounds
-        left = max(0, left)
-        top = max(0, top)
-        right = min(original_width, right)
-        bottom = min(original_height, bottom)
-
-        print(f"Crop region: left={left}, top={top}, right={right}, bottom={bottom}")
+        if fit not in FIT_MODES:
+            print(f"Error: Unknown fit mode: {fit}. Use one of: {', '.join(FIT_MODES)}")
+            return False
 
-        # Crop
-        cropped_img = img.crop((left, top, right, bottom))
-        print(f"Cropped size: {cropped_img.size}")
+        # Open image
+        with Image.open(input_path) as img:
+            original_width, original_height = img.size
+
+            print(f"Original size: {original_width}x{original_height}")
+            print(f"Target size: {target_width}x{target_height}")
+
+            if fit == 'crop':
+                left, top, right, bottom = center_crop_box(
+                    original_width, original_height, target_width, target_height
+                )
+                print(f"Crop region: left={left}, top={top}, right={right}, bottom={bottom}")
+            else:
+                print(f"Fit mode: {fit}")
+                min_size = decode_size(img.size, (target_width, target_height), fit)
+                if min_size and img.format == 'JPEG':
+                    img.draft('RGB', min_size)
+
+            cropped_img = fit_image(img, target_width, target_height, fit, background)
+            print(f"Cropped size: {cropped_img.size}")
 
         # Ensure output directory exists
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Save
-        cropped_img.save(str(output_path), quality=quality)
+        save_image(cropped_img, output_path, quality)
         print(f"Saved to: {output_path}")
 
         return True
@@ -141,6 +279,9 @@ Examples:
   # Use preset
   python crop_image.py input.jpg --preset wechat-cover --output output.jpg
 
+  # Scale a large photo down to fill the cover, then crop the overflow
+  python crop_image.py photo.jpg --preset wechat-cover --fit cover --output cover.jpg
+
   # List available presets
   python crop_image.py --list-presets
         """
@@ -175,6 +316,20 @@ Examples:
         help='JPEG quality (1-100, default 95)'
     )
 
+    parser.add_argument(
+        '--fit',
+        choices=FIT_MODES,
+        default='crop',
+        help='crop: center window (default), cover: scale to fill then crop, '
+             'contain: scale to fit and pad, exact: stretch'
+    )
+
+    parser.add_argument(
+        '--background',
+        default='white',
+        help='Padding color for --fit contain (default: white)'
+    )
+
     parser.add_argument(
         '--list-presets',
         action='store_true',
@@ -208,7 +363,9 @@ Examples:
         width=width,
         height=height,
         preset=args.preset,
-        quality=args.quality
+        quality=args.quality,
+        fit=args.fit,
+        background=args.background
     )
 
     sys.exit(0 if success else 1)
@@ -26,7 +26,8 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
         "preset": "wechat-cover",  # 可选
         "width": 900,              # 可选
         "height": 383,             # 可选
-        "quality": 95              # 可选
+        "quality": 95,             # 可选
+        "fit": "cover"             # 可选: crop/cover/contain/exact
     }
     """
     action = args.get("action")
@@ -39,7 +40,9 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
             width=args.get("width"),
             height=args.get("height"),
             preset=args.get("preset"),
-            quality=args.get("quality", 95)
+            quality=args.get("quality", 95),
+            fit=args.get("fit", "crop"),
+            background=args.get("background", "white")
         )
         return {
             "success": success,
@@ -54,7 +57,13 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
             size=args.get("size"),
             preset=args.get("preset"),
             quality=args.get("quality", 95),
-            pattern=args.get("pattern", "*.jpg")
+            pattern=args.get("pattern", "*.jpg"),
+            workers=args.get("workers"),
+            recursive=args.get("recursive", False),
+            remove_orphans=args.get("remove_orphans", False),
+            force=args.get("force", False),
+            fit=args.get("fit", "crop"),
+            background=args.get("background", "white")
         )
         return {
             "success": True,
@@ -14,12 +14,15 @@
 
 import openai
 import requests
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import os
 import sys
 import argparse
 import time
 import json
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Fix encoding issues on Windows
@@ -50,6 +53,118 @@ def load_config():
 # 全局配置
 CONFIG = load_config()
 
+# 批量生成：每分钟请求上限（按账号的限流配额设置）
+DOUBAO_RATE_LIMIT_RPM = float(os.getenv("DOUBAO_RATE_LIMIT_RPM", "60"))
+
+# 批量生成：最大并发请求数
+DOUBAO_MAX_CONCURRENCY = int(os.getenv("DOUBAO_MAX_CONCURRENCY", "8"))
+
+# 批量生成：单张图片的最大重试次数
+DOUBAO_MAX_RETRIES = int(os.getenv("DOUBAO_MAX_RETRIES", "3"))
+
+
+# ===== 批量生成调度（2026-10-19新增） =====
+
+class TokenBucket:
+    """令牌桶限速器（线程安全）"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，令牌不足时等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（服务端返回 Retry-After 时使用）"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class AdaptiveConcurrency:
+    """自适应并发窗口：成功时缓慢扩大，遇到限流/服务端错误时减半（AIMD）"""
+
+    def __init__(self, limit: int):
+        """
+        Args:
+            limit: 并发上限
+        """
+        self.limit = max(1, limit)
+        self.window = float(max(1, self.limit // 2))
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """占用一个并发名额，窗口已满时等待"""
+        with self._cond:
+            while self.active >= int(self.window):
+                self._cond.wait()
+            self.active += 1
+
+    def release(self, throttled: bool = False):
+        """
+        释放名额并调整窗口
+
+        Args:
+            throttled: 本次请求是否遇到限流（429）或服务端错误（5xx）
+        """
+        with self._cond:
+            self.active -= 1
+            if throttled:
+                self.window = max(1.0, self.window / 2)
+            else:
+                # 每完成一个窗口的成功请求，窗口加 1
+                self.window = min(float(self.limit), self.window + 1 / self.window)
+            self._cond.notify_all()
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """从 API 异常中取 HTTP 状态码"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """读取 Retry-After 响应头（秒）"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """网络错误、超时、限流（429）和服务端错误（5xx）可以重试"""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status = _status_code(error)
+    return status is not None and (status in (408, 429) or status >= 500)
+
 
 class DoubaoImageGenerator:
     """豆包图像生成器"""
@@ -101,20 +216,7 @@ class DoubaoImageGenerator:
             }
         """
         try:
-            response = self.client.images.generate(
-                model=model,
-                prompt=prompt,
-                size=size,
-                quality=quality,
-                n=n
-            )
-
-            result = {
-                "url": response.data[0].url,
-                "created": response.created
-            }
-
-            return result
+            return self._request_image(self.client, prompt, size, quality, n, model)
 
         except Exception as e:
             return {
@@ -122,6 +224,22 @@ class DoubaoImageGenerator:
                 "url": None
             }
 
+    @staticmethod
+    def _request_image(client, prompt: str, size: str, quality: str, n: int, model: str) -> Dict:
+        """调用文生图接口（出错时抛出异常，由调用方决定是否重试）"""
+        response = client.images.generate(
+            model=model,
+            prompt=prompt,
+            size=size,
+            quality=quality,
+            n=n
+        )
+
+        return {
+            "url": response.data[0].url,
+            "created": response.created
+        }
+
     def edit_image(
         self,
         image_path: str,
@@ -167,39 +285,127 @@ class DoubaoImageGenerator:
         size: str = "1024x1024",
         quality: str = "standard",
         model: str = "doubao-seedream-4-5-251128",
-        delay: float = 1.0
+        delay: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        output_dir: Optional[str] = None,
+        filename_template: str = "image_{index:03d}.png",
+        on_result: Optional[Callable[[int, Dict], None]] = None
     ) -> List[Dict]:
         """
-        批量生成图像
+        批量生成图像（并发请求，按限流配额调度）
+
+        - 令牌桶控制请求速率，不超过 rate_limit
+        - 并发窗口自适应：连续成功时逐步扩大，遇到 429/5xx 时减半；
+          服务端返回 Retry-After 时整体暂停发请求
+        - 单张失败（网络错误、429、5xx）按指数退避重试，其他错误直接记为失败
+        - 指定 output_dir 时，每拿到一个 URL 就立即开始下载，与后续生成并行
 
         Args:
             prompts: 图像描述列表
             size: 图像尺寸
             quality: 质量
             model: 模型名称
-            delay: 每次请求之间的延迟（秒）
+            delay: 最小请求间隔（秒，兼容旧参数；指定后等价于 rate_limit=60/delay）
+            concurrency: 最大并发数（默认 DOUBAO_MAX_CONCURRENCY）
+            rate_limit: 每分钟请求上限（默认 DOUBAO_RATE_LIMIT_RPM）
+            max_retries: 单张最大重试次数（默认 DOUBAO_MAX_RETRIES）
+            output_dir: 下载目录（可选）
+            filename_template: 下载文件名模板（index 从 1 开始）
+            on_result: 每张完成（含下载）时的回调 on_result(序号, 结果)
 
         Returns:
-            生成结果列表
+            生成结果列表（与 prompts 顺序一致），每项为
+            {"url", "created", "attempts"[, "path"]} 或 {"error", "url": None, "attempts"}
         """
-        results = []
-
-        for i, prompt in enumerate(prompts):
-            print(f"正在生成第 {i+1}/{len(prompts)} 张图像...")
-
-            result = self.generate_image(
-                prompt=prompt,
-                size=size,
-                quality=quality,
-                model=model
-            )
-
-            results.append(result)
-
-            # 避免请求过于频繁
-            if i < len(prompts) - 1:
-                time.sleep(delay)
-
+        if not prompts:
+            return []
+
+        if rate_limit is None:
+            rate_limit = 60.0 / delay if delay else DOUBAO_RATE_LIMIT_RPM
+        concurrency = max(1, min(concurrency or DOUBAO_MAX_CONCURRENCY, len(prompts)))
+        max_retries = DOUBAO_MAX_RETRIES if max_retries is None else max_retries
+
+        bucket = TokenBucket(rate_limit / 60.0, capacity=concurrency)
+        window = AdaptiveConcurrency(concurrency)
+        # 重试由这里统一调度，关闭客户端自带的重试，避免 429 时重复请求
+        client = self.client.with_options(max_retries=0)
+
+        total = len(prompts)
+        results: List[Optional[Dict]] = [None] * total
+        progress = {"done": 0, "failed": 0}
+        progress_lock = threading.Lock()
+        start = time.monotonic()
+
+        def finish(index: int, result: Dict):
+            results[index] = result
+            status = f"失败: {result['error']}" if result.get("error") else "完成"
+            with progress_lock:
+                progress["done"] += 1
+                if result.get("error"):
+                    progress["failed"] += 1
+                elapsed = time.monotonic() - start
+                print(f"[{progress['done']}/{total}] 第 {index + 1} 张{status}"
+                      f"（第 {result['attempts']} 次尝试，已用 {elapsed:.1f}s）")
+            if on_result is not None:
+                on_result(index, result)
+
+        def download(index: int, result: Dict):
+            output_path = Path(output_dir) / filename_template.format(index=index + 1)
+            if self.download_image(result["url"], str(output_path)):
+                result["path"] = str(output_path)
+            else:
+                result["download_error"] = True
+            finish(index, result)
+
+        download_pool = ThreadPoolExecutor(max_workers=4) if output_dir else None
+
+        def generate(index: int, prompt: str):
+            attempt = 0
+            while True:
+                attempt += 1
+                window.acquire()
+                bucket.acquire()
+                error = None
+                try:
+                    result = self._request_image(client, prompt, size, quality, 1, model)
+                except Exception as e:
+                    error = e
+                finally:
+                    window.release(throttled=error is not None and _is_retryable(error))
+
+                if error is None:
+                    result["attempts"] = attempt
+                    if download_pool is not None:
+                        download_pool.submit(download, index, result)
+                    else:
+                        finish(index, result)
+                    return
+
+                if attempt > max_retries or not _is_retryable(error):
+                    finish(index, {"error": str(error), "url": None, "attempts": attempt})
+                    return
+
+                # 指数退避（带随机抖动）；服务端给出 Retry-After 时所有请求一起暂停
+                backoff = min(60.0, 2 ** (attempt - 1)) * (0.5 + random.random())
+                retry_after = _retry_after(error)
+                if retry_after:
+                    bucket.pause(retry_after)
+                    backoff = max(backoff, retry_after)
+                time.sleep(backoff)
+
+        print(f"批量生成 {total} 张图像（并发上限 {concurrency}，限速 {rate_limit:.0f} 次/分钟）")
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                for future in [pool.submit(generate, i, prompt) for i, prompt in enumerate(prompts)]:
+                    future.result()
+        finally:
+            if download_pool is not None:
+                download_pool.shutdown(wait=True)
+
+        elapsed = time.monotonic() - start
+        print(f"批量生成完成: 成功 {total - progress['failed']} 张，失败 {progress['failed']} 张，用时 {elapsed:.1f}s")
         return results
 
     def download_image(self, url: str, output_path: str) -> bool:
@@ -64,7 +64,11 @@ def handler(args: Dict[str, Any]) -> Dict[str, Any]:
             size=args.get("size", "1024x1024"),
             quality=args.get("quality", "standard"),
             model=args.get("model", "doubao-seedream-4-5-251128"),
-            delay=args.get("delay", 1.0)
+            delay=args.get("delay"),
+            concurrency=args.get("concurrency"),
+            rate_limit=args.get("rate_limit"),
+            max_retries=args.get("max_retries"),
+            output_dir=args.get("output_dir")
         )
         return {"results": results}
 
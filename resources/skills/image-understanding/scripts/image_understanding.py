@@ -11,8 +11,19 @@ import argparse
 import base64
 import io
 import httpx
+from pathlib import Path
 from openai import OpenAI
 
+# 大模型响应缓存（与 copy-assistant 共用）
+llm_cache_scripts = Path(__file__).parent.parent.parent / "copy-assistant" / "scripts"
+sys.path.insert(0, str(llm_cache_scripts))
+try:
+    from llm_cache import cache_key, get_cache
+except ImportError:
+    cache_key = get_cache = None
+
+VISION_MODEL = "doubao-seed-1-6-251015"
+
 # ✅ Windows UTF-8 兼容性修复（解决中文乱码问题）
 # 参考：https://discuss.python.org/t/pep-597-enable-utf-8-mode-by-default-on-windows/3122
 if sys.platform == 'win32':
@@ -48,35 +59,59 @@ def get_client():
         max_retries=2  # ✅ 网络不稳定时重试 2 次
     )
 
-def describe_image(image_data: str, language: str = "zh-CN") -> dict:
-    """描述图片内容"""
+def _ask_vision(image_data: str, prompt: str, use_cache: bool = True) -> dict:
+    """
+    向视觉模型提问
+
+    相同的 (图片内容, 提示词, 参数) 直接返回本地缓存结果，不消耗 token。
+
+    Args:
+        image_data: 图片 data URL
+        prompt: 提示词
+        use_cache: 是否读写响应缓存
+
+    Returns:
+        {"success": bool, "result"/"error": ...}，命中缓存时带 "cached": True
+    """
+    messages = [{
+        "role": "user",
+        "content": [
+            {"type": "image_url", "image_url": {"url": image_data}},
+            {"type": "text", "text": prompt}
+        ]
+    }]
+    params = {"max_tokens": 2000}
+
+    cache = get_cache() if use_cache and get_cache else None
+    if cache is not None:
+        key = cache_key(VISION_MODEL, messages, params)
+        cached = cache.get(key)
+        if cached is not None:
+            return {"success": True, "result": cached, "cached": True}
+
     client = get_client()
 
+    try:
+        response = client.chat.completions.create(model=VISION_MODEL, messages=messages, **params)
+        content = response.choices[0].message.content
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+    if cache is not None:
+        cache.set(key, content)
+    return {"success": True, "result": content}
+
+def describe_image(image_data: str, language: str = "zh-CN", use_cache: bool = True) -> dict:
+    """描述图片内容"""
     prompt_map = {
         "zh-CN": "请详细描述这张图片的内容，包括主要物体、场景、活动和氛围。",
         "en-US": "Please describe this image in detail, including main objects, scene, activities and atmosphere."
     }
 
-    try:
-        response = client.chat.completions.create(
-            model="doubao-seed-1-6-251015",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image_url", "image_url": {"url": image_data}},
-                    {"type": "text", "text": prompt_map.get(language, prompt_map["zh-CN"])}
-                ]
-            }],
-            max_tokens=2000
-        )
-        return {"success": True, "result": response.choices[0].message.content}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return _ask_vision(image_data, prompt_map.get(language, prompt_map["zh-CN"]), use_cache)
 
-def analyze_image(image_data: str, aspect: str = "all") -> dict:
+def analyze_image(image_data: str, aspect: str = "all", use_cache: bool = True) -> dict:
     """分析图片"""
-    client = get_client()
-
     prompt_map = {
         "composition": "请分析这张图片的构图方法，包括元素布局、视觉引导、平衡关系。",
         "colors": "请分析这张图片的色彩运用，包括主色调、色彩搭配、色彩心理学效果。",
@@ -85,67 +120,21 @@ def analyze_image(image_data: str, aspect: str = "all") -> dict:
         "all": "请从构图、色彩、风格、元素等多个维度全面分析这张图片。"
     }
 
-    try:
-        response = client.chat.completions.create(
-            model="doubao-seed-1-6-251015",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image_url", "image_url": {"url": image_data}},
-                    {"type": "text", "text": prompt_map.get(aspect, prompt_map["all"])}
-                ]
-            }],
-            max_tokens=2000
-        )
-        return {"success": True, "result": response.choices[0].message.content}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return _ask_vision(image_data, prompt_map.get(aspect, prompt_map["all"]), use_cache)
 
-def extract_text(image_data: str, language: str = "auto") -> dict:
+def extract_text(image_data: str, language: str = "auto", use_cache: bool = True) -> dict:
     """提取图片文字（OCR）"""
-    client = get_client()
-
     lang_map = {
         "zh-CN": "提取图片中的所有中文文字内容，保持原有格式和结构。",
         "en-US": "Extract all English text content from the image, maintaining original format and structure.",
         "auto": "提取图片中的所有文字内容（中文、英文、数字等），保持原有格式和结构。"
     }
 
-    try:
-        response = client.chat.completions.create(
-            model="doubao-seed-1-6-251015",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image_url", "image_url": {"url": image_data}},
-                    {"type": "text", "text": lang_map.get(language, lang_map["auto"])}
-                ]
-            }],
-            max_tokens=2000
-        )
-        return {"success": True, "result": response.choices[0].message.content}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return _ask_vision(image_data, lang_map.get(language, lang_map["auto"]), use_cache)
 
-def answer_question(image_data: str, question: str) -> dict:
+def answer_question(image_data: str, question: str, use_cache: bool = True) -> dict:
     """根据图片回答问题"""
-    client = get_client()
-
-    try:
-        response = client.chat.completions.create(
-            model="doubao-seed-1-6-251015",
-            messages=[{
-                "role": "user",
-                "content": [
-                    {"type": "image_url", "image_url": {"url": image_data}},
-                    {"type": "text", "text": question}
-                ]
-            }],
-            max_tokens=2000
-        )
-        return {"success": True, "result": response.choices[0].message.content}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return _ask_vision(image_data, question, use_cache)
 
 def main():
     parser = argparse.ArgumentParser(description='豆包视觉图像理解工具')
@@ -172,6 +161,9 @@ def main():
     question_parser.add_argument('image', help='图片 base64 或文件路径')
     question_parser.add_argument('question', help='问题')
 
+    for sub in (describe_parser, analyze_parser, ocr_parser, question_parser):
+        sub.add_argument('--no-cache', action='store_true', help='跳过本地响应缓存，重新请求模型')
+
     args = parser.parse_args()
 
     # ✅ 添加诊断日志
@@ -216,14 +208,15 @@ def main():
 
     # 执行对应命令
     result = None
+    use_cache = not args.no_cache
     if args.command == 'describe':
-        result = describe_image(image_data, args.language)
+        result = describe_image(image_data, args.language, use_cache)
     elif args.command == 'analyze':
-        result = analyze_image(image_data, args.aspect)
+        result = analyze_image(image_data, args.aspect, use_cache)
     elif args.command == 'ocr':
-        result = extract_text(image_data, args.language)
+        result = extract_text(image_data, args.language, use_cache)
     elif args.command == 'question':
-        result = answer_question(image_data, args.question)
+        result = answer_question(image_data, args.question, use_cache)
 
     # 输出结果
     print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -1,13 +1,17 @@
 """
 背景生成器
-支持AI生成背景、纯色背景、渐变背景
+支持AI生成背景、纯色背景、渐变背景（线性/对角/径向，支持多色标）
 """
 
 from PIL import Image, ImageDraw
+import numpy as np
 import re
 from typing import Dict, Tuple, Optional
 from pathlib import Path
 
+# 径向渐变的颜色级数（按调色板映射，最多256级）
+RADIAL_LEVELS = 256
+
 
 class BackgroundGenerator:
     """背景生成器"""
@@ -152,48 +156,142 @@ class BackgroundGenerator:
             PIL Image对象
         """
         gradient_config = config.get('gradient', {})
-        from_color = gradient_config.get('from', '#667eea')
-        to_color = gradient_config.get('to', '#764ba2')
-        direction = gradient_config.get('direction', 'horizontal')
+        defaults = {'from': '#667eea', 'to': '#764ba2', 'direction': 'horizontal'}
+
+        return self._render_gradient({**defaults, **gradient_config}, size, channels=3)
 
-        from_rgb = self._parse_color(from_color)
-        to_rgb = self._parse_color(to_color)
+    # ===== 向量化渐变（2026-10-19新增） =====
+    # 先用 NumPy 算出色表（起色 + 比例 × 色差，比例向量与色差做外积），
+    # 再一次性生成整张图，代替逐行/逐列 ImageDraw.line：
+    # - 水平/垂直：1 像素宽的色带，NEAREST 拉伸到目标尺寸
+    # - 对角：x + y 相同的像素同色，第 y 行是色表的 [y, y + width) 区间
+    # - 径向：距离映射到 256 级调色板，由 Pillow 展开成 RGB/RGBA
+
+    def _render_gradient(
+        self,
+        gradient_config: Dict,
+        size: Tuple[int, int],
+        channels: int
+    ) -> Image.Image:
+        """
+        生成渐变图
 
-        image = Image.new('RGB', size)
-        draw = ImageDraw.Draw(image)
+        Args:
+            gradient_config: 渐变配置
+                - from/to: 起止颜色
+                - stops: 多色标（可选，优先于 from/to），
+                  颜色字符串列表（均匀分布）或 {color, position} 列表（position 为 0-1 或百分比）
+                - direction: horizontal/vertical/diagonal/radial
+                - center: 径向渐变中心 [x, y]（像素或百分比，默认画面中心）
+                - radius: 径向渐变半径（像素，或相对中心到最远角距离的百分比，默认100%）
+            size: 尺寸 (width, height)
+            channels: 3（RGB）或 4（RGBA）
 
+        Returns:
+            PIL Image对象（RGB 或 RGBA）
+        """
         width, height = size
+        positions, colors = self._parse_stops(gradient_config, channels)
+        direction = gradient_config.get('direction', 'horizontal')
 
         if direction == 'horizontal':
-            # 水平渐变
-            for x in range(width):
-                ratio = x / width
-                r = int(from_rgb[0] + (to_rgb[0] - from_rgb[0]) * ratio)
-                g = int(from_rgb[1] + (to_rgb[1] - from_rgb[1]) * ratio)
-                b = int(from_rgb[2] + (to_rgb[2] - from_rgb[2]) * ratio)
-                draw.line([(x, 0), (x, height)], fill=(r, g, b))
-
-        elif direction == 'vertical':
-            # 垂直渐变
-            for y in range(height):
-                ratio = y / height
-                r = int(from_rgb[0] + (to_rgb[0] - from_rgb[0]) * ratio)
-                g = int(from_rgb[1] + (to_rgb[1] - from_rgb[1]) * ratio)
-                b = int(from_rgb[2] + (to_rgb[2] - from_rgb[2]) * ratio)
-                draw.line([(0, y), (width, y)], fill=(r, g, b))
-
-        elif direction == 'diagonal':
-            # 对角渐变
-            for i in range(max(width, height)):
-                ratio = i / max(width, height)
-                r = int(from_rgb[0] + (to_rgb[0] - from_rgb[0]) * ratio)
-                g = int(from_rgb[1] + (to_rgb[1] - from_rgb[1]) * ratio)
-                b = int(from_rgb[2] + (to_rgb[2] - from_rgb[2]) * ratio)
-                # 绘制对角线
-                draw.line([(i, 0), (0, i)], fill=(r, g, b))
-                draw.line([(width - i, height), (width, height - i)], fill=(r, g, b))
+            strip = self._interpolate(np.arange(width) / width, positions, colors)
+            return Image.fromarray(strip[np.newaxis]).resize(size, Image.NEAREST)
 
-        return image
+        if direction == 'vertical':
+            strip = self._interpolate(np.arange(height) / height, positions, colors)
+            return Image.fromarray(strip[:, np.newaxis]).resize(size, Image.NEAREST)
+
+        if direction == 'diagonal':
+            steps = max(width + height - 2, 1)
+            lut = self._interpolate(np.arange(width + height - 1) / steps, positions, colors)
+            rows = np.lib.stride_tricks.sliding_window_view(lut, width, axis=0).transpose(0, 2, 1)
+            return Image.fromarray(np.ascontiguousarray(rows))
+
+        if direction == 'radial':
+            center = gradient_config.get('center', ['50%', '50%'])
+            cx = self._parse_size(center[0], width)
+            cy = self._parse_size(center[1], height)
+            farthest = max(np.hypot(cx - x, cy - y) for x in (0, width) for y in (0, height))
+            radius = max(self._parse_size(gradient_config.get('radius', '100%'), farthest), 1)
+
+            # 距离换算成调色板下标（就地计算，避免多余的整图临时数组）
+            scale = (RADIAL_LEVELS - 1) / radius
+            dx = ((np.arange(width, dtype=np.float32) - cx) * scale) ** 2
+            dy = ((np.arange(height, dtype=np.float32) - cy) * scale) ** 2
+            distance = np.add(dx[np.newaxis], dy[:, np.newaxis])
+            np.sqrt(distance, out=distance)
+            distance += 0.5
+            np.minimum(distance, RADIAL_LEVELS - 1, out=distance)
+
+            palette = self._interpolate(np.arange(RADIAL_LEVELS) / (RADIAL_LEVELS - 1), positions, colors)
+            image = Image.fromarray(distance.astype(np.uint8))
+            image.putpalette(palette.tobytes(), 'RGBA' if channels == 4 else 'RGB')
+            return image.convert('RGBA' if channels == 4 else 'RGB')
+
+        raise ValueError(f"不支持的渐变方向: {direction}")
+
+    def _parse_stops(
+        self,
+        gradient_config: Dict,
+        channels: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        解析色标
+
+        Returns:
+            (位置数组 0-1 升序, 颜色数组 N×channels)
+        """
+        stops = gradient_config.get('stops')
+        if not stops:
+            stops = [gradient_config['from'], gradient_config['to']]
+        if len(stops) < 2:
+            raise ValueError("渐变至少需要两个颜色")
+
+        entries = []
+        for index, stop in enumerate(stops):
+            if isinstance(stop, dict):
+                color = stop.get('color', '#000000')
+                position = stop.get('position')
+            else:
+                color, position = stop, None
+
+            if position is None:
+                position = index / (len(stops) - 1)
+            elif isinstance(position, str) and position.endswith('%'):
+                position = float(position.rstrip('%')) / 100
+            entries.append((min(max(float(position), 0.0), 1.0), self._parse_color(color)[:channels]))
+
+        entries.sort(key=lambda entry: entry[0])
+        positions = np.array([position for position, _ in entries], dtype=np.float64)
+        colors = np.array([color for _, color in entries], dtype=np.float64)
+        return positions, colors
+
+    def _interpolate(
+        self,
+        ratio: np.ndarray,
+        positions: np.ndarray,
+        colors: np.ndarray
+    ) -> np.ndarray:
+        """
+        按比例在色标间线性插值（起色 + 比例 × 色差，结果向下取整）
+
+        Args:
+            ratio: 一维比例数组（0-1）
+            positions: 色标位置
+            colors: 色标颜色
+
+        Returns:
+            (len(ratio), channels) 的 uint8 数组
+        """
+        segment = np.clip(np.searchsorted(positions, ratio, side='right') - 1, 0, len(positions) - 2)
+        start, end = positions[segment], positions[segment + 1]
+        span = np.where(end > start, end - start, 1.0)
+        local = np.clip((ratio - start) / span, 0.0, 1.0)
+
+        start_color = colors[segment]
+        values = start_color + (colors[segment + 1] - start_color) * local[:, np.newaxis]
+        return values.astype(np.uint8)
 
     def _generate_fallback_background(
         self,
@@ -297,42 +395,10 @@ class BackgroundGenerator:
             叠加后的图片
         """
         gradient_config = overlay_config.get('gradient', {})
-        from_color = gradient_config.get('from', 'rgba(0,0,0,0.7)')
-        to_color = gradient_config.get('to', 'rgba(0,0,0,0.3)')
-        direction = gradient_config.get('direction', 'vertical')
-
-        from_rgba = self._parse_color(from_color)
-        to_rgba = self._parse_color(to_color)
-
-        width, height = image.size
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-
-        if direction == 'vertical':
-            # 垂直渐变叠加
-            for y in range(height):
-                ratio = y / height
-                r = int(from_rgba[0] + (to_rgba[0] - from_rgba[0]) * ratio)
-                g = int(from_rgba[1] + (to_rgba[1] - from_rgba[1]) * ratio)
-                b = int(from_rgba[2] + (to_rgba[2] - from_rgba[2]) * ratio)
-                a = int(from_rgba[3] + (to_rgba[3] - from_rgba[3]) * ratio)
-                draw.line([(0, y), (width, y)], fill=(r, g, b, a))
-
-        elif direction == 'horizontal':
-            # 水平渐变叠加
-            for x in range(width):
-                ratio = x / width
-                r = int(from_rgba[0] + (to_rgba[0] - from_rgba[0]) * ratio)
-                g = int(from_rgba[1] + (to_rgba[1] - from_rgba[1]) * ratio)
-                b = int(from_rgba[2] + (to_rgba[2] - from_rgba[2]) * ratio)
-                a = int(from_rgba[3] + (to_rgba[3] - from_rgba[3]) * ratio)
-                draw.line([(x, 0), (x, height)], fill=(r, g, b, a))
-
-        # 合并叠加层
-        image_rgba = image.convert('RGBA')
-        combined = Image.alpha_composite(image_rgba, overlay)
+        defaults = {'from': 'rgba(0,0,0,0.7)', 'to': 'rgba(0,0,0,0.3)', 'direction': 'vertical'}
 
-        return combined.convert(image.mode)
+        overlay = self._render_gradient({**defaults, **gradient_config}, image.size, channels=4)
+        return self._composite_overlay(image, overlay)
 
     def _apply_solid_overlay(
         self,
@@ -377,10 +443,30 @@ class BackgroundGenerator:
                 fill=rgba
             )
 
-        # 合并叠加层
-        image_rgba = image.convert('RGBA')
-        combined = Image.alpha_composite(image_rgba, overlay)
+        return self._composite_overlay(image, overlay)
+
+    def _composite_overlay(
+        self,
+        image: Image.Image,
+        overlay: Image.Image
+    ) -> Image.Image:
+        """
+        合并叠加层
+
+        RGB 原图直接以叠加层的 alpha 为蒙版混合（结果与 alpha_composite 相同），
+        省去原图转 RGBA 再转回的两次整图拷贝。
+
+        Args:
+            image: 原始图片
+            overlay: RGBA 叠加层
+
+        Returns:
+            叠加后的图片
+        """
+        if image.mode == 'RGB':
+            return Image.composite(overlay.convert('RGB'), image, overlay.getchannel('A'))
 
+        combined = Image.alpha_composite(image.convert('RGBA'), overlay)
         return combined.convert(image.mode)
 
     def _parse_color(self, color_str: str) -> Tuple[int, int, int, int]:
@@ -4,14 +4,17 @@
 """
 
 import argparse
+import hashlib
 import json
 import os
 import re
 import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 from PIL import Image, ImageDraw, ImageFont
@@ -30,6 +33,8 @@ sys.path.insert(0, str(template_scripts))
 from template_engine import TemplateEngine
 from text_renderer import TextRenderer
 from background_generator import BackgroundGenerator
+from render_cache import RenderCache, make_key, renderer_version
+from smart_crop import calculate_saliency_crop, compute_saliency_map
 
 
 def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
@@ -94,12 +99,17 @@ CROP_PRESETS = {
     "article-1-1": (1024, 1024),
 }
 
+# 模板缩放一致性检查允许的元素边界偏差（按 900x383 输出的像素计；字号取整和逐字宽度累计误差约 1~10 像素，
+# 未缩放的像素值会偏差数十像素）
+SCALING_CHECK_TOLERANCE = int(os.getenv("SCALING_CHECK_TOLERANCE", "12"))
+
 
 class CropMode:
     CENTER = "center"
     GOLDEN_RATIO = "golden_ratio"
     SMART = "smart"
     TOP_HEAVY = "top_heavy"
+    SALIENCY = "saliency"
 
 
 def calculate_center_crop(original_width, original_height, target_width, target_height):
@@ -185,31 +195,78 @@ def calculate_smart_crop(original_width, original_height, target_width, target_h
     return left, top, right, bottom
 
 
+def calculate_top_heavy_crop(original_width, original_height, target_width, target_height):
+    """顶部对齐裁剪（保留画面上方的标题/人物头部）"""
+    aspect_ratio = target_width / target_height
+
+    if original_width / original_height > aspect_ratio:
+        crop_height = original_height
+        crop_width = int(crop_height * aspect_ratio)
+        x_offset = (original_width - crop_width) // 2
+    else:
+        crop_width = original_width
+        x_offset = 0
+
+    right = min(x_offset + crop_width, original_width)
+    left = max(0, right - target_width)
+    bottom = min(target_height, original_height)
+
+    return left, 0, right, bottom
+
+
+CROP_CALCULATORS = {
+    CropMode.CENTER: calculate_center_crop,
+    CropMode.GOLDEN_RATIO: calculate_golden_ratio_crop,
+    CropMode.SMART: calculate_smart_crop,
+    CropMode.TOP_HEAVY: calculate_top_heavy_crop,
+}
+
+# crop_mode="all" 时生成的裁剪方案
+ALL_CROP_MODES = [
+    CropMode.CENTER, CropMode.GOLDEN_RATIO, CropMode.SMART, CropMode.TOP_HEAVY, CropMode.SALIENCY,
+]
+
+
+def calculate_crop_box(original_width, original_height, target_width, target_height, mode="smart",
+                       image=None, saliency=None):
+    """
+    计算裁剪区域
+
+    Args:
+        image: 原图（saliency 模式需要，按画面内容定位）
+        saliency: 已算好的能量图（同一张图裁多个尺寸时复用，见 smart_crop.compute_saliency_map）
+
+    Returns:
+        (box, resize): box 为裁剪区域；resize 为 True 时表示比例已接近（差异<5%），
+        整图直接缩放到目标尺寸，box 为整图
+    """
+    ratio_diff = abs(original_width / original_height - target_width / target_height) / (target_width / target_height)
+    if ratio_diff < 0.05:
+        return (0, 0, original_width, original_height), True
+
+    if mode == CropMode.SALIENCY and image is not None:
+        return calculate_saliency_crop(image, target_width, target_height, saliency), False
+
+    calculator = CROP_CALCULATORS.get(mode, calculate_smart_crop)
+    return calculator(original_width, original_height, target_width, target_height), False
+
+
 def crop_image(image, target_width, target_height, mode="smart"):
     original_width, original_height = image.size
     original_ratio = original_width / original_height
     target_ratio = target_width / target_height
+    ratio_diff = abs(original_ratio - target_ratio) / target_ratio
+
+    box, resize = calculate_crop_box(original_width, original_height, target_width, target_height, mode, image=image)
 
     # 如果原始比例与目标比例接近（差异<5%），直接缩放不裁剪
-    ratio_diff = abs(original_ratio - target_ratio) / target_ratio
-    if ratio_diff < 0.05:
+    if resize:
         print(f"  比例匹配（差异{ratio_diff*100:.1f}%），直接缩放不裁剪")
         return image.resize((target_width, target_height), Image.Resampling.LANCZOS)
 
     # 否则按模式裁剪
-    calculators = {
-        "center": calculate_center_crop,
-        "golden_ratio": calculate_golden_ratio_crop,
-        "smart": calculate_smart_crop,
-    }
-
-    calculator = calculators.get(mode, calculate_smart_crop)
-    left, top, right, bottom = calculator(
-        original_width, original_height, target_width, target_height
-    )
-
     print(f"  比例不匹配（差异{ratio_diff*100:.1f}%），执行{mode}模式裁剪")
-    return image.crop((left, top, right, bottom))
+    return image.crop(box)
 
 
 def crop_to_preset(image_path, preset, output_path=None, mode="smart"):
@@ -230,35 +287,53 @@ def crop_to_preset(image_path, preset, output_path=None, mode="smart"):
 
 def generate_crop_variants(image_path, preset="wechat-cover", modes=None):
     if modes is None:
-        modes = ["center", "golden_ratio", "smart"]
+        modes = ["center", "golden_ratio", "smart", "saliency"]
 
     if preset not in CROP_PRESETS:
         raise ValueError(f"Unknown preset: {preset}")
 
-    target_width, target_height = CROP_PRESETS[preset]
-    results = {}
+    specs = [
+        (mode, preset, mode, Path(image_path).with_name(f"{Path(image_path).stem}_{preset}_{mode}.jpg"))
+        for mode in modes
+    ]
+    rendered = render_crop_variants(image_path, specs)
+    if rendered["errors"]:
+        raise RuntimeError(f"裁剪失败: {rendered['errors']}")
+    return rendered["variants"]
 
-    with Image.open(image_path) as img:
-        for mode in modes:
-            cropped = crop_image(img, target_width, target_height, mode)
 
-            output_path = str(
-                Path(image_path).with_name(f"{Path(image_path).stem}_{preset}_{mode}.jpg")
-            )
-            cropped.save(output_path, "JPEG", quality=95)
-            results[mode] = output_path
+def create_preview_grid(cover_image_path, variants, output_path=None):
+    images = {}
+    for name, path in variants.items():
+        with Image.open(path) as img:
+            img.load()
+            images[name] = img
 
-    return results
+    if output_path is None:
+        output_path = str(
+            Path(cover_image_path).with_name(f"{Path(cover_image_path).stem}_preview.jpg")
+        )
 
+    build_preview_grid(images).save(output_path, "JPEG", quality=90)
+    return output_path
 
-def create_preview_grid(cover_image_path, variants, output_path=None):
+
+def build_preview_grid(variant_images: Dict[str, Image.Image]) -> Image.Image:
+    """
+    把各裁剪方案拼成一张预览图（直接使用内存中的图片）
+
+    Args:
+        variant_images: {方案名: 图片}
+
+    Returns:
+        预览图
+    """
     base_size = (400, 400)
 
-    images = []
-    for name, path in variants.items():
-        with Image.open(path) as img:
-            img = img.resize(base_size, Image.Resampling.LANCZOS)
-            images.append((name, img))
+    images = [
+        (name, img.resize(base_size, Image.Resampling.LANCZOS))
+        for name, img in variant_images.items()
+    ]
 
     cols = len(images) if images else 1
     cell_width = 400
@@ -299,13 +374,89 @@ def create_preview_grid(cover_image_path, variants, output_path=None):
         label_x = x + (cell_width - (bbox[2] - bbox[0])) // 2
         draw.text((label_x, label_y), name, fill="#666666", font=label_font)
 
-    if output_path is None:
-        output_path = str(
-            Path(cover_image_path).with_name(f"{Path(cover_image_path).stem}_preview.jpg")
-        )
+    return grid
 
-    grid.save(output_path, "JPEG", quality=90)
-    return output_path
+
+def render_crop_variants(image_path, specs, preview_path=None, preview_names=None, max_workers=4):
+    """
+    一次解码，生成多个裁剪方案
+
+    原图只解码一次；各方案的裁剪区域先算好，区域和尺寸相同的方案共用同一张结果
+    （比例接近时各模式都是整图缩放）；预览图直接用内存中的裁剪结果拼接；
+    JPEG 编码在线程池中并行（PIL 编码时释放 GIL）。
+
+    Args:
+        image_path: 原图路径
+        specs: [(方案名, 预设名, 裁剪模式, 输出路径)]
+        preview_path: 预览图输出路径（可选）
+        preview_names: 放进预览图的方案名（默认全部）
+        max_workers: 编码线程数
+
+    Returns:
+        {"variants": {方案名: 输出路径}, "preview": 预览图路径或 None, "errors": {方案名: 错误信息}}
+    """
+    with Image.open(image_path) as img:
+        image = img.convert("RGB")
+
+    original_width, original_height = image.size
+    saliency = None
+    crops: Dict[Tuple, Image.Image] = {}
+    outputs = {}
+    errors = {}
+
+    for name, preset, mode, output_path in specs:
+        try:
+            if preset not in CROP_PRESETS:
+                raise ValueError(f"Unknown preset: {preset}. Available: {list(CROP_PRESETS.keys())}")
+            target_width, target_height = CROP_PRESETS[preset]
+            if mode == CropMode.SALIENCY and saliency is None:
+                saliency = compute_saliency_map(image)
+            box, resize = calculate_crop_box(
+                original_width, original_height, target_width, target_height, mode,
+                image=image, saliency=saliency,
+            )
+
+            key = (box, (target_width, target_height) if resize else None)
+            if key not in crops:
+                if resize:
+                    crops[key] = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+                else:
+                    crops[key] = image.crop(box)
+            outputs[name] = (crops[key], str(output_path))
+        except Exception as e:
+            errors[name] = str(e)
+
+    result = {"variants": {}, "preview": None, "errors": errors}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(cropped.save, output_path, "JPEG", quality=95)
+            for name, (cropped, output_path) in outputs.items()
+        }
+
+        preview_future = None
+        if preview_path:
+            names = preview_names if preview_names is not None else list(outputs)
+            preview_images = {name: outputs[name][0] for name in names if name in outputs}
+            if preview_images:
+                grid = build_preview_grid(preview_images)
+                preview_future = executor.submit(grid.save, str(preview_path), "JPEG", quality=90)
+
+        for name, future in futures.items():
+            try:
+                future.result()
+                result["variants"][name] = outputs[name][1]
+            except Exception as e:
+                errors[name] = str(e)
+
+        if preview_future is not None:
+            try:
+                preview_future.result()
+                result["preview"] = str(preview_path)
+            except Exception as e:
+                errors["preview"] = str(e)
+
+    return result
 
 
 def sanitize_filename(title: str, max_length: int = 100) -> str:
@@ -336,6 +487,35 @@ def sanitize_filename(title: str, max_length: int = 100) -> str:
     return clean
 
 
+def create_output_dir(prefix: str, root: str = "output") -> Tuple[str, Path]:
+    """
+    创建不重名的输出目录 <root>/<prefix>_<时间戳>
+
+    同一秒内多次生成（或多个进程同时生成）时依次追加 _2、_3 …，
+    目录创建是原子操作，不会两次生成写进同一个目录。
+
+    Args:
+        prefix: 目录名前缀（如 cover、batch）
+        root: 输出根目录
+
+    Returns:
+        (时间戳标签, 目录路径)，目录为 <root>/<prefix>_<时间戳标签>
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    Path(root).mkdir(parents=True, exist_ok=True)
+
+    label = timestamp
+    counter = 1
+    while True:
+        path = Path(root) / f"{prefix}_{label}"
+        try:
+            path.mkdir()
+            return label, path
+        except FileExistsError:
+            counter += 1
+            label = f"{timestamp}_{counter}"
+
+
 def find_project_path(search_path: str = ".") -> Optional[str]:
     """
     查找公众号项目目录（包含assets/images文件夹的目录）
@@ -388,6 +568,36 @@ class CoverGenerator:
             "Content-Type": "application/json",
         }
 
+        # 模板引擎/文字渲染器/背景生成器在多次生成间复用（模板计划、字体和字形宽度缓存随之复用）
+        self._template_engine: Optional[TemplateEngine] = None
+        self._text_renderer: Optional[TextRenderer] = None
+        self._background_generator: Optional[BackgroundGenerator] = None
+        self._render_cache: Optional[RenderCache] = None
+
+    @property
+    def template_engine(self) -> TemplateEngine:
+        if self._template_engine is None:
+            self._template_engine = TemplateEngine()
+        return self._template_engine
+
+    @property
+    def text_renderer(self) -> TextRenderer:
+        if self._text_renderer is None:
+            self._text_renderer = TextRenderer()
+        return self._text_renderer
+
+    @property
+    def background_generator(self) -> BackgroundGenerator:
+        if self._background_generator is None:
+            self._background_generator = BackgroundGenerator(image_generator=self)
+        return self._background_generator
+
+    @property
+    def render_cache(self) -> RenderCache:
+        if self._render_cache is None:
+            self._render_cache = RenderCache("output")
+        return self._render_cache
+
     def generate_image(self, prompt: str, size: str = "1792x1024", quality: str = "hd") -> str:
         endpoint = f"{self.base_url}/images/generations"
         payload = {
@@ -485,15 +695,13 @@ class CoverGenerator:
         self,
         prompt: str,
         style: str = "auto",
-        crop_mode: str = "smart",
+        crop_mode: str = "saliency",
         generate_share_card: bool = True,
         generate_variants: bool = True,
         project_path: Optional[str] = None,
         title: Optional[str] = None,
     ) -> Dict[str, Any]:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_dir = Path(f"output/cover_{timestamp}")
-        base_dir.mkdir(parents=True, exist_ok=True)
+        timestamp, base_dir = create_output_dir("cover")
 
         result = {
             "timestamp": timestamp,
@@ -518,60 +726,50 @@ class CoverGenerator:
 
         print(f"底图已保存: {raw_path}")
 
-        crop_modes = [crop_mode] if crop_mode != "all" else ["center", "golden_ratio", "smart"]
+        crop_modes = [crop_mode] if crop_mode != "all" else ALL_CROP_MODES
 
         preset = "wechat-cover"
         result["variants"][preset] = {}
 
-        for mode in crop_modes:
-            mode_name = mode
-            output_name = f"cover_{preset}_{mode_name}.jpg"
-            output_path = base_dir / output_name
-
-            try:
-                cropped_path = crop_to_preset(
-                    str(raw_path),
-                    preset,
-                    str(output_path),
-                    mode=mode,
-                )
-                result["variants"][preset][mode_name] = cropped_path
-                print(f"已生成 {preset} ({mode_name}): {cropped_path}")
-            except Exception as e:
-                print(f"生成 {preset} ({mode_name}) 失败: {e}")
-
+        # 原图只解码一次，所有裁剪方案、分享卡片和预览图都从内存生成，并行编码
+        specs = [
+            (mode, preset, mode, base_dir / f"cover_{preset}_{mode}.jpg")
+            for mode in crop_modes
+        ]
+        share_preset = "wechat-share"
         if generate_share_card:
-            share_preset = "wechat-share"
-            share_output = base_dir / f"cover_{share_preset}.jpg"
+            specs.append((share_preset, share_preset, CropMode.SALIENCY, base_dir / f"cover_{share_preset}.jpg"))
 
-            try:
-                share_path = crop_to_preset(
-                    str(raw_path),
-                    share_preset,
-                    str(share_output),
-                    mode="smart",
-                )
-                result["files"]["share_card"] = share_path
-                print(f"已生成分享卡片: {share_path}")
-            except Exception as e:
-                print(f"生成分享卡片失败: {e}")
+        try:
+            rendered = render_crop_variants(
+                str(raw_path),
+                specs,
+                preview_path=base_dir / "preview_grid.jpg" if generate_variants else None,
+                preview_names=crop_modes,
+            )
+        except Exception as e:
+            print(f"生成裁剪方案失败: {e}")
+            rendered = {"variants": {}, "preview": None, "errors": {}}
 
-        if generate_variants and result["variants"]:
-            preview_path = base_dir / "preview_grid.jpg"
-            try:
-                all_variants = {}
-                for mode_dict in result["variants"].values():
-                    all_variants.update(mode_dict)
-
-                preview = create_preview_grid(
-                    str(raw_path),
-                    all_variants,
-                    str(preview_path),
-                )
-                result["files"]["preview"] = preview
-                print(f"已生成预览图: {preview}")
-            except Exception as e:
-                print(f"生成预览图失败: {e}")
+        for mode in crop_modes:
+            if mode in rendered["variants"]:
+                result["variants"][preset][mode] = rendered["variants"][mode]
+                print(f"已生成 {preset} ({mode}): {rendered['variants'][mode]}")
+            elif mode in rendered["errors"]:
+                print(f"生成 {preset} ({mode}) 失败: {rendered['errors'][mode]}")
+
+        if generate_share_card:
+            if share_preset in rendered["variants"]:
+                result["files"]["share_card"] = rendered["variants"][share_preset]
+                print(f"已生成分享卡片: {result['files']['share_card']}")
+            elif share_preset in rendered["errors"]:
+                print(f"生成分享卡片失败: {rendered['errors'][share_preset]}")
+
+        if rendered["preview"]:
+            result["files"]["preview"] = rendered["preview"]
+            print(f"已生成预览图: {rendered['preview']}")
+        elif "preview" in rendered["errors"]:
+            print(f"生成预览图失败: {rendered['errors']['preview']}")
 
         result_file = base_dir / "result.json"
         with open(result_file, "w", encoding="utf-8") as f:
@@ -602,10 +800,17 @@ class CoverGenerator:
         generate_share_card: bool = False,
         generate_variants: bool = False,
         project_path: Optional[str] = None,
+        output_scale: int = 1,
+        keep_master: bool = False,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         使用模板系统生成封面
 
+        默认直接在输出分辨率（900x383 × output_scale）上渲染：模板中的像素尺寸和字号按比例缩放，
+        不再先画 3072x1306 的大图再缩小。keep_master=True 时按模板原尺寸渲染并保存 raw_image.jpg，
+        封面由大图缩小得到（旧行为）。
+
         Args:
             title: 文章标题
             template_id: 模板ID
@@ -614,27 +819,19 @@ class CoverGenerator:
             generate_share_card: 是否生成分享卡片
             generate_variants: 是否生成多方案预览
             project_path: 公众号项目路径（用于自动复制）
+            output_scale: 输出倍率（1 为 900x383，2 为 1800x766）
+            keep_master: 是否同时保存模板原尺寸的大图
+            use_cache: 是否使用渲染缓存（模板、变量、尺寸、字体和渲染代码都相同时直接返回上次的文件，
+                       AI 背景的模板也会复用上次生成的背景；False 时强制重新生成）
 
         Returns:
-            生成结果字典
+            生成结果字典（命中缓存时 cached 为 True）
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_dir = Path(f"output/cover_{timestamp}")
-        base_dir.mkdir(parents=True, exist_ok=True)
-
-        result = {
-            "timestamp": timestamp,
-            "template_id": template_id,
-            "variant": variant,
-            "files": {},
-            "variants": {},
-        }
-
         try:
-            # 1. 初始化模板引擎
-            template_engine = TemplateEngine()
-            text_renderer = TextRenderer()
-            background_generator = BackgroundGenerator(image_generator=self)
+            # 1. 获取模板引擎（多次生成共享同一实例）
+            template_engine = self.template_engine
+            text_renderer = self.text_renderer
+            background_generator = self.background_generator
 
             # 2. 获取模板配置
             template_result = template_engine.render(
@@ -649,96 +846,81 @@ class CoverGenerator:
 
             template = template_result['template']
             variables = template_result['variables']
+            plan = template_result['plan']
 
             print(f"使用模板: {template['template']['name']} ({template_id})")
             if variant:
                 print(f"使用变体: {variant}")
 
-            # 3. 生成背景图
-            background_config = template['template']['background']
-            size_str = background_config.get('size', '3072x1306')
-            size = template_engine.parse_image_size(size_str)
-
-            print(f"正在生成背景图...")
-            print(f"背景类型: {background_config['type']}")
-            print(f"目标尺寸: {size[0]}x{size[1]}")
-
-            background_image = background_generator.generate(
-                background_config,
-                size
-            )
+            # 3. 确定渲染尺寸
+            template_size = plan.size
+            cover_width, cover_height = CROP_PRESETS["wechat-cover"]  # 微信封面标准尺寸
+            cover_size = (cover_width * output_scale, cover_height * output_scale)
+
+            # 4. 查找渲染缓存
+            cache_key = None
+            if use_cache:
+                cache_key = self._template_cache_key(plan, variant, variables, cover_size, keep_master)
+                cached = self.render_cache.get(cache_key)
+                if cached is not None:
+                    cached["cached"] = True
+                    print(f"命中渲染缓存: {cached['variants']['wechat-cover']['template']}")
+                    self._copy_template_result(cached, project_path, title)
+                    return cached
+
+            timestamp, base_dir = create_output_dir("cover")
+            result = {
+                "timestamp": timestamp,
+                "template_id": template_id,
+                "variant": variant,
+                "files": {},
+                "variants": {},
+            }
 
-            if background_image is None:
-                raise ValueError("背景生成失败")
+            cover_path = base_dir / "cover_wechat-cover_template.jpg"
 
-            # 4. 应用叠加层（如果有）
-            overlay_config = template['template'].get('overlay')
-            if overlay_config and overlay_config.get('enabled', False):
-                print(f"应用叠加层...")
-                background_image = background_generator.apply_overlay(
-                    background_image,
-                    overlay_config
+            if keep_master:
+                # 按模板原尺寸渲染大图，再缩小到封面尺寸
+                master = self._render_template(
+                    plan.at_size(template_size, variant), variables, template_engine, text_renderer, background_generator,
+                    template_size, template_size
                 )
 
-            # 5. 渲染文字元素
-            print(f"正在渲染文字...")
-            elements = template['template'].get('elements', [])
-
-            for element in elements:
-                # 检查是否是可选元素且没有内容
-                if element.get('type') == 'optional':
-                    required = element.get('required', True)
-                    if not required:
-                        content = element.get('content', '')
-                        content = template_engine.replace_variables(content, variables)
-                        if not content or (content == '{{subtitle}}' and not subtitle):
-                            # 跳过此元素
-                            continue
-
-                # 渲染元素
-                background_image = text_renderer.render_text(
-                    background_image,
-                    element,
-                    variables,
-                    template_engine
+                raw_path = base_dir / "raw_image.jpg"
+                master.convert('RGB').save(raw_path, "JPEG", quality=95)
+                result["files"]["raw"] = str(raw_path)
+                print(f"已保存: {raw_path}")
+
+                cover = master.resize(cover_size, Image.Resampling.LANCZOS)
+            else:
+                # 直接在输出分辨率上渲染（缩放后的模板按尺寸缓存）
+                cover = self._render_template(
+                    plan.at_size(cover_size, variant), variables, template_engine, text_renderer, background_generator,
+                    cover_size, template_size
                 )
 
-            # 6. 保存原始图片
-            raw_path = base_dir / "raw_image.jpg"
-            background_image.convert('RGB').save(raw_path, "JPEG", quality=95)
-            result["files"]["raw"] = str(raw_path)
-            print(f"已保存: {raw_path}")
-
-            # 7. 生成微信封面尺寸
-            # 模板系统直接生成目标尺寸，不需要裁剪
-            target_width, target_height = 900, 383  # 微信封面标准尺寸
-
-            # 调整到目标尺寸
-            cover_path = base_dir / "cover_wechat-cover_template.jpg"
-            resized = background_image.resize((target_width, target_height), Image.Resampling.LANCZOS)
-            resized.convert('RGB').save(cover_path, "JPEG", quality=95)
+            cover.convert('RGB').save(cover_path, "JPEG", quality=95)
+            result["render_size"] = f"{cover_size[0]}x{cover_size[1]}"
 
             result["variants"]["wechat-cover"] = {
                 "template": str(cover_path)
             }
             print(f"已生成微信封面: {cover_path}")
 
-            # 8. 保存结果
+            # 5. 保存结果
             result_file = base_dir / "result.json"
             with open(result_file, "w", encoding="utf-8") as f:
                 json.dump(result, f, ensure_ascii=False, indent=2)
 
-            # 9. 复制到项目（如果指定）
-            if project_path and title:
-                try:
-                    copied_files = self.copy_to_project(result, project_path, title)
-                    result["copied_to_project"] = copied_files
-                    if copied_files:
-                        print(f"\n已复制 {len(copied_files)} 个文件到项目 assets 文件夹:")
-                        for file_path in copied_files:
-                            print(f"  - {file_path}")
-                except Exception as e:
-                    print(f"\n警告：复制文件到项目失败 ({e})")
+            if cache_key is not None:
+                self.render_cache.put(
+                    cache_key,
+                    result,
+                    [cover_path, result_file] + list(result["files"].values())
+                )
+
+            # 6. 复制到项目（如果指定）
+            self._copy_template_result(result, project_path, title)
 
             return result
 
@@ -748,6 +930,306 @@ class CoverGenerator:
             traceback.print_exc()
             raise
 
+    def _copy_template_result(self, result: Dict[str, Any], project_path: Optional[str], title: str):
+        """把模板封面复制到公众号项目（如果指定了项目路径）"""
+        if not (project_path and title):
+            return
+        try:
+            copied_files = self.copy_to_project(result, project_path, title)
+            result["copied_to_project"] = copied_files
+            if copied_files:
+                print(f"\n已复制 {len(copied_files)} 个文件到项目 assets 文件夹:")
+                for file_path in copied_files:
+                    print(f"  - {file_path}")
+        except Exception as e:
+            print(f"\n警告：复制文件到项目失败 ({e})")
+
+    def _template_cache_key(
+        self,
+        plan,
+        variant: Optional[str],
+        variables: Dict[str, str],
+        cover_size: tuple,
+        keep_master: bool,
+    ) -> str:
+        """
+        模板封面的渲染缓存键
+
+        由模板（含变体）、变量、输出尺寸和模式、实际使用的字体文件摘要、渲染代码版本决定。
+
+        Args:
+            plan: 模板渲染计划
+            variant: 变体名称
+            variables: 模板变量
+            cover_size: 输出尺寸
+            keep_master: 是否保存原尺寸大图
+
+        Returns:
+            缓存键
+        """
+        template = plan.variant(variant)
+
+        fonts = set()
+        for element in template['template'].get('elements', []):
+            font_config = element.get('font')
+            if not isinstance(font_config, dict):
+                continue
+            font = self.text_renderer.load_font(
+                font_config.get('family', ['Microsoft YaHei', 'sans-serif']),
+                font_config.get('size', 40),
+                font_config.get('weight', 'normal')
+            )
+            path = getattr(font, 'path', None)
+            fonts.add(self.render_cache.file_digest(path) if isinstance(path, str) else "default")
+
+        return make_key(
+            template,
+            variables,
+            list(cover_size),
+            list(plan.size),
+            keep_master,
+            sorted(fonts),
+            renderer_version(),
+        )
+
+    def _render_template(
+        self,
+        template: Dict,
+        variables: Dict[str, str],
+        template_engine: TemplateEngine,
+        text_renderer: TextRenderer,
+        background_generator: BackgroundGenerator,
+        size: tuple,
+        generation_size: tuple,
+    ) -> Image.Image:
+        """
+        按模板渲染一张图（背景 → 叠加层 → 文字元素）
+
+        Args:
+            template: 模板数据（像素值需与 size 匹配，见 TemplatePlan.at_size）
+            variables: 模板变量
+            template_engine: 模板引擎
+            text_renderer: 文字渲染器
+            background_generator: 背景生成器
+            size: 画布尺寸
+            generation_size: AI生成背景时请求的尺寸（豆包API有最低像素要求，生成后缩放到画布尺寸）
+
+        Returns:
+            渲染后的图片
+        """
+        background_config = template['template']['background']
+
+        print(f"正在生成背景图...")
+        print(f"背景类型: {background_config['type']}")
+        print(f"目标尺寸: {size[0]}x{size[1]}")
+
+        background_image = self._render_background(template, background_generator, size, generation_size)
+
+        # 渲染文字元素（全部画在一个图层上，合成一次；没有内容的可选元素自动跳过）
+        print(f"正在渲染文字...")
+        return text_renderer.render_elements(
+            background_image,
+            template['template'].get('elements', []),
+            variables,
+            template_engine
+        )
+
+    @staticmethod
+    def _render_background(
+        template: Dict,
+        background_generator: BackgroundGenerator,
+        size: tuple,
+        generation_size: tuple,
+        base_image: Optional[Image.Image] = None,
+    ) -> Image.Image:
+        """
+        生成背景图并应用叠加层
+
+        Args:
+            template: 模板数据
+            background_generator: 背景生成器
+            size: 画布尺寸
+            generation_size: AI生成背景时请求的尺寸
+            base_image: 已生成的背景（可选，提供时不再生成，只缩放并叠加）
+
+        Returns:
+            背景图片
+        """
+        background_config = template['template']['background']
+
+        if base_image is not None:
+            background_image = base_image
+        elif background_config['type'] == 'ai_generate':
+            background_image = background_generator.generate(background_config, generation_size)
+        else:
+            background_image = background_generator.generate(background_config, size)
+
+        if background_image is None:
+            raise ValueError("背景生成失败")
+
+        if background_image.size != tuple(size):
+            background_image = background_image.convert('RGB').resize(size, Image.Resampling.LANCZOS)
+
+        # 应用叠加层（如果有）
+        overlay_config = template['template'].get('overlay')
+        if overlay_config and overlay_config.get('enabled', False):
+            background_image = background_generator.apply_overlay(
+                background_image,
+                overlay_config
+            )
+
+        return background_image
+
+    def batch_render(
+        self,
+        items: List[Any],
+        output_scale: int = 1,
+        workers: Optional[int] = None,
+        output_root: str = "output",
+        default_template: str = "center_title",
+        default_variant: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        批量渲染模板封面
+
+        - 所有封面写入同一个 batch 目录，文件名带序号，不会互相覆盖；只写一个 manifest.json
+        - 背景配置相同（同模板同变体同尺寸）的封面共用一张背景：
+          AI 背景在主进程中每种只生成一次，渐变/纯色背景在每个工作进程中只生成一次
+        - 多进程渲染，每个工作进程复用同一套模板引擎、文字渲染器和字体缓存
+
+        Args:
+            items: 封面列表，每项为 {"title", "subtitle", "template", "variant"}
+                   或 (title, subtitle, template, variant) 元组（后三项可省略）
+            output_scale: 输出倍率（1 为 900x383，2 为 1800x766）
+            workers: 进程数（默认 CPU 核数；1 为在当前进程中渲染）
+            output_root: 输出根目录
+            default_template: 任务项未指定模板时使用的模板ID
+            default_variant: 任务项未指定变体时使用的变体
+
+        Returns:
+            清单字典（同 manifest.json），含 output_dir、manifest 路径和每项结果
+        """
+        started = time.perf_counter()
+        timestamp, batch_dir = create_output_dir("batch", output_root)
+
+        cover_width, cover_height = CROP_PRESETS["wechat-cover"]
+        cover_size = (cover_width * output_scale, cover_height * output_scale)
+
+        # 1. 解析模板，按背景分组
+        entries = []
+        tasks = []
+        ai_backgrounds: Dict[str, Tuple[Dict, tuple]] = {}
+
+        for index, item in enumerate(items, 1):
+            entry = _normalize_batch_item(item, default_template, default_variant)
+            entry["index"] = index
+            entry["path"] = None
+            entry["error"] = None
+            entries.append(entry)
+
+            plan = self.template_engine.get_plan(entry["template"])
+            template = plan.at_size(cover_size, entry["variant"]) if plan else None
+            if template is None:
+                entry["error"] = (
+                    f"模板不存在: {entry['template']}" if plan is None
+                    else f"变体不存在: {entry['variant']}"
+                )
+                continue
+
+            key = _background_key(template, cover_size)
+            if template['template']['background']['type'] == 'ai_generate':
+                ai_backgrounds.setdefault(key, (template['template']['background'], plan.size))
+
+            filename = f"{index:05d}_{sanitize_filename(entry['title'], 40)}.jpg"
+            tasks.append({
+                "index": index,
+                "title": entry["title"],
+                "subtitle": entry["subtitle"],
+                "template": entry["template"],
+                "variant": entry["variant"],
+                "size": cover_size,
+                "background_key": key,
+                "background_path": None,
+                "path": str(batch_dir / filename),
+            })
+
+        # 2. AI 背景每种只生成一次（保存为文件供工作进程读取）
+        if ai_backgrounds:
+            background_dir = batch_dir / "backgrounds"
+            background_dir.mkdir()
+            background_paths = {}
+            for key, (config, generation_size) in ai_backgrounds.items():
+                print(f"正在生成AI背景 ({len(background_paths) + 1}/{len(ai_backgrounds)})...")
+                image = self.background_generator.generate(config, generation_size)
+                if image is None:
+                    continue
+                path = background_dir / f"{key}.png"
+                image.convert('RGB').resize(cover_size, Image.Resampling.LANCZOS).save(path)
+                background_paths[key] = str(path)
+
+            for task in tasks:
+                if task["background_key"] in ai_backgrounds:
+                    task["background_path"] = background_paths.get(task["background_key"], "")
+
+        # 3. 渲染（同背景的任务排在一起，分到同一批）
+        tasks.sort(key=lambda task: (task["background_key"], task["index"]))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(tasks)))
+
+        print(f"正在渲染 {len(tasks)} 张封面（{workers} 个进程）...")
+        if workers == 1:
+            _BATCH_STATE["template_engine"] = self.template_engine
+            _BATCH_STATE["text_renderer"] = self.text_renderer
+            _BATCH_STATE["background_generator"] = self.background_generator
+            results = map(_batch_render_item, tasks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init)
+            chunksize = max(1, min(32, len(tasks) // (workers * 4)))
+            results = executor.map(_batch_render_item, tasks, chunksize=chunksize)
+
+        try:
+            for done, outcome in enumerate(results, 1):
+                entry = entries[outcome["index"] - 1]
+                entry["path"] = outcome["path"]
+                entry["error"] = outcome["error"]
+                entry["elapsed_ms"] = outcome["elapsed_ms"]
+                if done % 100 == 0:
+                    print(f"  已完成 {done}/{len(tasks)}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            _BATCH_STATE.clear()
+
+        # 4. 写入清单
+        failed = [entry for entry in entries if entry["error"]]
+        elapsed = time.perf_counter() - started
+        manifest = {
+            "timestamp": timestamp,
+            "output_dir": str(batch_dir),
+            "manifest": str(batch_dir / "manifest.json"),
+            "render_size": f"{cover_size[0]}x{cover_size[1]}",
+            "total": len(entries),
+            "succeeded": len(entries) - len(failed),
+            "failed": len(failed),
+            "backgrounds": len({task["background_key"] for task in tasks}),
+            "workers": workers,
+            "elapsed_seconds": round(elapsed, 2),
+            "items": entries,
+        }
+        with open(batch_dir / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        # 批量目录不经过渲染缓存，登记后同样计入输出目录大小上限
+        render_cache = self.render_cache if Path(output_root) == self.render_cache.root else RenderCache(output_root)
+        render_cache.track(batch_dir)
+
+        print(f"批量渲染完成: 成功 {manifest['succeeded']}，失败 {manifest['failed']}，"
+              f"耗时 {elapsed:.1f}s")
+        print(f"清单: {manifest['manifest']}")
+        return manifest
+
     def generate_with_style(
         self,
         title: str,
@@ -807,6 +1289,189 @@ class CoverGenerator:
         )
 
 
+# ===== 批量渲染工作进程（2026-10-19新增） =====
+# 每个工作进程持有一套模板引擎/文字渲染器/背景生成器，并缓存本进程生成过的背景。
+
+_BATCH_STATE: Dict[str, Any] = {}
+
+# 每个工作进程缓存的背景数量上限
+BATCH_BACKGROUND_CACHE_SIZE = 16
+
+
+def _normalize_batch_item(
+    item: Any,
+    default_template: str = "center_title",
+    default_variant: Optional[str] = None
+) -> Dict[str, Any]:
+    """把批量任务项统一为 {title, subtitle, template, variant}"""
+    if isinstance(item, str):
+        item = {"title": item}
+    elif isinstance(item, (list, tuple)):
+        item = dict(zip(("title", "subtitle", "template", "variant"), item))
+    return {
+        "title": item.get("title") or "",
+        "subtitle": item.get("subtitle") or "",
+        "template": item.get("template") or default_template,
+        "variant": item.get("variant") or default_variant,
+    }
+
+
+def _background_key(template: Dict, size: tuple) -> str:
+    """背景配置（含叠加层）和尺寸相同的封面共用一张背景"""
+    config = template['template']
+    payload = json.dumps(
+        [config['background'], config.get('overlay'), list(size)],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _batch_worker_init():
+    """工作进程初始化：创建本进程共用的引擎实例"""
+    _BATCH_STATE["template_engine"] = TemplateEngine()
+    _BATCH_STATE["text_renderer"] = TextRenderer()
+    _BATCH_STATE["background_generator"] = BackgroundGenerator()
+
+
+def _batch_render_item(task: Dict[str, Any]) -> Dict[str, Any]:
+    """渲染批量任务中的一张封面（在工作进程中执行）"""
+    started = time.perf_counter()
+    outcome = {"index": task["index"], "path": None, "error": None}
+
+    try:
+        template_engine = _BATCH_STATE["template_engine"]
+        size = tuple(task["size"])
+
+        rendered = template_engine.render(
+            template_id=task["template"],
+            title=task["title"],
+            subtitle=task["subtitle"],
+            variant=task["variant"]
+        )
+        if not rendered:
+            raise ValueError(f"模板渲染失败: {task['template']}")
+        plan = rendered["plan"]
+        template = plan.at_size(size, task["variant"])
+
+        backgrounds = _BATCH_STATE.setdefault("backgrounds", {})
+        background = backgrounds.get(task["background_key"])
+        if background is None:
+            base_image = None
+            if task["background_path"] is not None:
+                if not task["background_path"]:
+                    raise ValueError("背景生成失败")
+                base_image = Image.open(task["background_path"]).convert('RGB')
+            background = CoverGenerator._render_background(
+                template, _BATCH_STATE["background_generator"], size, plan.size, base_image
+            )
+            if len(backgrounds) >= BATCH_BACKGROUND_CACHE_SIZE:
+                backgrounds.pop(next(iter(backgrounds)))
+            backgrounds[task["background_key"]] = background
+
+        cover = _BATCH_STATE["text_renderer"].render_elements(
+            background.copy(),
+            template['template'].get('elements', []),
+            rendered["variables"],
+            template_engine
+        )
+        cover.convert('RGB').save(task["path"], "JPEG", quality=95)
+        outcome["path"] = task["path"]
+    except Exception as e:
+        outcome["error"] = str(e)
+
+    outcome["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return outcome
+
+
+def load_batch_items(path: str) -> List[Dict[str, Any]]:
+    """
+    读取批量任务文件
+
+    Args:
+        path: JSON 数组文件，或每行一个 JSON 对象的 JSONL 文件
+              （字段：title、subtitle、template、variant）
+
+    Returns:
+        任务列表
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def check_template_scaling(
+    template_engine: TemplateEngine,
+    text_renderer: TextRenderer,
+    template_ids: Optional[List[str]] = None,
+    title: str = "模板缩放一致性检查 Scaling Check",
+    subtitle: str = "副标题 Subtitle",
+    output_scale: int = 1,
+    tolerance: int = SCALING_CHECK_TOLERANCE,
+) -> List[Dict[str, Any]]:
+    """
+    检查直接按输出尺寸渲染与 keep_master（原尺寸渲染后缩小）的结果是否一致
+
+    每个模板的基础样式和全部变体，逐个元素在透明画布上按两种方式渲染，
+    比较缩小后的可见范围。偏差超过 tolerance 说明有像素值没有随输出尺寸缩放
+    （例如渲染器默认字号、阴影偏移）。
+
+    Args:
+        template_engine: 模板引擎
+        text_renderer: 文字渲染器
+        template_ids: 要检查的模板（默认全部）
+        title: 标题文字
+        subtitle: 副标题文字
+        output_scale: 输出倍率
+        tolerance: 允许的边界偏差（像素，随 output_scale 放大）
+
+    Returns:
+        [{"template", "variant", "offset", "ok"}]，offset 为各元素边界的最大偏差
+    """
+    cover_size = tuple(v * output_scale for v in CROP_PRESETS["wechat-cover"])
+    if template_ids is None:
+        template_ids = [info['id'] for info in template_engine.list_templates()]
+    variables = {'title': title, 'subtitle': subtitle}
+
+    def ink_box(element: Dict, size: tuple) -> Optional[tuple]:
+        layer = text_renderer.render_elements(
+            Image.new('RGBA', size, (0, 0, 0, 0)), [element], variables, template_engine
+        )
+        if layer.size != cover_size:
+            layer = layer.resize(cover_size, Image.Resampling.LANCZOS)
+        return layer.getchannel('A').point(lambda v: 255 if v >= 128 else 0).getbbox()
+
+    results = []
+    for template_id in template_ids:
+        plan = template_engine.get_plan(template_id)
+        if plan is None:
+            raise ValueError(f"模板不存在: {template_id}")
+
+        variant_names = [None] + [v['name'] for v in plan.template['template'].get('variants', [])]
+        for variant in variant_names:
+            master = plan.at_size(plan.size, variant)['template'].get('elements', [])
+            direct = plan.at_size(cover_size, variant)['template'].get('elements', [])
+
+            offset = 0
+            for master_element, direct_element in zip(master, direct):
+                master_box = ink_box(master_element, plan.size)
+                direct_box = ink_box(direct_element, cover_size)
+                if master_box is None or direct_box is None:
+                    if master_box != direct_box:
+                        offset = max(cover_size)
+                    continue
+                offset = max(offset, max(abs(a - b) for a, b in zip(master_box, direct_box)))
+
+            ok = offset <= tolerance * output_scale
+            results.append({"template": template_id, "variant": variant, "offset": offset, "ok": ok})
+            print(f"{'✓' if ok else '✗'} {template_id} / {variant or '基础样式'}: 最大偏差 {offset}px")
+
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="公众号封面生成器 - 支持模板系统、风格系统",
@@ -849,6 +1514,12 @@ def main():
   # 查看所有模板
   python cover_generator.py --list-templates
 
+  # 批量渲染（JSON/JSONL，每项含 title/subtitle/template/variant）
+  python cover_generator.py --batch covers.jsonl --template center_title --workers 8
+
+  # 检查模板直接渲染与 --keep-master 输出是否一致
+  python cover_generator.py --check-scaling
+
   # 使用风格系统
   python cover_generator.py --use-style --title "智谱上市579亿" --style tech --subtitle "GLM-4.7实测"
 
@@ -864,6 +1535,10 @@ def main():
     parser.add_argument("--template", help="使用模板系统生成（指定模板ID）")
     parser.add_argument("--variant", help="模板样式变体")
     parser.add_argument("--list-templates", action="store_true", help="列出所有可用模板")
+    parser.add_argument("--batch", help="批量渲染模板封面（JSON/JSONL任务文件）")
+    parser.add_argument("--workers", type=int, help="批量渲染进程数（默认CPU核数）")
+    parser.add_argument("--check-scaling", action="store_true",
+                        help="检查各模板/变体直接渲染与 --keep-master 输出是否一致（可配合 --template/--output-scale）")
 
     # 风格系统参数
     parser.add_argument("--use-style", action="store_true", help="启用风格系统（不推荐，建议使用模板系统）")
@@ -880,9 +1555,15 @@ def main():
 
     # 生成参数
     parser.add_argument("--crop-mode",
-                       choices=["center", "golden_ratio", "smart", "all"],
+                       choices=["center", "golden_ratio", "smart", "top_heavy", "saliency", "all"],
                        default="center",
                        help="裁剪模式（默认: center，仅在使用--use-style时有效）")
+    parser.add_argument("--output-scale", type=int, choices=[1, 2], default=1,
+                       help="模板封面输出倍率（1: 900x383，2: 1800x766，默认1）")
+    parser.add_argument("--keep-master", action="store_true",
+                       help="同时按模板原尺寸渲染并保存大图（raw_image.jpg）")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="不使用渲染缓存，强制重新生成模板封面")
     parser.add_argument("--share-card", action="store_true", help="生成分享卡片")
     parser.add_argument("--no-variants", action="store_true", help="不生成多方案预览")
     parser.add_argument("--config",
@@ -908,6 +1589,30 @@ def main():
         print("=" * 80)
         sys.exit(0)
 
+    # 处理 --check-scaling
+    if args.check_scaling:
+        results = check_template_scaling(
+            TemplateEngine(),
+            TextRenderer(),
+            template_ids=[args.template] if args.template else None,
+            output_scale=args.output_scale,
+        )
+        failed = [r for r in results if not r["ok"]]
+        print(f"\n检查 {len(results)} 个模板样式，{len(failed)} 个不一致")
+        sys.exit(0 if not failed else 1)
+
+    # 处理 --batch（--template/--variant 作为任务项的默认值）
+    if args.batch:
+        generator = CoverGenerator(api_key=args.api_key, config_path=args.config)
+        manifest = generator.batch_render(
+            load_batch_items(args.batch),
+            output_scale=args.output_scale,
+            workers=args.workers,
+            default_template=args.template or "center_title",
+            default_variant=args.variant,
+        )
+        sys.exit(0 if manifest["failed"] == 0 else 1)
+
     # 验证参数
     if args.template and not args.title:
         print("错误：使用模板系统时必须提供 --title 参数")
@@ -974,6 +1679,9 @@ def main():
                 generate_share_card=args.share_card,
                 generate_variants=not args.no_variants,
                 project_path=project_path,
+                output_scale=args.output_scale,
+                keep_master=args.keep_master,
+                use_cache=not args.no_cache,
             )
 
             print("\n" + "=" * 80)
@@ -0,0 +1,237 @@
+"""
+系统字体索引
+把系统字体目录扫描一次，记录每个字体文件的 字体族/样式/路径/修改时间，保存到磁盘，
+之后的进程直接读取索引，不再逐次遍历字体目录。
+
+- 失效判断：记录扫描时每个字体目录（含子目录）的修改时间，增删字体文件会改变所在目录的
+  修改时间，任一目录变化（或被删除）即重新扫描
+- 增量重建：路径和修改时间都没变的字体沿用旧记录，只读取新增/修改的字体名称
+- 查找：文件名、文件名（不含扩展名）、字体族名都建了字典，一次查表即可
+
+配置（环境变量）：
+- FONT_INDEX_PATH: 索引文件路径（默认 ~/.cache/skillmate/font_index.json）
+"""
+
+from PIL import ImageFont
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import threading
+
+FONT_INDEX_PATH = os.getenv(
+    "FONT_INDEX_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "skillmate", "font_index.json")
+)
+
+# 索引格式版本，结构变化时递增以强制重建
+FONT_INDEX_VERSION = 1
+
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+
+# 视为常规字形的样式名（字体族名查找时优先返回）
+REGULAR_STYLES = {'regular', 'book', 'normal', 'roman'}
+
+FONT_DIRS = [
+    # Windows字体目录
+    Path("C:/Windows/Fonts"),
+    Path("C:/Windows/System32/Fonts"),
+    # macOS字体目录
+    Path("/System/Library/Fonts"),
+    Path("/Library/Fonts"),
+    Path("~/Library/Fonts").expanduser(),
+    # Linux字体目录
+    Path("/usr/share/fonts"),
+    Path("/usr/local/share/fonts"),
+]
+
+
+def _read_font_name(path: str) -> Tuple[str, str]:
+    """读取字体的 (字体族, 样式)，读取失败时返回空字符串"""
+    try:
+        family, style = ImageFont.truetype(path, 12).getname()
+        return family or "", style or ""
+    except Exception:
+        return "", ""
+
+
+def _normalize(name: str) -> str:
+    """查找键：小写并去掉空格/连字符/下划线（"Microsoft YaHei" 与 "microsoftyahei" 等价）"""
+    return ''.join(ch for ch in name.lower() if ch not in ' -_')
+
+
+class FontIndex:
+    """磁盘持久化的系统字体索引（首次查找时才加载）"""
+
+    def __init__(self, index_path: str = None, font_dirs: List[Path] = None):
+        """
+        Args:
+            index_path: 索引文件路径（默认 FONT_INDEX_PATH）
+            font_dirs: 字体目录列表（默认 FONT_DIRS）
+        """
+        self.index_path = Path(index_path or FONT_INDEX_PATH)
+        self.font_dirs = [Path(d) for d in (font_dirs if font_dirs is not None else FONT_DIRS)]
+
+        self._lock = threading.Lock()
+        self._fonts: Optional[List[Dict]] = None
+        self._by_name: Dict[str, str] = {}
+        self._by_family_style: Dict[Tuple[str, str], str] = {}
+
+    @property
+    def fonts(self) -> List[Dict]:
+        """全部字体记录 [{family, style, path, mtime}]"""
+        self._ensure_loaded()
+        return self._fonts
+
+    def lookup(self, name: str, style: str = None) -> Optional[str]:
+        """
+        按名称查找字体文件
+
+        Args:
+            name: 文件名（如 simhei.ttf）、文件名去扩展名（simhei）或字体族名（SimHei）
+            style: 样式（如 Bold，可选；找不到该样式时回退到同名字体）
+
+        Returns:
+            字体文件路径，未找到返回 None
+        """
+        self._ensure_loaded()
+        key = _normalize(name)
+        if style:
+            path = self._by_family_style.get((key, _normalize(style)))
+            if path:
+                return path
+        return self._by_name.get(key)
+
+    def refresh(self) -> int:
+        """强制重新扫描字体目录，返回字体数量"""
+        with self._lock:
+            previous = self._fonts or self._read_index().get('fonts', [])
+            self._build(previous)
+        return len(self._fonts)
+
+    def _ensure_loaded(self):
+        if self._fonts is not None:
+            return
+        with self._lock:
+            if self._fonts is not None:
+                return
+            data = self._read_index()
+            if data and self._is_fresh(data):
+                self._set_fonts(data['fonts'])
+            else:
+                self._build(data.get('fonts', []))
+
+    def _read_index(self) -> Dict:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != FONT_INDEX_VERSION:
+            return {}
+        return data
+
+    def _is_fresh(self, data: Dict) -> bool:
+        """字体目录列表相同且每个目录的修改时间都没变"""
+        if data.get('roots') != [str(d) for d in self.font_dirs]:
+            return False
+        for directory, mtime in data.get('dirs', {}).items():
+            try:
+                if os.stat(directory).st_mtime != mtime:
+                    return False
+            except OSError:
+                return False
+        # 扫描时不存在的字体目录现在出现了
+        scanned = data.get('dirs', {})
+        return all(str(root) in scanned or not root.is_dir() for root in self.font_dirs)
+
+    def _build(self, previous: List[Dict]):
+        """扫描字体目录并保存索引（沿用路径和修改时间未变的旧记录）"""
+        known = {font['path']: font for font in previous}
+        fonts = []
+        dirs = {}
+
+        for root in self.font_dirs:
+            if not root.is_dir():
+                continue
+            for directory, _, files in os.walk(root):
+                try:
+                    dirs[directory] = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                for filename in files:
+                    if not filename.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(directory, filename)
+                    try:
+                        mtime = os.stat(path).st_mtime
+                    except OSError:
+                        continue
+                    entry = known.get(path)
+                    if entry is None or entry.get('mtime') != mtime:
+                        family, style = _read_font_name(path)
+                        entry = {'family': family, 'style': style, 'path': path, 'mtime': mtime}
+                    fonts.append(entry)
+
+        self._set_fonts(fonts)
+        self._save({
+            'version': FONT_INDEX_VERSION,
+            'roots': [str(d) for d in self.font_dirs],
+            'dirs': dirs,
+            'fonts': fonts,
+        })
+
+    def _set_fonts(self, fonts: List[Dict]):
+        """建立查找字典（同名时先扫描到的优先；字体族名优先指向常规字形）"""
+        by_name = {}
+        by_family_style = {}
+
+        for font in fonts:
+            filename = os.path.basename(font['path'])
+            for key in (filename, os.path.splitext(filename)[0]):
+                by_name.setdefault(_normalize(key), font['path'])
+            if font['family']:
+                family = _normalize(font['family'])
+                by_family_style.setdefault((family, _normalize(font['style'])), font['path'])
+
+        regular_first = sorted(by_family_style.items(), key=lambda item: item[0][1] not in REGULAR_STYLES)
+        for (family, _), path in regular_first:
+            by_name.setdefault(family, path)
+
+        self._fonts = fonts
+        self._by_name = by_name
+        self._by_family_style = by_family_style
+
+    def _save(self, data: Dict):
+        """写入索引文件（先写临时文件再替换，避免并发进程读到半截文件）"""
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"警告: 字体索引保存失败 ({e})")
+
+
+_default_index = {"instance": None}
+_default_lock = threading.Lock()
+
+
+def get_font_index() -> FontIndex:
+    """进程内共享的默认字体索引"""
+    with _default_lock:
+        if _default_index["instance"] is None:
+            _default_index["instance"] = FontIndex()
+        return _default_index["instance"]
+
+
+def main():
+    """主程序 - 重建字体索引"""
+    index = get_font_index()
+    count = index.refresh()
+    print(f"字体索引已更新: {index.index_path}（{count} 个字体）")
+
+
+if __name__ == "__main__":
+    main()
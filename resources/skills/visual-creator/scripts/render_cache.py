@@ -0,0 +1,332 @@
+"""
+模板封面渲染缓存
+同一模板、同一变量、同一输出尺寸、同样的字体文件和渲染代码，渲染结果必然相同，
+因此按这些内容的哈希记录已生成的图片，再次请求时直接返回已有文件，不再重新渲染。
+
+- 缓存键：sha256(模板渲染计划, 变量, 输出尺寸/模式, 所用字体文件摘要, 渲染代码版本)
+- 命中条件：索引中有该键，且记录的文件都还在、大小和修改时间都没变
+- 淘汰：输出目录（output/cover_*、output/batch_*）总大小超过上限时，按最近使用时间从旧到新删除整个目录
+  （索引里记着每个子目录的大小；写入缓存时只列一次输出目录，统计本次写入的目录和索引里还没有的目录，
+  因此批量渲染、--keep-master 等不经过缓存的输出也计入上限；超过上限或显式清理时才遍历全部目录重新统计）
+- 最近使用时间：命中时只更新结果所在目录的修改时间，不重写索引
+- 索引：<输出目录>/.render_cache.json，先写临时文件再替换
+
+配置（环境变量）：
+- RENDER_CACHE_MAX_MB: 输出目录大小上限（MB，默认 1024）
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+RENDER_CACHE_MAX_MB = float(os.getenv("RENDER_CACHE_MAX_MB", "1024"))
+
+# 索引格式版本，结构变化时递增以强制重建
+RENDER_CACHE_VERSION = 2
+
+# 参与淘汰的输出目录前缀（其他目录和文件不动）
+EVICTABLE_PREFIXES = ("cover_", "batch_")
+
+# 渲染结果取决于这些模块的代码
+RENDERER_MODULES = (
+    "template_engine.py",
+    "text_renderer.py",
+    "background_generator.py",
+    "font_index.py",
+    "cover_generator.py",
+)
+
+_renderer_version = {"value": None}
+
+
+def renderer_version() -> str:
+    """渲染代码版本（相关模块源码的摘要，修改代码后旧缓存自动失效）"""
+    if _renderer_version["value"] is None:
+        digest = hashlib.sha256()
+        scripts_dir = Path(__file__).parent
+        for name in RENDERER_MODULES:
+            try:
+                digest.update((scripts_dir / name).read_bytes())
+            except OSError:
+                digest.update(name.encode('utf-8'))
+        _renderer_version["value"] = digest.hexdigest()[:16]
+    return _renderer_version["value"]
+
+
+def make_key(*parts: Any) -> str:
+    """把任意可 JSON 序列化的内容哈希为缓存键"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _file_signature(path: str) -> Optional[list]:
+    """文件的 [大小, 修改时间]，文件不存在时返回 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+
+def _directory_size(path: str) -> int:
+    """目录下所有文件的总大小"""
+    size = 0
+    for directory, _, files in os.walk(path):
+        for filename in files:
+            try:
+                size += os.stat(os.path.join(directory, filename)).st_size
+            except OSError:
+                pass
+    return size
+
+
+class RenderCache:
+    """按内容寻址的渲染结果缓存"""
+
+    def __init__(self, root: str = "output", max_bytes: Optional[int] = None):
+        """
+        Args:
+            root: 输出目录
+            max_bytes: 输出目录大小上限（默认 RENDER_CACHE_MAX_MB）
+        """
+        self.root = Path(root)
+        self.index_path = self.root / ".render_cache.json"
+        self.max_bytes = int(max_bytes if max_bytes is not None else RENDER_CACHE_MAX_MB * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self._index: Optional[Dict] = None
+        self._index_mtime: Optional[float] = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            渲染时保存的结果字典，未命中（或文件已被删除）时返回 None
+        """
+        with self._lock:
+            index = self._load()
+            entry = index['entries'].get(key)
+            if entry is None:
+                return None
+            if not all(_file_signature(path) == signature for path, signature in entry['files']):
+                del index['entries'][key]
+                self._save()
+                return None
+            # 淘汰按目录修改时间排序，命中时更新它即可，不必重写整个索引
+            for directory in {os.path.dirname(path) for path, _ in entry['files']}:
+                try:
+                    os.utime(directory)
+                except OSError:
+                    pass
+            return json.loads(json.dumps(entry['result']))
+
+    def put(self, key: str, result: Dict[str, Any], files: Iterable[str]):
+        """
+        记录渲染结果并按大小上限淘汰旧目录
+
+        Args:
+            key: 缓存键
+            result: 渲染结果字典（命中时原样返回）
+            files: 结果包含的文件路径
+        """
+        with self._lock:
+            index = self._load()
+            now = time.time()
+            files = [[str(path), _file_signature(str(path))] for path in files]
+            index['entries'][key] = {
+                'files': files,
+                'result': result,
+                'created': now,
+                'last_used': now,
+            }
+            self._update_sizes({os.path.dirname(path) for path, _ in files})
+            self._save()
+
+    def track(self, directory: str):
+        """
+        登记不经过缓存写入的输出目录（如批量渲染目录），计入大小上限并按需淘汰
+
+        Args:
+            directory: 输出目录（须在缓存根目录下）
+        """
+        with self._lock:
+            self._load()
+            self._update_sizes({str(directory)})
+            self._save()
+
+    def file_digest(self, path: str) -> str:
+        """
+        文件内容摘要（按路径/大小/修改时间缓存在索引中，文件不变时不重复读取）
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            sha256 摘要前16位
+        """
+        with self._lock:
+            stat = os.stat(path)
+            digests = self._load()['digests']
+            cached = digests.get(path)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+                return cached[2]
+
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            digests[path] = [stat.st_size, stat.st_mtime, digest.hexdigest()[:16]]
+            self._save()
+            return digests[path][2]
+
+    def evict(self) -> int:
+        """
+        立即按大小上限清理输出目录
+
+        Returns:
+            剩余缓存记录数
+        """
+        with self._lock:
+            self._load()
+            self._evict()
+            self._save()
+            return len(self._index['entries'])
+
+    def _update_sizes(self, changed: Iterable[str]):
+        """
+        更新索引里的目录大小：重新统计 changed 中的目录和索引里还没有的目录，去掉已删除的目录，
+        超过上限（或还没统计过）时遍历全部目录并淘汰
+        """
+        index = self._index
+        sizes = index.get('dirs')
+        if sizes is None or index.get('total_bytes') is None or not self.root.is_dir():
+            self._evict(keep=changed)
+            return
+
+        root = os.path.abspath(self.root)
+        changed = {os.path.basename(os.path.abspath(path)) for path in changed
+                   if os.path.dirname(os.path.abspath(path)) == root}
+        present = {entry.name for entry in os.scandir(root) if entry.is_dir()}
+
+        total = index['total_bytes']
+        for name in set(sizes) - present:
+            total -= sizes.pop(name)
+        for name in (present - set(sizes)) | (changed & present):
+            size = _directory_size(os.path.join(root, name))
+            total += size - sizes.get(name, 0)
+            sizes[name] = size
+        index['total_bytes'] = total
+
+        if total > self.max_bytes:
+            self._evict(keep={os.path.join(root, name) for name in changed})
+
+    def _evict(self, keep: Iterable[str] = ()):
+        """统计输出目录总大小（各目录大小记入索引），超过上限时按最近使用时间删除最旧的输出目录"""
+        if not self.root.is_dir():
+            self._index['total_bytes'] = 0
+            self._index['dirs'] = {}
+            return
+
+        keep = {os.path.abspath(path) for path in keep}
+        directories = []
+        sizes = {}
+        total = 0
+        for child in self.root.iterdir():
+            if child.is_file():
+                total += child.stat().st_size
+                continue
+            size = _directory_size(child)
+            sizes[child.name] = size
+            total += size
+            if child.name.startswith(EVICTABLE_PREFIXES) and os.path.abspath(child) not in keep:
+                directories.append([child, size, child.stat().st_mtime])
+
+        self._index['dirs'] = sizes
+        if total <= self.max_bytes:
+            self._index['total_bytes'] = total
+            return
+
+        # 最近使用时间：目录修改时间（命中时会更新）与指向该目录的缓存项写入时间取较晚者
+        entries = self._load()['entries']
+        for key, entry in entries.items():
+            for path, _ in entry['files']:
+                parent = os.path.abspath(os.path.dirname(path))
+                for item in directories:
+                    if os.path.abspath(item[0]) == parent:
+                        item[2] = max(item[2], entry['last_used'])
+
+        removed = set()
+        for child, size, _ in sorted(directories, key=lambda item: item[2]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(child, ignore_errors=True)
+            total -= size
+            sizes.pop(child.name, None)
+            removed.add(os.path.abspath(child))
+        self._index['total_bytes'] = total
+
+        if removed:
+            for key in [k for k, e in entries.items()
+                        if any(os.path.abspath(os.path.dirname(p)) in removed for p, _ in e['files'])]:
+                del entries[key]
+            print(f"渲染缓存: 已清理 {len(removed)} 个旧输出目录")
+
+    def _load(self) -> Dict:
+        """读取索引（其他进程更新过索引文件时重新读取）"""
+        try:
+            mtime = os.stat(self.index_path).st_mtime
+        except OSError:
+            mtime = None
+
+        if self._index is None or mtime != self._index_mtime:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get('version') != RENDER_CACHE_VERSION:
+                data = {'version': RENDER_CACHE_VERSION, 'entries': {}, 'digests': {}}
+            self._index = data
+            self._index_mtime = mtime
+        return self._index
+
+    def _save(self):
+        """写入索引文件（先写临时文件再替换，避免并发进程读到半截文件）"""
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+            self._index_mtime = os.stat(self.index_path).st_mtime
+        except OSError as e:
+            print(f"警告: 渲染缓存索引保存失败 ({e})")
+
+
+def main():
+    """主程序 - 查看/清理渲染缓存"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="模板封面渲染缓存")
+    parser.add_argument('--root', default='output', help='输出目录')
+    parser.add_argument('--max-mb', type=float, help='按此大小上限立即清理（MB）')
+
+    args = parser.parse_args()
+
+    max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+    cache = RenderCache(args.root, max_bytes=max_bytes)
+    count = cache.evict()
+    print(f"渲染缓存: {cache.index_path}（{count} 条记录，上限 {cache.max_bytes / 1024 / 1024:.0f} MB）")
+
+
+if __name__ == "__main__":
+    main()
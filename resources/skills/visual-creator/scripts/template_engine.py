@@ -1,48 +1,297 @@
 """
 模板引擎
 加载模板、协调背景生成和文字渲染
+
+模板按需加载并编译为只读的渲染计划（TemplatePlan）：
+- 按 id 延迟加载，首次用到某个模板时才读取；解析结果缓存到磁盘，YAML 修改时间不变时不再解析
+- 变体在编译时合并（只复制被覆盖的部分，其余与基础模板共享）
+- 按渲染尺寸缩放、百分比位置/宽度换算成像素的结果按尺寸缓存
+- 变量替换的占位符位置预先编译
+
+渲染计划及其返回的模板字典在多次渲染间共享，调用方不应修改。
+
+配置（环境变量）：
+- TEMPLATE_CACHE_PATH: 模板解析缓存路径（默认 ~/.cache/skillmate/template_cache.json）
 """
 
 import yaml
+import json
+import os
 import re
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from PIL import Image
 
+TEMPLATE_CACHE_PATH = os.getenv(
+    "TEMPLATE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "skillmate", "template_cache.json")
+)
+
+# 缓存格式版本，结构变化时递增以强制重建
+TEMPLATE_CACHE_VERSION = 1
+
+# 变量占位符，如 {{title}}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+
+# 未提供时替换为空字符串的变量（其他未知占位符原样保留）
+DEFAULT_VARIABLES = ('title', 'subtitle')
+
+
+@lru_cache(maxsize=1024)
+def _compile_placeholders(template_str: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """把模板字符串拆成 (字面文本, 变量名) 片段，末尾片段的变量名为 None"""
+    parts = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(template_str):
+        parts.append((template_str[position:match.start()], match.group(1)))
+        position = match.end()
+    parts.append((template_str[position:], None))
+    return tuple(parts)
+
+
+class TemplatePlan:
+    """
+    编译后的模板（只读）
+
+    Attributes:
+        id: 模板ID
+        path: 模板文件路径
+        mtime: 编译时模板文件的修改时间
+        template: 基础模板数据
+        size: 模板设计尺寸 (width, height)
+    """
+
+    def __init__(self, template: Dict, path: Path, mtime: float):
+        self.template = template
+        self.path = path
+        self.mtime = mtime
+
+        config = template['template']
+        self.id = config['id']
+        self.size = TemplateEngine.parse_image_size(config['background'].get('size', '3072x1306'))
+
+        self._variants: Dict[str, Optional[Dict]] = {}
+        self._sized: Dict[Tuple[Optional[str], Tuple[int, int]], Dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def info(self) -> Dict[str, str]:
+        """模板基本信息"""
+        config = self.template['template']
+        return {
+            'id': config['id'],
+            'name': config['name'],
+            'description': config['description'],
+            'category': config['category']
+        }
+
+    def variant(self, name: Optional[str] = None) -> Optional[Dict]:
+        """
+        获取应用变体后的模板
+
+        Args:
+            name: 变体名称（None 为基础模板）
+
+        Returns:
+            模板数据，变体不存在时返回 None
+        """
+        if not name:
+            return self.template
+        if name not in self._variants:
+            self._variants[name] = TemplateEngine._apply_variant(self.template, name)
+        return self._variants[name]
+
+    def at_size(self, size: Tuple[int, int], variant: Optional[str] = None) -> Optional[Dict]:
+        """
+        获取按渲染尺寸缩放好的模板
+
+        像素字段按设计尺寸等比缩放，百分比位置和换行宽度换算成像素，
+        同一 (变体, 尺寸) 只计算一次。
+
+        Args:
+            size: 渲染尺寸 (width, height)
+            variant: 变体名称
+
+        Returns:
+            模板数据，变体不存在时返回 None
+        """
+        size = (int(size[0]), int(size[1]))
+        key = (variant or None, size)
+        sized = self._sized.get(key)
+        if sized is not None:
+            return sized
+
+        template = self.variant(variant)
+        if template is None:
+            return None
+
+        with self._lock:
+            if key not in self._sized:
+                sized = TemplateEngine.scale_template(template, size, self.size)
+                _resolve_layout(sized, size)
+                self._sized[key] = sized
+        return self._sized[key]
+
+
+def _resolve_layout(template: Dict, size: Tuple[int, int]):
+    """把元素的百分比位置和换行宽度换算成像素（结果与渲染时解析相同）"""
+    width, height = size
+    for element in template['template'].get('elements', []):
+        position = element.get('position')
+        if isinstance(position, dict) and position.get('type', 'absolute') != 'center':
+            x, y, _ = TemplateEngine.parse_position(position, width, height)
+            position['x'], position['y'] = x, y
+
+        wrap = element.get('wrap')
+        if isinstance(wrap, dict):
+            wrap['max_width'] = TemplateEngine.parse_size(wrap.get('max_width', '80%'), width)
+
 
 class TemplateEngine:
     """模板引擎核心类"""
 
-    def __init__(self, templates_dir: str = None):
+    def __init__(self, templates_dir: str = None, cache_path: str = None):
         """
-        初始化模板引擎
+        初始化模板引擎（不读取模板，首次使用时按需加载）
 
         Args:
             templates_dir: 模板目录路径
+            cache_path: 模板解析缓存路径（默认 TEMPLATE_CACHE_PATH）
         """
         if templates_dir is None:
             current_dir = Path(__file__).parent
             templates_dir = current_dir.parent / "templates"
 
         self.templates_dir = Path(templates_dir)
-        self.templates: Dict[str, Dict] = {}
-        self._load_all_templates()
+        self.cache_path = Path(cache_path or TEMPLATE_CACHE_PATH)
 
-    def _load_all_templates(self):
-        """加载所有模板"""
-        if not self.templates_dir.exists():
-            print(f"警告: 模板目录不存在: {self.templates_dir}")
-            return
+        self._lock = threading.RLock()
+        self._plans: Dict[str, TemplatePlan] = {}
+        self._cache: Optional[Dict[str, Dict]] = None
+        self._cache_dirty = False
+
+    @property
+    def templates(self) -> Dict[str, Dict]:
+        """全部模板 {id: 模板数据}"""
+        return {plan.id: plan.template for plan in self._load_all_plans()}
+
+    def get_plan(self, template_id: str) -> Optional[TemplatePlan]:
+        """
+        获取模板的渲染计划（模板文件修改后自动重新编译）
+
+        Args:
+            template_id: 模板ID
+
+        Returns:
+            TemplatePlan，模板不存在时返回 None
+        """
+        with self._lock:
+            plan = self._plans.get(template_id)
+            if plan is not None and self._file_mtime(plan.path) == plan.mtime:
+                return plan
+
+            # 文件名与模板ID一致时只读这一个文件
+            path = plan.path if plan is not None else self.templates_dir / f"{template_id}.yaml"
+            plan = self._load_plan(path)
+            if plan is None or plan.id != template_id:
+                plan = next((p for p in self._load_all_plans() if p.id == template_id), None)
+
+            self._save_cache()
+            return plan
+
+    def _load_all_plans(self) -> List[TemplatePlan]:
+        """加载模板目录下的全部模板"""
+        with self._lock:
+            if not self.templates_dir.exists():
+                print(f"警告: 模板目录不存在: {self.templates_dir}")
+                return []
+
+            plans = []
+            for yaml_file in sorted(self.templates_dir.glob("*.yaml")):
+                plan = self._load_plan(yaml_file)
+                if plan is not None:
+                    plans.append(plan)
+            self._save_cache()
+            return plans
+
+    def _load_plan(self, path: Path) -> Optional[TemplatePlan]:
+        """
+        读取并编译单个模板文件（修改时间与磁盘缓存一致时直接使用缓存的解析结果）
 
-        for yaml_file in self.templates_dir.glob("*.yaml"):
+        Args:
+            path: 模板文件路径
+
+        Returns:
+            TemplatePlan，文件不存在或解析失败时返回 None
+        """
+        mtime = self._file_mtime(path)
+        if mtime is None:
+            return None
+
+        key = str(Path(path).resolve())
+        cache = self._read_cache()
+        entry = cache.get(key)
+
+        if entry is not None and entry.get('mtime') == mtime:
+            template = entry['template']
+        else:
+            template = None
+
+        try:
+            if template is None:
+                template = self._load_template(str(path))
+                cache[key] = {'mtime': mtime, 'template': template}
+                self._cache_dirty = True
+
+            plan = self._plans.get(template['template']['id'])
+            if plan is None or plan.mtime != mtime or plan.path != Path(path):
+                plan = TemplatePlan(template, Path(path), mtime)
+                self._plans[plan.id] = plan
+            return plan
+        except Exception as e:
+            print(f"  加载模板失败 {Path(path).name}: {e}")
+            if cache.pop(key, None) is not None:
+                self._cache_dirty = True
+            return None
+
+    @staticmethod
+    def _file_mtime(path: Path) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _read_cache(self) -> Dict[str, Dict]:
+        """读取磁盘缓存 {模板文件绝对路径: {mtime, template}}"""
+        if self._cache is None:
             try:
-                template = self._load_template(str(yaml_file))
-                if template:
-                    template_id = template['template']['id']
-                    self.templates[template_id] = template
-                    print(f"  已加载模板: {template_id}")
-            except Exception as e:
-                print(f"  加载模板失败 {yaml_file.name}: {e}")
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get('version') != TEMPLATE_CACHE_VERSION:
+                data = {}
+            self._cache = data.get('templates', {})
+        return self._cache
+
+    def _save_cache(self):
+        """写入磁盘缓存（先写临时文件再替换，避免并发进程读到半截文件）"""
+        if not self._cache_dirty:
+            return
+        self._cache_dirty = False
+
+        # 清理已删除的模板文件
+        templates = {path: entry for path, entry in self._cache.items() if os.path.exists(path)}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': TEMPLATE_CACHE_VERSION, 'templates': templates}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"警告: 模板缓存保存失败 ({e})")
 
     def _load_template(self, template_path: str) -> Optional[Dict]:
         """
@@ -67,7 +316,8 @@ class TemplateEngine:
         Returns:
             模板数据字典
         """
-        return self.templates.get(template_id)
+        plan = self.get_plan(template_id)
+        return plan.template if plan else None
 
     def list_templates(self) -> List[Dict[str, str]]:
         """
@@ -76,15 +326,7 @@ class TemplateEngine:
         Returns:
             模板信息列表
         """
-        return [
-            {
-                'id': tpl['template']['id'],
-                'name': tpl['template']['name'],
-                'description': tpl['template']['description'],
-                'category': tpl['template']['category']
-            }
-            for tpl in self.templates.values()
-        ]
+        return [plan.info for plan in self._load_all_plans()]
 
     def render(
         self,
@@ -108,17 +350,16 @@ class TemplateEngine:
             渲染后的PIL Image对象
         """
         # 1. 获取模板
-        template = self.get_template(template_id)
-        if not template:
+        plan = self.get_plan(template_id)
+        if not plan:
             print(f"错误: 模板不存在: {template_id}")
             return None
 
-        # 2. 应用变体
-        if variant:
-            template = self._apply_variant(template, variant)
-            if not template:
-                print(f"错误: 变体不存在: {variant}")
-                return None
+        # 2. 应用变体（编译时合并，多次渲染共享）
+        template = plan.variant(variant)
+        if not template:
+            print(f"错误: 变体不存在: {variant}")
+            return None
 
         # 3. 替换变量
         variables = {
@@ -130,13 +371,17 @@ class TemplateEngine:
         # 这里返回模板配置，由cover_generator.py处理背景生成
         return {
             'template': template,
-            'variables': variables
+            'variables': variables,
+            'plan': plan
         }
 
-    def _apply_variant(self, template: Dict, variant_name: str) -> Optional[Dict]:
+    @staticmethod
+    def _apply_variant(template: Dict, variant_name: str) -> Optional[Dict]:
         """
         应用样式变体
 
+        只复制被变体覆盖的字典，其余部分与原模板共享（原模板不变）。
+
         Args:
             template: 原始模板
             variant_name: 变体名称
@@ -148,13 +393,11 @@ class TemplateEngine:
 
         for variant in variants:
             if variant['name'] == variant_name:
-                # 深拷贝模板
-                import copy
-                new_template = copy.deepcopy(template)
+                config = dict(template['template'])
 
                 # 应用背景配置
                 if 'background' in variant:
-                    new_template['template']['background'].update(variant['background'])
+                    config['background'] = {**config['background'], **variant['background']}
 
                 # 应用元素配置
                 if 'elements' in variant:
@@ -163,14 +406,126 @@ class TemplateEngine:
                         for elem in variant['elements']
                     }
 
-                    for elem in new_template['template']['elements']:
-                        if elem['id'] in element_map:
-                            elem.update(element_map[elem['id']])
+                    config['elements'] = [
+                        {**elem, **element_map[elem['id']]} if elem.get('id') in element_map else elem
+                        for elem in config.get('elements', [])
+                    ]
 
-                return new_template
+                return {**template, 'template': config}
 
         return None
 
+    # ===== 按输出分辨率缩放（2026-10-19新增） =====
+    # 模板按 background.size（默认3072x1306）设计，像素值字段按目标尺寸等比缩放后，
+    # 可直接在输出分辨率上渲染，不必先画满尺寸大图再缩小。百分比字段本身与尺寸无关，保持不变。
+
+    # 需要缩放的像素字段：字段名 → 缩放轴（x/y/uniform）
+    SCALED_FIELDS = {
+        'font': {'size': 'uniform', 'spacing': 'uniform'},
+        'position': {'x': 'x', 'y': 'y'},
+        'shadow': {'offset_x': 'x', 'offset_y': 'y', 'blur': 'uniform'},
+        'stroke': {'width': 'uniform'},
+        'wrap': {'max_width': 'x'},
+        'style': {
+            'width': 'x', 'height': 'y', 'border_width': 'uniform',
+            'corner_radius': 'uniform', 'corner_size': 'uniform', 'padding': 'uniform',
+        },
+        'overlay': {'height': 'y'},
+    }
+
+    # 渲染器（text_renderer）在模板缺省时使用的设计尺寸像素默认值。
+    # 缩放前先补齐，否则缺省值会以设计尺寸的原始像素画到小画布上
+    # （例如变体只覆盖 font.color 时，标题会按 40px 而不是缩放后的字号渲染）
+    RENDER_DEFAULTS = {
+        'font': {'size': 40},
+        'shadow': {'offset_x': 4, 'offset_y': 4},
+        'stroke': {'width': 2},
+        'decoration': {
+            'line': {'width': 100, 'height': 2},
+            'rounded_rectangle': {'width': 200, 'height': 60, 'border_width': 2, 'corner_radius': 10},
+            'brackets': {'width': 3, 'corner_size': 60, 'padding': 50},
+        },
+    }
+
+    @classmethod
+    def _fill_render_defaults(cls, element: Dict):
+        """给元素补齐渲染器的像素默认值（就地修改，调用方需传入副本）"""
+        if element.get('type') == 'decoration':
+            style = element.get('style')
+            if isinstance(style, dict):
+                defaults = cls.RENDER_DEFAULTS['decoration'].get(style.get('type', 'line'), {})
+                for field, value in defaults.items():
+                    style.setdefault(field, value)
+            return
+
+        font = element.get('font')
+        element['font'] = {**cls.RENDER_DEFAULTS['font'], **(font if isinstance(font, dict) else {})}
+
+        effects = element.get('effects')
+        if isinstance(effects, dict):
+            for key in ('shadow', 'stroke'):
+                if isinstance(effects.get(key), dict):
+                    effects[key] = {**cls.RENDER_DEFAULTS[key], **effects[key]}
+
+    @classmethod
+    def scale_template(cls, template: Dict, target_size: tuple, source_size: tuple = None) -> Dict:
+        """
+        把模板中的像素值缩放到目标尺寸
+
+        Args:
+            template: 模板数据（已应用变体）
+            target_size: 目标渲染尺寸 (width, height)
+            source_size: 模板设计尺寸（默认取 background.size）
+
+        Returns:
+            缩放后的模板副本（原模板不变）
+        """
+        import copy
+
+        config = template['template']
+        if source_size is None:
+            source_size = cls.parse_image_size(config['background'].get('size', '3072x1306'))
+
+        factors = {
+            'x': target_size[0] / source_size[0],
+            'y': target_size[1] / source_size[1],
+        }
+        factors['uniform'] = min(factors['x'], factors['y'])
+
+        def scale(section: Optional[Dict], fields: Dict[str, str]):
+            if not isinstance(section, dict):
+                return
+            for field, axis in fields.items():
+                value = section.get(field)
+                # 百分比等字符串保持不变，布尔值不是尺寸
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and value:
+                    section[field] = max(1, int(round(value * factors[axis])))
+
+        scaled = copy.deepcopy(template)
+        config = scaled['template']
+        config['background']['size'] = f"{target_size[0]}x{target_size[1]}"
+
+        gradient = config['background'].get('gradient')
+        if isinstance(gradient, dict):
+            scale(gradient, {'radius': 'uniform'})
+            center = gradient.get('center')
+            if isinstance(center, list) and len(center) == 2:
+                scale_center = {'x': center[0], 'y': center[1]}
+                scale(scale_center, {'x': 'x', 'y': 'y'})
+                gradient['center'] = [scale_center['x'], scale_center['y']]
+
+        scale(config.get('overlay'), cls.SCALED_FIELDS['overlay'])
+
+        for element in config.get('elements', []):
+            cls._fill_render_defaults(element)
+            for key in ('font', 'position', 'wrap', 'style'):
+                scale(element.get(key), cls.SCALED_FIELDS[key])
+            effects = element.get('effects') or {}
+            for key in ('shadow', 'stroke'):
+                scale(effects.get(key), cls.SCALED_FIELDS[key])
+
+        return scaled
+
     @staticmethod
     def replace_variables(template_str: str, variables: Dict[str, str]) -> str:
         """
@@ -183,18 +538,21 @@ class TemplateEngine:
         Returns:
             替换后的字符串
         """
-        result = template_str
-
-        # 替换 {{title}}
-        if '{{title}}' in result:
-            result = result.replace('{{title}}', variables.get('title', ''))
-
-        # 替换 {{subtitle}}
-        if '{{subtitle}}' in result:
-            subtitle = variables.get('subtitle', '')
-            result = result.replace('{{subtitle}}', subtitle)
-
-        return result
+        if '{{' not in template_str:
+            return template_str
+
+        # 占位符位置按模板字符串预先编译，替换时只做一次拼接
+        result = []
+        for literal, name in _compile_placeholders(template_str):
+            result.append(literal)
+            if name is None:
+                continue
+            if name in variables:
+                result.append(variables[name] or '')
+            elif name not in DEFAULT_VARIABLES:
+                # 未知变量原样保留
+                result.append('{{' + name + '}}')
+        return ''.join(result)
 
     @staticmethod
     def parse_position(position_config: Dict, image_width: int, image_height: int) -> tuple[int, int, str]:
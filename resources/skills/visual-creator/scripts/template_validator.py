@@ -113,9 +113,16 @@ class TemplateValidator:
                     errors.append("渐变背景缺少gradient字段")
                 else:
                     grad = bg['gradient']
-                    for field in ['from', 'to', 'direction']:
+                    # 多色标 stops 可代替 from/to
+                    required = ['direction'] if grad.get('stops') else ['from', 'to', 'direction']
+                    for field in required:
                         if field not in grad:
                             errors.append(f"gradient缺少{field}字段")
+                    valid_directions = ['horizontal', 'vertical', 'diagonal', 'radial']
+                    if 'direction' in grad and grad['direction'] not in valid_directions:
+                        errors.append(f"无效的gradient.direction: {grad['direction']}")
+                    if 'stops' in grad and (not isinstance(grad['stops'], list) or len(grad['stops']) < 2):
+                        errors.append("gradient.stops必须是至少包含两个颜色的数组")
 
         # 7. 验证元素配置
         if 'elements' in template:
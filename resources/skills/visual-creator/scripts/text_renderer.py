@@ -1,12 +1,157 @@
 """
 文字渲染器
 使用PIL精确绘制文字，支持自动换行、字体效果、精确定位
+
+文字、阴影、描边和装饰元素都画在 TextLayer 上（每个元素只占自己包围盒大小的图块），
+整个模板的元素画完后一次性合成到底图。
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 import re
+import sys
+from bisect import bisect_right
+
+sys.path.insert(0, str(Path(__file__).parent))
+from font_index import get_font_index
+
+
+class TextLayer:
+    """
+    文字/装饰合成图层
+
+    每次绘制只生成包围盒大小的 RGBA 图块，合成时把图块叠到一张按所有图块并集裁剪的图层上，
+    再与底图的对应区域合成一次（而不是每画一行就整张画布转换、合成一次）。
+    """
+
+    def __init__(self, size: Tuple[int, int]):
+        """
+        Args:
+            size: 画布尺寸
+        """
+        self.size = size
+        self._tiles: List[Tuple[int, int, Image.Image]] = []
+
+    def add(self, tile: Image.Image, x: int, y: int):
+        """添加一个 RGBA 图块（左上角位于画布坐标 (x, y)）"""
+        self._tiles.append((x, y, tile))
+
+    def text(
+        self,
+        xy: Tuple[float, float],
+        text: str,
+        font: ImageFont.FreeTypeFont,
+        fill: Tuple[int, int, int, int],
+        stroke_width: int = 0,
+        blur: float = 0
+    ):
+        """
+        绘制单色文字（可带描边、高斯模糊）
+
+        Args:
+            xy: 文字原点（与 ImageDraw.text 相同）
+            text: 文字
+            font: 字体
+            fill: RGBA 颜色
+            stroke_width: 描边宽度（描边与文字同色）
+            blur: 高斯模糊半径（用于柔和阴影）
+        """
+        left, top, right, bottom = font.getbbox(text, stroke_width=stroke_width)
+        if right <= left or bottom <= top:
+            return
+
+        pad = int(blur * 3 + 0.999)  # 模糊扩散范围
+        x0 = int(xy[0] + left) - pad
+        y0 = int(xy[1] + top) - pad
+        width = right - left + 2 * pad + 1
+        height = bottom - top + 2 * pad + 1
+
+        # 先画灰度遮罩，模糊后作为 alpha 通道
+        mask = Image.new('L', (width, height), 0)
+        ImageDraw.Draw(mask).text(
+            (xy[0] - x0, xy[1] - y0),
+            text,
+            font=font,
+            fill=255,
+            stroke_width=stroke_width
+        )
+        if blur > 0:
+            mask = mask.filter(ImageFilter.GaussianBlur(blur))
+        if fill[3] < 255:
+            mask = mask.point([v * fill[3] // 255 for v in range(256)])
+
+        tile = Image.new('RGBA', (width, height), tuple(fill[:3]) + (0,))
+        tile.putalpha(mask)
+        self.add(tile, x0, y0)
+
+    def shape(self, box: Tuple[int, int, int, int], paint):
+        """
+        绘制矢量图形
+
+        Args:
+            box: 图形在画布上的包围盒 (x1, y1, x2, y2)（含边界）
+            paint: paint(draw, dx, dy)，用 draw 绘制，坐标需加上偏移 (dx, dy)
+        """
+        x1, y1, x2, y2 = (int(v) for v in box)
+        if x2 < x1 or y2 < y1:
+            return
+        tile = Image.new('RGBA', (x2 - x1 + 1, y2 - y1 + 1), (0, 0, 0, 0))
+        paint(ImageDraw.Draw(tile), -x1, -y1)
+        self.add(tile, x1, y1)
+
+    def bounds(self) -> Optional[Tuple[int, int, int, int]]:
+        """所有图块的并集（裁剪到画布内），没有可见内容时返回 None"""
+        boxes = [(x, y, x + t.width, y + t.height) for x, y, t in self._tiles]
+        if not boxes:
+            return None
+        left = max(min(b[0] for b in boxes), 0)
+        top = max(min(b[1] for b in boxes), 0)
+        right = min(max(b[2] for b in boxes), self.size[0])
+        bottom = min(max(b[3] for b in boxes), self.size[1])
+        if right <= left or bottom <= top:
+            return None
+        return left, top, right, bottom
+
+    def composite(self, image: Image.Image) -> Image.Image:
+        """
+        把图层合成到底图（按绘制顺序叠加，结果与逐个直接绘制相同）
+
+        Args:
+            image: 底图
+
+        Returns:
+            合成后的图片（RGB/RGBA 底图原地修改）
+        """
+        box = self.bounds()
+        if box is None:
+            return image
+        left, top, right, bottom = box
+
+        layer = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        for x, y, tile in self._tiles:
+            # 超出画布的部分先裁掉
+            cx0, cy0 = max(x, left), max(y, top)
+            cx1, cy1 = min(x + tile.width, right), min(y + tile.height, bottom)
+            if cx1 <= cx0 or cy1 <= cy0:
+                continue
+            if (cx0, cy0, cx1, cy1) != (x, y, x + tile.width, y + tile.height):
+                tile = tile.crop((cx0 - x, cy0 - y, cx1 - x, cy1 - y))
+            layer.alpha_composite(tile, (cx0 - left, cy0 - top))
+        self._tiles = []
+
+        if image.mode == 'RGB':
+            # 不透明底图：按 alpha 混合即等价于 alpha_composite
+            image.paste(layer.convert('RGB'), (left, top), layer)
+            return image
+
+        mode = image.mode
+        if mode != 'RGBA':
+            image = image.convert('RGBA')
+        region = image.crop(box)
+        region.alpha_composite(layer)
+        image.paste(region, (left, top))
+        return image if mode == 'RGBA' else image.convert(mode)
 
 
 class TextRenderer:
@@ -24,53 +169,20 @@ class TextRenderer:
         'sans-serif': ['arial.ttf', 'Arial.ttf'],
     }
 
+    # 避头标点：不能出现在行首（放不下时悬挂在上一行末尾）
+    NO_LINE_START = set('。，、．！？；：）」』】》〉〕］｝”’…‥·・ー々〜～%,.!?;:)]}')
+    # 避尾标点：不能出现在行尾（连同后面的字一起移到下一行）
+    NO_LINE_END = set('（「『【《〈〔［｛“‘([{')
+
+    # 英文单词、数字等整体换行
+    WORD_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9'’._%-]*|\s|.", re.S)
+
     def __init__(self):
         """初始化渲染器"""
         self.fonts = {}  # 字体缓存
-        self._system_fonts = self._find_system_fonts()
-
-    def _find_system_fonts(self) -> Dict[str, Path]:
-        """
-        查找系统字体
-
-        Returns:
-            字体文件路径映射
-        """
-        font_paths = {}
-
-        # Windows字体目录
-        font_dirs = [
-            Path("C:/Windows/Fonts"),
-            Path("C:/Windows/System32/Fonts"),
-        ]
-
-        # macOS字体目录
-        font_dirs.extend([
-            Path("/System/Library/Fonts"),
-            Path("/Library/Fonts"),
-            Path("~/Library/Fonts").expanduser(),
-        ])
-
-        # Linux字体目录
-        font_dirs.extend([
-            Path("/usr/share/fonts"),
-            Path("/usr/local/share/fonts"),
-        ])
-
-        # 搜索字体文件
-        for font_dir in font_dirs:
-            if not font_dir.exists():
-                continue
-
-            for font_file in font_dir.rglob("*.ttf"):
-                font_name_lower = font_file.stem.lower()
-                font_paths[font_name_lower] = font_file
-
-            for font_file in font_dir.rglob("*.otf"):
-                font_name_lower = font_file.stem.lower()
-                font_paths[font_name_lower] = font_file
-
-        return font_paths
+        self._advances = {}  # 字形宽度缓存：id(font) → (font, {字符: 宽度})
+        # 系统字体索引在进程内共享并持久化到磁盘，首次查找字体时才加载（见 font_index.py）
+        self._font_index = get_font_index()
 
     def load_font(
         self,
@@ -97,14 +209,18 @@ class TextRenderer:
 
         # 尝试加载字体
         for font_name in family:
-            font = self._try_load_font(font_name, size)
+            font = self._try_load_font(font_name, size, weight)
             if font:
                 self.fonts[cache_key] = font
                 return font
 
         # 如果都失败了，使用默认字体
         try:
-            font = ImageFont.load_default()
+            try:
+                font = ImageFont.load_default(size)
+            except TypeError:
+                # Pillow < 10.1 的默认字体不支持字号
+                font = ImageFont.load_default()
             print(f"警告: 无法加载字体 {family}，使用默认字体")
             self.fonts[cache_key] = font
             return font
@@ -112,86 +228,235 @@ class TextRenderer:
             print(f"错误: 无法加载默认字体: {e}")
             raise
 
-    def _try_load_font(self, font_name: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
+    def _try_load_font(self, font_name: str, size: int, weight: str = "normal") -> Optional[ImageFont.FreeTypeFont]:
         """
         尝试加载单个字体
 
         Args:
-            font_name: 字体名称
+            font_name: 字体名称（映射表中的名称、字体文件名或字体族名）
             size: 字体大小
+            weight: 字体粗细（bold 时优先使用同族的粗体字形）
 
         Returns:
             PIL字体对象或None
         """
-        # 1. 尝试从映射表查找
-        if font_name in self.FONT_MAP:
-            for filename in self.FONT_MAP[font_name]:
-                font_path = self._system_fonts.get(filename.lower())
-                if font_path and font_path.exists():
-                    try:
-                        return ImageFont.truetype(str(font_path), size)
-                    except Exception:
-                        continue
+        style = 'Bold' if weight == 'bold' else None
 
-        # 2. 直接查找字体文件名
-        font_path = self._system_fonts.get(font_name.lower())
-        if font_path and font_path.exists():
+        # 1. 映射表中的文件名，2. 字体名本身（文件名或字体族名），都是查字典
+        candidates = list(self.FONT_MAP.get(font_name, [])) + [font_name]
+        for candidate in candidates:
+            font_path = self._font_index.lookup(candidate, style)
+            if not font_path:
+                continue
             try:
-                return ImageFont.truetype(str(font_path), size)
+                return ImageFont.truetype(font_path, size)
             except Exception:
-                pass
-
-        # 3. 尝试直接用文件名
-        for system_path in self._system_fonts.values():
-            if font_name.lower() in system_path.name.lower():
-                try:
-                    return ImageFont.truetype(str(system_path), size)
-                except Exception:
-                    continue
+                continue
 
         return None
 
-    def wrap_text(
+    def _glyph_advances(self, font: ImageFont.FreeTypeFont) -> Dict[str, float]:
+        """该字体（含字号）的字形宽度缓存（同时持有字体对象，保证 id 不被复用）"""
+        entry = self._advances.get(id(font))
+        if entry is None:
+            entry = self._advances[id(font)] = (font, {})
+        return entry[1]
+
+    def _measure(self, text: str, advances: Dict[str, float], font: ImageFont.FreeTypeFont) -> float:
+        """逐字累加宽度（字形宽度只测一次）"""
+        width = 0.0
+        for char in text:
+            advance = advances.get(char)
+            if advance is None:
+                advance = advances[char] = font.getlength(char)
+            width += advance
+        return width
+
+    def layout_text(
         self,
         text: str,
         font: ImageFont.FreeTypeFont,
-        max_width: int
-    ) -> List[str]:
+        max_width: int,
+        max_lines: Optional[int] = None,
+        ellipsis: str = '...'
+    ) -> List[Tuple[str, float]]:
         """
-        自动换行
+        自动换行并返回每行宽度
+
+        按字形宽度逐字累加（每个字形只测一次），整体线性时间：
+        - 中文逐字换行，英文单词和数字整体换行（单词比整行还长时再逐字拆开）
+        - 避头尾：，。！？等不放在行首（悬挂在上一行，每行最多悬挂一个，
+          连续多个时把前一个字一起移到下一行），（《“等不放在行尾；
+          移到下一行的字放不下时少移一些，保证每行不超过 max_width（行尾悬挂的一个标点除外）
+        - 文本中的换行符强制换行
+        - 超过 max_lines 时，最后一行用二分查找放下尽可能多的字再加省略号
 
         Args:
             text: 文本内容
             font: 字体对象
             max_width: 最大宽度（像素）
+            max_lines: 最大行数（可选）
+            ellipsis: 截断时追加的省略号
 
         Returns:
-            换行后的文本列表
+            [(行文本, 行宽度)]
         """
-        lines = []
-        words = list(text)  # 中文按字符分割
+        advances = self._glyph_advances(font)
+        lines: List[Tuple[str, float]] = []
+        # 每行记录 (片段, 宽度)，以便避尾时把末尾片段移到下一行
+        current: List[Tuple[str, float]] = []
+        current_width = 0.0
+        # 每行在原文中的起始位置（截断时从这里取剩余文本）
+        line_starts = [0]
+
+        def flush(next_start: int):
+            while current and current[-1][0].isspace():
+                current.pop()
+            lines.append((''.join(unit for unit, _ in current), sum(w for _, w in current)))
+            line_starts.append(next_start)
+
+        units = []
+        for match in self.WORD_PATTERN.finditer(text):
+            unit = match.group(0)
+            width = self._measure(unit, advances, font)
+            if len(unit) > 1 and width > max_width:
+                # 超长单词逐字拆开
+                for offset, char in enumerate(unit):
+                    units.append((char, advances[char], match.start() + offset))
+            else:
+                units.append((unit, width, match.start()))
 
-        current_line = []
+        for unit, width, start in units:
+            if unit == '\n':
+                flush(start + 1)
+                current, current_width = [], 0.0
+                continue
 
-        for word in words:
-            test_line = ''.join(current_line + [word])
+            if current and current_width + width > max_width:
+                carried = []
+                if unit[0] in self.NO_LINE_START:
+                    if current_width <= max_width:
+                        # 避头：标点悬挂在本行末尾（每行最多悬挂一个）
+                        current.append((unit, width))
+                        current_width += width
+                        continue
+                    # 本行已悬挂过标点：把最后一个普通字连同其后的标点一起移到下一行；
+                    # 本行没有可移动的普通字（如整行都是标点）时，直接在此处换行
+                    split = len(current) - 1
+                    while split > 0 and current[split][0][0] in self.NO_LINE_START:
+                        split -= 1
+                    if split > 0:
+                        carried = current[split:]
+                        del current[split:]
+
+                # 避尾：行尾的开括号/引号随下一个字一起换行
+                while len(current) > 1 and current[-1][0][-1] in self.NO_LINE_END:
+                    carried.insert(0, current.pop())
+
+                # 移到下一行的片段加上当前片段也要放得下（当前片段是避头标点时可以悬挂），
+                # 放不下时把开头的片段留在本行（本行是原行的前缀，宽度不会超）
+                def fits(width_sum: float) -> bool:
+                    if width_sum + width <= max_width:
+                        return True
+                    return unit[0] in self.NO_LINE_START and width_sum <= max_width
+
+                while carried and not fits(sum(w for _, w in carried)):
+                    current.append(carried.pop(0))
+                carried_start = start - sum(len(u) for u, _ in carried)
+
+                flush(carried_start)
+                current = carried
+                current_width = sum(w for _, w in carried)
+                if unit.isspace() and not current:
+                    continue
 
-            # 获取文本宽度
-            bbox = font.getbbox(test_line)
-            text_width = bbox[2] - bbox[0]
+            if not current and unit.isspace() and lines:
+                # 自动换行后的行首空白不保留
+                continue
 
-            if text_width <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(''.join(current_line))
-                current_line = [word]
+            current.append((unit, width))
+            current_width += width
 
-        if current_line:
-            lines.append(''.join(current_line))
+        if current or not lines:
+            flush(len(text))
+
+        if max_lines and len(lines) > max_lines:
+            lines = lines[:max_lines - 1] + [
+                self._fit_with_ellipsis(text[line_starts[max_lines - 1]:], font, max_width, ellipsis)
+            ]
 
         return lines
 
+    def layout_overflows(
+        self,
+        lines: List[Tuple[str, float]],
+        font: ImageFont.FreeTypeFont,
+        max_width: int
+    ) -> List[Tuple[str, float]]:
+        """
+        找出超宽的行（layout_text 保证每行不超过 max_width，只允许行尾悬挂一个避头标点）
+
+        Args:
+            lines: layout_text 的结果
+            font: 字体对象
+            max_width: 最大宽度（像素）
+
+        Returns:
+            超宽的行（单个字符本身就比 max_width 宽的行除外）
+        """
+        advances = self._glyph_advances(font)
+        overflows = []
+        for line, width in lines:
+            if len(line) > 1 and line[-1] in self.NO_LINE_START:
+                width -= self._measure(line[-1], advances, font)
+            if width > max_width and len(line) > 1:
+                overflows.append((line, width))
+        return overflows
+
+    def _fit_with_ellipsis(
+        self,
+        text: str,
+        font: ImageFont.FreeTypeFont,
+        max_width: int,
+        ellipsis: str
+    ) -> Tuple[str, float]:
+        """二分查找能和省略号一起放进 max_width 的最长前缀"""
+        advances = self._glyph_advances(font)
+        ellipsis_width = self._measure(ellipsis, advances, font)
+        available = max_width - ellipsis_width
+
+        # 前缀宽度（只累加到超出可用宽度为止）
+        prefix = [0.0]
+        for char in text.replace('\n', ''):
+            if prefix[-1] > available:
+                break
+            prefix.append(prefix[-1] + self._measure(char, advances, font))
+
+        count = max(bisect_right(prefix, available) - 1, 0)
+        kept = text.replace('\n', '')[:count].rstrip()
+        return kept + ellipsis, self._measure(kept, advances, font) + ellipsis_width
+
+    def wrap_text(
+        self,
+        text: str,
+        font: ImageFont.FreeTypeFont,
+        max_width: int,
+        max_lines: Optional[int] = None
+    ) -> List[str]:
+        """
+        自动换行
+
+        Args:
+            text: 文本内容
+            font: 字体对象
+            max_width: 最大宽度（像素）
+            max_lines: 最大行数（可选，超出时末行加省略号）
+
+        Returns:
+            换行后的文本列表
+        """
+        return [line for line, _ in self.layout_text(text, font, max_width, max_lines)]
+
     def calculate_text_size(
         self,
         text: str,
@@ -271,7 +536,8 @@ class TextRenderer:
         image: Image.Image,
         element_config: Dict,
         variables: Dict[str, str],
-        template_engine
+        template_engine,
+        layer: TextLayer = None
     ) -> Image.Image:
         """
         渲染单个文字元素
@@ -281,16 +547,22 @@ class TextRenderer:
             element_config: 元素配置
             variables: 变量字典
             template_engine: 模板引擎实例
+            layer: 合成图层（可选；传入时只画到图层上，由调用方统一合成）
 
         Returns:
             渲染后的图片
         """
+        own_layer = layer is None
+        if own_layer:
+            layer = TextLayer(image.size)
+
         # 1. 检查元素类型
         element_type = element_config.get('type')
 
         if element_type == 'decoration':
             # 渲染装饰元素
-            return self._render_decoration(image, element_config, template_engine)
+            self._render_decoration(image, element_config, template_engine, layer)
+            return layer.composite(image) if own_layer else image
 
         # 2. 检查可选元素
         if element_type == 'optional':
@@ -329,6 +601,7 @@ class TextRenderer:
 
         # 7. 获取换行配置
         wrap_config = element_config.get('wrap', {})
+        effects = element_config.get('effects', {})
 
         if wrap_config.get('enabled', True):
             max_width_str = wrap_config.get('max_width', '80%')
@@ -337,27 +610,16 @@ class TextRenderer:
             line_height = wrap_config.get('line_height', 1.3)
             align = wrap_config.get('align', 'center')
 
-            # 自动换行
-            lines = self.wrap_text(content, font, max_width)
-
-            # 限制行数
-            if len(lines) > max_lines:
-                lines = lines[:max_lines]
-                # 如果超出，添加省略号
-                if len(lines[-1]) > 3:
-                    lines[-1] = lines[-1][:-3] + '...'
+            # 自动换行（超出行数时末行加省略号），同时得到每行宽度
+            layout = self.layout_text(content, font, max_width, max_lines)
+            lines = [line for line, _ in layout]
+            line_widths = [int(round(width)) for _, width in layout]
 
             # 计算总高度
             line_bbox = font.getbbox('测')
             single_line_height = line_bbox[3] - line_bbox[1]
             total_height = int(single_line_height * line_height * len(lines))
 
-            # 计算每行宽度
-            line_widths = []
-            for line in lines:
-                bbox = font.getbbox(line)
-                line_widths.append(bbox[2] - bbox[0])
-
             max_text_width = max(line_widths) if line_widths else 0
 
             # 计算起始位置
@@ -369,14 +631,10 @@ class TextRenderer:
                 anchor
             )
 
-            # 8. 创建绘制对象
-            draw = ImageDraw.Draw(image)
-
-            # 9. 绘制每一行
+            # 8. 绘制每一行
+            line_step = int(single_line_height * line_height)
             current_y = pos_y
-            for i, line in enumerate(lines):
-                line_width = line_widths[i]
-
+            for line, line_width in zip(lines, line_widths):
                 # 水平对齐
                 if align == 'center':
                     line_x = pos_x + (max_text_width - line_width) // 2
@@ -385,68 +643,10 @@ class TextRenderer:
                 else:  # left
                     line_x = pos_x
 
-                # 绘制阴影（如果启用）
-                effects = element_config.get('effects', {})
-                shadow_config = effects.get('shadow', {})
-
-                if isinstance(shadow_config, dict) and shadow_config.get('enabled', False):
-                    shadow_color = shadow_config.get('color', 'rgba(0,0,0,0.5)')
-                    shadow_offset_x = shadow_config.get('offset_x', 4)
-                    shadow_offset_y = shadow_config.get('offset_y', 4)
-
-                    # 解析颜色为RGBA元组
-                    shadow_rgba = self._parse_color(shadow_color)
-
-                    # 如果有透明度，需要创建临时图层
-                    if shadow_rgba[3] < 255:
-                        temp = Image.new('RGBA', image.size, (0, 0, 0, 0))
-                        temp_draw = ImageDraw.Draw(temp)
-                        temp_draw.text(
-                            (line_x + shadow_offset_x, current_y + shadow_offset_y),
-                            line,
-                            font=font,
-                            fill=shadow_rgba
-                        )
-                        # 合并到原图
-                        image = Image.alpha_composite(
-                            image.convert('RGBA'),
-                            temp
-                        ).convert(image.mode)
-                        draw = ImageDraw.Draw(image)
-                    else:
-                        # 不透明，直接绘制
-                        draw.text(
-                            (line_x + shadow_offset_x, current_y + shadow_offset_y),
-                            line,
-                            font=font,
-                            fill=shadow_rgba[:3]  # RGB only for non-transparent
-                        )
-
-                # 绘制描边（如果启用）
-                stroke_config = effects.get('stroke', {})
-                if isinstance(stroke_config, dict) and stroke_config.get('enabled', False):
-                    stroke_color = stroke_config.get('color', '#000000')
-                    stroke_width = stroke_config.get('width', 2)
-
-                    draw.text(
-                        (line_x, current_y),
-                        line,
-                        font=font,
-                        fill=stroke_color,
-                        stroke_width=stroke_width
-                    )
-
-                # 绘制主文字
-                font_color = font_config.get('color', '#000000')
-                draw.text(
-                    (line_x, current_y),
-                    line,
-                    font=font,
-                    fill=font_color
-                )
+                self._draw_text_line(layer, (line_x, current_y), line, font, font_config, effects)
 
                 # 移动到下一行
-                current_y += int(single_line_height * line_height)
+                current_y += line_step
 
         else:
             # 不换行，直接绘制
@@ -458,77 +658,100 @@ class TextRenderer:
                 anchor
             )
 
-            draw = ImageDraw.Draw(image)
-
-            # 绘制阴影
-            effects = element_config.get('effects', {})
-            shadow_config = effects.get('shadow', {})
-            if isinstance(shadow_config, dict) and shadow_config.get('enabled', False):
-                shadow_offset_x = shadow_config.get('offset_x', 4)
-                shadow_offset_y = shadow_config.get('offset_y', 4)
-                shadow_color = shadow_config.get('color', 'rgba(0,0,0,0.5)')
-
-                # 解析颜色为RGBA元组
-                shadow_rgba = self._parse_color(shadow_color)
-
-                # 如果有透明度，需要创建临时图层
-                if shadow_rgba[3] < 255:
-                    temp = Image.new('RGBA', image.size, (0, 0, 0, 0))
-                    temp_draw = ImageDraw.Draw(temp)
-                    temp_draw.text(
-                        (pos_x + shadow_offset_x, pos_y + shadow_offset_y),
-                        content,
-                        font=font,
-                        fill=shadow_rgba
-                    )
-                    # 合并到原图
-                    image = Image.alpha_composite(
-                        image.convert('RGBA'),
-                        temp
-                    ).convert(image.mode)
-                    draw = ImageDraw.Draw(image)
-                else:
-                    # 不透明，直接绘制
-                    draw.text(
-                        (pos_x + shadow_offset_x, pos_y + shadow_offset_y),
-                        content,
-                        font=font,
-                        fill=shadow_rgba[:3]  # RGB only
-                    )
+            self._draw_text_line(layer, (pos_x, pos_y), content, font, font_config, effects)
 
-            # 绘制主文字
-            font_color = font_config.get('color', '#000000')
-            draw.text(
-                (pos_x, pos_y),
-                content,
-                font=font,
-                fill=font_color
-            )
+        return layer.composite(image) if own_layer else image
 
-        return image
-
-    def _render_decoration(
+    def render_elements(
         self,
         image: Image.Image,
-        element_config: Dict,
+        elements: List[Dict],
+        variables: Dict[str, str],
         template_engine
     ) -> Image.Image:
         """
-        渲染装饰元素
+        渲染模板的全部文字/装饰元素（画在同一图层上，最后合成一次）
 
         Args:
             image: PIL图片对象
-            element_config: 元素配置
+            elements: 元素配置列表
+            variables: 变量字典
             template_engine: 模板引擎实例
 
         Returns:
             渲染后的图片
         """
+        layer = TextLayer(image.size)
+        for element in elements:
+            self.render_text(image, element, variables, template_engine, layer=layer)
+        return layer.composite(image)
+
+    def _draw_text_line(
+        self,
+        layer: TextLayer,
+        xy: Tuple[int, int],
+        text: str,
+        font: ImageFont.FreeTypeFont,
+        font_config: Dict,
+        effects: Dict
+    ):
+        """
+        绘制一行文字：阴影 → 描边 → 主文字
+
+        Args:
+            layer: 合成图层
+            xy: 文字位置
+            text: 文字
+            font: 字体
+            font_config: 字体配置（取 color）
+            effects: 效果配置（shadow/stroke）
+        """
+        x, y = xy
+
+        # 绘制阴影（如果启用）
+        shadow_config = effects.get('shadow', {})
+        if isinstance(shadow_config, dict) and shadow_config.get('enabled', False):
+            layer.text(
+                (x + shadow_config.get('offset_x', 4), y + shadow_config.get('offset_y', 4)),
+                text,
+                font,
+                self._parse_color(shadow_config.get('color', 'rgba(0,0,0,0.5)')),
+                blur=shadow_config.get('blur', 0) or 0
+            )
+
+        # 绘制描边（如果启用）
+        stroke_config = effects.get('stroke', {})
+        if isinstance(stroke_config, dict) and stroke_config.get('enabled', False):
+            layer.text(
+                (x, y),
+                text,
+                font,
+                self._parse_color(stroke_config.get('color', '#000000')),
+                stroke_width=stroke_config.get('width', 2)
+            )
+
+        # 绘制主文字
+        layer.text((x, y), text, font, self._parse_color(font_config.get('color', '#000000')))
+
+    def _render_decoration(
+        self,
+        image: Image.Image,
+        element_config: Dict,
+        template_engine,
+        layer: TextLayer
+    ):
+        """
+        渲染装饰元素
+
+        Args:
+            image: PIL图片对象（用于取画布尺寸）
+            element_config: 元素配置
+            template_engine: 模板引擎实例
+            layer: 合成图层
+        """
         style = element_config.get('style', {})
         dec_type = style.get('type', 'line')
 
-        draw = ImageDraw.Draw(image)
-
         if dec_type == 'line':
             # 绘制线条
             position_config = element_config.get('position', {})
@@ -540,15 +763,15 @@ class TextRenderer:
 
             width = style.get('width', 100)
             height = style.get('height', 2)
-            color = style.get('color', '#000000')
+            fill = self._parse_color(style.get('color', '#000000'))
 
             # 计算线条矩形
-            x1 = x - width // 2
-            y1 = y - height // 2
-            x2 = x + width // 2
-            y2 = y + height // 2
+            box = (x - width // 2, y - height // 2, x + width // 2, y + height // 2)
 
-            draw.rectangle([x1, y1, x2, y2], fill=color)
+            layer.shape(box, lambda draw, dx, dy: draw.rectangle(
+                [box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy],
+                fill=fill
+            ))
 
         elif dec_type == 'rounded_rectangle':
             # 绘制圆角矩形
@@ -561,68 +784,55 @@ class TextRenderer:
 
             width = style.get('width', 200)
             height = style.get('height', 60)
-            bg_color = style.get('background', 'rgba(255,255,255,0.2)')
-            border_color = style.get('border_color', '#FFFFFF')
+            fill = self._parse_color(style.get('background', 'rgba(255,255,255,0.2)'))
+            outline = self._parse_color(style.get('border_color', '#FFFFFF'))
             border_width = style.get('border_width', 2)
             corner_radius = style.get('corner_radius', 10)
 
             # 计算矩形坐标
-            x1 = x - width // 2
-            y1 = y - height // 2
-            x2 = x + width // 2
-            y2 = y + height // 2
-
-            # 绘制圆角矩形
-            from PIL import Image, ImageDraw
-            draw = ImageDraw.Draw(image)
+            box = (x - width // 2, y - height // 2, x + width // 2, y + height // 2)
 
-            # 简化版圆角矩形
-            draw.rounded_rectangle(
-                [x1, y1, x2, y2],
+            layer.shape(box, lambda draw, dx, dy: draw.rounded_rectangle(
+                [box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy],
                 radius=corner_radius,
-                fill=self._parse_color(bg_color),
-                outline=self._parse_color(border_color),
+                fill=fill,
+                outline=outline,
                 width=border_width
-            )
+            ))
 
         elif dec_type == 'brackets':
-            # 绘制角标
-            color = style.get('color', '#000000')
+            # 绘制角标（四个角各占一个小图块）
+            fill = self._parse_color(style.get('color', '#000000'))
             line_width = style.get('width', 3)
             corner_size = style.get('corner_size', 60)
             padding = style.get('padding', 50)
 
-            draw = ImageDraw.Draw(image)
-
-            # 左上角
-            draw.line([
-                (padding, padding + corner_size),
-                (padding, padding),
-                (padding + corner_size, padding)
-            ], fill=color, width=line_width)
-
-            # 右上角
-            draw.line([
-                (image.width - padding - corner_size, padding),
-                (image.width - padding, padding),
-                (image.width - padding, padding + corner_size)
-            ], fill=color, width=line_width)
-
-            # 左下角
-            draw.line([
-                (padding, image.height - padding - corner_size),
-                (padding, image.height - padding),
-                (padding + corner_size, image.height - padding)
-            ], fill=color, width=line_width)
-
-            # 右下角
-            draw.line([
-                (image.width - padding - corner_size, image.height - padding),
-                (image.width - padding, image.height - padding),
-                (image.width - padding, image.height - padding - corner_size)
-            ], fill=color, width=line_width)
-
-        return image
+            left, top = padding, padding
+            right, bottom = image.width - padding, image.height - padding
+
+            corners = [
+                # 左上角
+                [(left, top + corner_size), (left, top), (left + corner_size, top)],
+                # 右上角
+                [(right - corner_size, top), (right, top), (right, top + corner_size)],
+                # 左下角
+                [(left, bottom - corner_size), (left, bottom), (left + corner_size, bottom)],
+                # 右下角
+                [(right - corner_size, bottom), (right, bottom), (right, bottom - corner_size)],
+            ]
+
+            half = line_width // 2 + 1
+            for points in corners:
+                xs = [px for px, _ in points]
+                ys = [py for _, py in points]
+                layer.shape(
+                    (min(xs) - half, min(ys) - half, max(xs) + half, max(ys) + half),
+                    lambda draw, dx, dy, points=points: draw.line(
+                        [(px + dx, py + dy) for px, py in points],
+                        fill=fill,
+                        width=line_width
+                    )
+                )
 
     def _parse_color(self, color_str: str) -> Tuple:
         """
@@ -652,15 +862,45 @@ class TextRenderer:
                 a = float(match.group(4)) if match.group(4) else 1.0
                 return (r, g, b, int(a * 255))
 
+        # 颜色名、#RGB 等 PIL 支持的格式
+        try:
+            return ImageColor.getcolor(color_str, 'RGBA')
+        except ValueError:
+            pass
+
         # 默认黑色
         return (0, 0, 0, 255)
 
 
+# 换行自检用例（避头尾标点连续出现、开括号连着单词等容易超宽的情况）
+LAYOUT_CHECK_TEXTS = [
+    '。a？！。%%”',
+    '“《（hello！',
+    '字！！！！！！！！！！！！',
+    '好好好好……………………好',
+    'Hello, world! This is a “quoted” text（括号）and more。。。',
+    '一二三四五六七八九十，一二三四五六七八九十。（测试）“引号”结束！',
+]
+
+
 def main():
-    """主程序 - 文字渲染测试"""
+    """主程序 - 文字渲染测试（检查换行结果不超宽，有超宽的行时返回 1）"""
     print("文字渲染器模块")
     print("此模块将被template_engine.py调用")
 
+    renderer = TextRenderer()
+    failures = 0
+    for size in (24, 32, 48):
+        font = renderer.load_font(['sans-serif'], size)
+        for text in LAYOUT_CHECK_TEXTS:
+            for max_width in range(size * 2, size * 12, size // 2):
+                for line, width in renderer.layout_overflows(renderer.layout_text(text, font, max_width), font, max_width):
+                    failures += 1
+                    print(f"超宽: {text!r} 字号 {size} 宽度 {max_width}: {line!r} ({width:.0f}px)")
+
+    print(f"换行自检: {'通过' if not failures else f'{failures} 行超宽'}")
+    return 1 if failures else 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())